@@ -0,0 +1,36 @@
+from src.batch.runner import BatchRunner, load_queries
+from src.config.setup import config
+from src.llm.router import get_router
+from src.llm.throttle import get_rate_limiter
+from src.tools.toolkit import Toolkit
+from src.utils.http import get_http_client
+from src.utils.tracing import get_tracer
+from src.utils.io import get_trace_writer
+import argparse
+import asyncio
+import json
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of queries; rerun the same command to resume")
+    parser.add_argument("input", help="JSONL file with one {\"id\": ..., \"query\": ...} object per line")
+    parser.add_argument("output", help="JSONL file answers are appended to (also the checkpoint)")
+    parser.add_argument("--workers", type=int, default=config.BATCH.get('workers', 4), help="Queries answered concurrently")
+    args = parser.parse_args()
+
+    toolkit = Toolkit()
+    runner = BatchRunner(None, toolkit, workers=args.workers, router=get_router())
+    try:
+        summary = asyncio.run(runner.run(load_queries(args.input), args.output))
+        summary["latency"] = get_tracer().metrics.snapshot()["histograms"]
+        summary["rate_limit"] = get_rate_limiter().snapshot()
+        if toolkit.prefetcher is not None:
+            summary["prefetch"] = toolkit.prefetcher.snapshot()
+        print(json.dumps(summary, indent=2))
+    finally:
+        toolkit.close()
+        get_http_client().close()
+        get_tracer().close()
+        get_trace_writer().close()
+
+if __name__ == "__main__":
+    main()
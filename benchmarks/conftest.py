@@ -0,0 +1,37 @@
+"""pytest-benchmark suite for the agent hot paths.
+
+    python -m pytest benchmarks --benchmark-autosave                     # store a run under .benchmarks/
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:15%
+
+Saved runs carry the commit id, so a run can be compared against any earlier one
+(`pytest-benchmark compare 0001 0002`).
+"""
+import importlib.util
+
+import pytest
+
+from src.llm.request import RequestBuilder
+from benchmarks.extraction import load_fixtures
+from benchmarks.serialization import MODEL_CONFIG
+
+
+if importlib.util.find_spec("pytest_benchmark") is None:
+    # The suite needs the benchmark fixture; without the plugin it is skipped instead of erroring
+    collect_ignore_glob = ["test_*.py"]
+
+
+class StubModel:
+    """Just enough of Model to build an agent without a Bedrock client."""
+
+    def request_builder(self):
+        return RequestBuilder(MODEL_CONFIG)
+
+
+@pytest.fixture
+def stub_model():
+    return StubModel()
+
+
+@pytest.fixture(scope="session")
+def html_fixtures():
+    return load_fixtures()
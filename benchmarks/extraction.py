@@ -0,0 +1,87 @@
+"""HTML extraction backends compared over the saved page fixtures.
+
+For every fixture in benchmarks/fixtures and every extractor registered in src.tools.extract this
+reports the median parse time, memory, and the size of the text handed to the model. Memory is the
+tracemalloc peak of one extraction (Python heap) plus, for the lxml backend, the C heap held by the
+parsed libxml2 document (glibc only). Run from the repository root:
+
+    python -m benchmarks.extraction --repeat 20
+"""
+import argparse
+import ctypes
+import glob
+import os
+import statistics
+import time
+import tracemalloc
+from src.tools.extract import EXTRACTORS, get_extractor
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+class _MallInfo2(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_size_t) for name in
+                ("arena", "ordblks", "smblks", "hblks", "hblkhd", "usmblks", "fsmblks", "uordblks", "fordblks", "keepcost")]
+
+
+def _c_heap_in_use():
+    try:
+        libc = ctypes.CDLL("libc.so.6")
+        libc.mallinfo2.restype = _MallInfo2
+    except (OSError, AttributeError):
+        return None
+    info = libc.mallinfo2()
+    return info.uordblks + info.hblkhd
+
+
+def load_fixtures():
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html"))):
+        with open(path, 'r', encoding='utf-8') as file:
+            fixtures[os.path.splitext(os.path.basename(path))[0]] = file.read()
+    return fixtures
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough Claude-style estimate, good enough to compare extractors with each other
+    return len(text) // 4
+
+
+def memory_kb(extractor, html: str) -> int:
+    tracemalloc.start()
+    extractor.extract(html)
+    python_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    c_heap = 0
+    if extractor.name == "lxml":
+        import lxml.html
+        before = _c_heap_in_use()
+        document = lxml.html.document_fromstring(html)
+        after = _c_heap_in_use()
+        c_heap = (after - before) if before is not None else 0
+        del document
+    return (python_peak + c_heap) // 1024
+
+
+def run(repeat: int) -> None:
+    fixtures = load_fixtures()
+    print(f"{'fixture':<16} {'extractor':<12} {'html KB':>8} {'median ms':>10} {'mem KB':>8} {'chars':>7} {'~tokens':>8}")
+    for fixture, html in fixtures.items():
+        for name in EXTRACTORS:
+            extractor = get_extractor(name)
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                page = extractor.extract(html)
+                timings.append(time.perf_counter() - start)
+            print(f"{fixture:<16} {extractor.name:<12} {len(html) / 1024:>8.0f} {statistics.median(timings) * 1000:>10.2f} "
+                  f"{memory_kb(extractor, html):>8} {len(page.text):>7} {estimate_tokens(page.text):>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.repeat)
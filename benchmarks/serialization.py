@@ -0,0 +1,82 @@
+"""Serialization cost per agent iteration as the history grows.
+
+Compares re-dumping the full AnthropicAPIBody on every call (the previous Model.generate path)
+with the incremental RequestBuilder. Run from the repository root:
+
+    python -m benchmarks.serialization --iterations 200
+"""
+import argparse
+import time
+from src.llm.request import RequestBuilder
+from src.types.models import Message, ContentBlock, APIToolSchema, AnthropicAPIBody, InputSchema
+from src.config.static import google_search_properties, wiki_search_properties, webpage_search_properties
+
+
+MODEL_CONFIG = {"max_tokens": 30000, "top_k": 248, "top_p": 0.999}
+SYSTEM_PROMPT = "Answer the query and decide if this information require tools or not. " * 20
+TOOLS = [
+    APIToolSchema(name="google_search", description="Search Google for up-to-date information", input_schema=InputSchema(properties=google_search_properties, required=["query"])),
+    APIToolSchema(name="wikipedia_search", description="Search Wikipedia for people, places, phenomenon", input_schema=InputSchema(properties=wiki_search_properties, required=["query"])),
+    APIToolSchema(name="read_web_page", description="Read the text content of a web page", input_schema=InputSchema(properties=webpage_search_properties, required=["query"])),
+]
+
+
+def iteration_messages(i: int, result_size: int):
+    """One tool round trip: the assistant tool_use turn and the user tool_result turn."""
+    return [
+        Message(role="assistant", content=[
+            ContentBlock(text=f"Looking up part {i} of the question."),
+            ContentBlock(type="tool_use", id=f"toolu_{i}", name="google_search", input={"query": f"query {i}"}),
+        ]),
+        Message(role="user", content=[
+            ContentBlock(type="tool_result", tool_use_id=f"toolu_{i}", content="lorem ipsum dolor sit amet " * (result_size // 27)),
+        ]),
+    ]
+
+
+def full_dump(messages):
+    return AnthropicAPIBody(
+        anthropic_version="bedrock-2023-05-31",
+        max_tokens=MODEL_CONFIG['max_tokens'],
+        top_k=MODEL_CONFIG['top_k'],
+        top_p=MODEL_CONFIG['top_p'],
+        messages=messages,
+        tools=[tool for tool in TOOLS],
+        tool_choice={"type": "auto"},
+        system=SYSTEM_PROMPT
+    ).model_dump_json(exclude_none=True)
+
+
+def run(iterations: int, result_size: int, report_every: int) -> None:
+    builder = RequestBuilder(MODEL_CONFIG)
+    messages = [Message(role="user", content="Who is Neil Perry from Dead Poets Society?")]
+    total_full = total_incremental = 0.0
+
+    print(f"{'iteration':>9} {'messages':>8} {'body KB':>8} {'full ms':>8} {'incr ms':>8} {'speedup':>8}")
+    for i in range(1, iterations + 1):
+        messages.extend(iteration_messages(i, result_size))
+
+        start = time.perf_counter()
+        full = full_dump(messages)
+        full_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        incremental = builder.build(messages, TOOLS, SYSTEM_PROMPT)
+        incremental_time = time.perf_counter() - start
+
+        total_full += full_time
+        total_incremental += incremental_time
+        if i % report_every == 0 or i == 1:
+            print(f"{i:>9} {len(messages):>8} {len(full) / 1024:>8.0f} {full_time * 1000:>8.3f} {incremental_time * 1000:>8.3f} {full_time / incremental_time:>7.1f}x")
+
+    print(f"total: full {total_full * 1000:.1f} ms, incremental {total_incremental * 1000:.1f} ms "
+          f"({builder.encoded_messages} messages encoded once)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--result-size", type=int, default=4000, help="Characters per tool result")
+    parser.add_argument("--report-every", type=int, default=25)
+    args = parser.parse_args()
+    run(args.iterations, args.result_size, args.report_every)
@@ -0,0 +1,66 @@
+"""Cold start of the CLI: imports and construction of the agent and its tools, in a fresh interpreter.
+
+Each measurement spawns `python -X importtime` so nothing is cached from the calling process. Run
+from the repository root:
+
+    python -m benchmarks.startup --runs 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# What main() does before the first prompt, without entering the input loop
+CLI_STARTUP = "import main; agent = main.Agent(); main.Toolkit().register(agent)"
+# Only needed once a request is sent, a page is read or text is cleaned; none of them at startup
+DEFERRED_MODULES = ("boto3", "botocore", "s3transfer", "bs4", "lxml", "requests", "urllib3", "wikipediaapi", "sqlite3", "spellchecker", "contractions")
+
+
+def run(code: str, *flags: str) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    return subprocess.run([sys.executable, *flags, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+def import_times(code: str = CLI_STARTUP) -> Dict[str, int]:
+    """Cumulative import time in microseconds of every top-level import `code` triggers."""
+    times = {}
+    for line in run(code, "-X", "importtime").stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nested imports are indented under the module that triggered them and already counted there
+        if cumulative.strip().isdigit() and not name[1:].startswith(" "):
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def startup_import_ms(code: str = CLI_STARTUP) -> float:
+    """Import time of `code` on top of a bare interpreter (site, encodings...), in milliseconds."""
+    baseline = import_times("pass")
+    return sum(us for name, us in import_times(code).items() if name not in baseline) / 1000
+
+
+def loaded_modules(code: str = CLI_STARTUP) -> List[str]:
+    return run(f"{code}\nimport sys; print('\\n'.join(sys.modules))").stdout.split()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [startup_import_ms() for _ in range(args.runs)]
+    print(f"startup imports: best {min(runs):.1f} ms, worst {max(runs):.1f} ms over {args.runs} runs")
+    times = import_times()
+    for name, us in sorted(times.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+    eager = sorted({name.split('.')[0] for name in loaded_modules()} & set(DEFERRED_MODULES))
+    print(f"deferred modules loaded at startup: {eager or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
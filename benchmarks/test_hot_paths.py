@@ -0,0 +1,78 @@
+import pytest
+
+from src.agent.agent import AsyncAgent
+from src.llm.request import RequestBuilder
+from src.tools.extract import EXTRACTORS, get_extractor, clean_lines
+from src.types.models import Message, ContentBlock, SearchResult
+from src.utils.data import clean_text
+from benchmarks.extraction import load_fixtures
+from benchmarks.serialization import MODEL_CONFIG, SYSTEM_PROMPT, TOOLS, iteration_messages, full_dump
+
+
+HISTORY_SIZES = [10, 100, 400]
+FIXTURE_NAMES = sorted(load_fixtures())
+
+
+def history(rounds, result_size=2000):
+    messages = [Message(role="user", content="Who is Neil Perry from Dead Poets Society?")]
+    for i in range(rounds):
+        messages.extend(iteration_messages(i, result_size))
+    return messages
+
+
+@pytest.mark.parametrize("blocks", HISTORY_SIZES)
+def test_add_message_merge(benchmark, stub_model, blocks):
+    # Same-role messages are merged into the last one, which re-normalizes its whole content list
+    agent = AsyncAgent(model=stub_model)
+    last = Message(role="user", content=[ContentBlock(type="tool_result", tool_use_id=f"t{i}", content="result") for i in range(blocks)])
+    incoming = Message(role="user", content=[ContentBlock(type="tool_result", tool_use_id="new", content="result")])
+
+    def setup():
+        agent.messages = [Message(role="assistant", content="thinking"), last.model_copy()]
+        return (incoming,), {}
+
+    benchmark.pedantic(agent.add_message, setup=setup, rounds=200)
+
+
+@pytest.mark.parametrize("rounds", HISTORY_SIZES)
+def test_full_body_dump(benchmark, rounds):
+    messages = history(rounds)
+    benchmark(full_dump, messages)
+
+
+@pytest.mark.parametrize("rounds", HISTORY_SIZES)
+def test_incremental_body_build(benchmark, rounds):
+    # One iteration of an ongoing conversation: the history is cached, the newest round is encoded
+    messages = history(rounds)
+    builder = RequestBuilder(MODEL_CONFIG)
+
+    def setup():
+        builder.build(messages[:-2], TOOLS, SYSTEM_PROMPT)
+        return (messages, TOOLS, SYSTEM_PROMPT), {}
+
+    benchmark.pedantic(builder.build, setup=setup, rounds=50)
+
+
+@pytest.mark.parametrize("extractor", sorted(EXTRACTORS))
+@pytest.mark.parametrize("fixture", FIXTURE_NAMES)
+def test_extract_page(benchmark, html_fixtures, fixture, extractor):
+    benchmark(get_extractor(extractor).extract, html_fixtures[fixture])
+
+
+@pytest.mark.parametrize("fixture", FIXTURE_NAMES)
+def test_clean_lines(benchmark, html_fixtures, fixture):
+    text = get_extractor("html.parser").extract(html_fixtures[fixture]).text
+    benchmark(clean_lines, text)
+
+
+@pytest.mark.parametrize("fixture", FIXTURE_NAMES)
+def test_clean_text(benchmark, html_fixtures, fixture):
+    text = get_extractor("html.parser").extract(html_fixtures[fixture]).text
+    benchmark(clean_text, text)
+
+
+@pytest.mark.parametrize("results", [1, 10, 50])
+def test_tool_result_formatting(benchmark, results):
+    # The string AsyncAgent.act_all puts into each tool_result block
+    act_result = [SearchResult(title=f"result {i}", query="eiffel tower", summary="lorem ipsum dolor sit amet " * 80) for i in range(results)]
+    benchmark(lambda: f"{[obj.model_dump() for obj in act_result]}")
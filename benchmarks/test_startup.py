@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+from benchmarks.startup import CLI_STARTUP, run, startup_import_ms
+
+
+# Regression budget for what the CLI imports before the first prompt; was ~440 ms before imports were deferred.
+# Wall-clock time depends on the machine, so the check only runs when a budget is given, e.g. STARTUP_BUDGET_MS=300;
+# tests/test_startup.py covers which modules are imported on every run
+STARTUP_BUDGET_MS = os.environ.get("STARTUP_BUDGET_MS")
+
+
+def test_cli_startup(benchmark):
+    benchmark.pedantic(run, args=(CLI_STARTUP,), rounds=5)
+
+
+@pytest.mark.skipif(not STARTUP_BUDGET_MS, reason="set STARTUP_BUDGET_MS to check the startup time budget")
+def test_cli_startup_import_budget():
+    # Best of three: a cold interpreter is noisy, a real regression shows up in every run
+    budget = float(STARTUP_BUDGET_MS)
+    best = min(startup_import_ms() for _ in range(3))
+    assert best <= budget, f"CLI startup imports take {best:.0f} ms, budget is {budget:.0f} ms"
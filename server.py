@@ -0,0 +1,12 @@
+from src.server.app import serve
+import argparse
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve agent sessions over HTTP")
+    parser.add_argument("--host", help="Bind address (default: server.host in config.yml)")
+    parser.add_argument("--port", type=int, help="Port (default: server.port in config.yml)")
+    args = parser.parse_args()
+    serve(args.host, args.port)
+
+if __name__ == "__main__":
+    main()
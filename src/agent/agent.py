@@ -1,64 +1,201 @@
-from src.config.logging import logger
+from src.config.logging import logger, PAYLOAD
 from src.config.setup import config
 from src.llm.model import Model
+from src.llm.throttle import backoff_delay, error_code, is_retryable
+from src.llm.router import ModelRouter, get_router, SUMMARIZE, SYNTHESIS, TOOL_SELECTION
 from src.tools.tool import Tool
-from src.types.models import Message, Choice, APIToolSchema, InputSchema, ContentBlock, SearchResult
+from src.tools.cache import ResultCache
+from src.agent.budget import TokenBudget
+from src.agent.memory import RollingSummarizer, turn_starts
+from src.tools.retrieval import ChunkRetriever
+from src.types.models import Message, Choice, APIToolSchema, InputSchema, ContentBlock, SearchResult, Usage, AgentState
 from src.types.typing import Name, Observation
-from typing import Optional, List, Dict, Callable
-from src.utils.io import read_file, write_to_file
+from typing import Any, Optional, List, Dict, Callable
+from src.utils.io import read_file, get_trace_writer
+from src.utils.tracing import Tracer, Span, get_tracer, current_span
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 
 
-class Agent:
-    def __init__(self) -> None:
-        self.model = Model(config.MODEL_NAME)
+# Phases of AgentState: think asks the model, act runs the tools it asked for
+IDLE = "idle"
+THINK = "think"
+ACT = "act"
+DONE = "done"
+
+
+def install_executor(loop: asyncio.AbstractEventLoop, concurrent_queries: int = 1) -> ThreadPoolExecutor:
+    """Give `loop` a default executor with room for `concurrent_queries` agents at once.
+
+    Model calls (a streamed one holds its thread for the whole generation), request builds and blocking
+    tools all go through asyncio.to_thread, and the stock executor has only min(32, cpus + 4) threads.
+    Sized by `executor_threads` in config.yml, or one model call plus `max_parallel_tools` per query.
+    """
+    threads = config.EXECUTOR_THREADS or max(1, concurrent_queries) * (config.MAX_PARALLEL_TOOLS + 1)
+    executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="agent-io")
+    loop.set_default_executor(executor)
+    return executor
+
+
+class AsyncAgent:
+    """Asyncio-native agent: LLM calls and tool I/O are awaited so one event loop can serve many conversations."""
+    def __init__(self, model: Optional[Model] = None, router: Optional[ModelRouter] = None) -> None:
+        # Models (and their Bedrock clients) can be shared between agents running on the same loop.
+        # An explicit model answers every turn; otherwise turns are routed per role (config `routing`)
+        if router is None:
+            router = ModelRouter.single(model) if model is not None else get_router()
+        self.router = router
+        self.model = router.model_for(SYNTHESIS)
         self.tools: Dict[Name, Tool] = {}
-        self.messages: List[Message] = []
+        self.tool_list: List[APIToolSchema] = []
+        # History, iteration and pending work of the current query; see checkpoint()/restore()
+        self.state = AgentState()
         self.system_prompt = read_file(config.PROMPT_TEMPLATE_PATH)
-        self.query = ""
-        self.max_iterations = 5
-        self.current_iteration = 0
+        self.max_iterations = config.MAX_ITERATIONS
         self.summarize_template = read_file(config.SUMMARIZE_TEMPLATE_PATH)
+        self.max_parallel_tools = config.MAX_PARALLEL_TOOLS
+        # When streaming, text deltas go to on_text as they arrive instead of waiting for the whole body
+        self.stream = config.STREAM_RESPONSES
+        self.max_retries = config.BEDROCK.get('max_retries', 5)
+        self.backoff_base = config.BEDROCK.get('backoff_base', 1.0)
+        self.backoff_max = config.BEDROCK.get('backoff_max', 30.0)
+        self.on_text: Callable[[str], None] = self.print_delta
+        self._stream_started = False
+        # Set once a delta of the current attempt reached on_text; such an attempt cannot be retried unseen
+        self._deltas_sent = False
+        # Keeps the serialized history between iterations so only new messages are encoded
+        self.request_builders = {tier: tier_model.request_builder() for tier, tier_model in router.tiers.items()}
+        self.request_builder = self.request_builders[router.tier_for(SYNTHESIS)]
+        # Trims the history before a request would overflow the context window
+        self.token_budget = TokenBudget.from_config(config.TOKEN_BUDGET, config.MODEL_CONFIG['max_tokens'])
+        # Older turns are folded into `memory` (sent with the system prompt), recent ones stay verbatim
+        self.summarizer = RollingSummarizer(
+            router.model_for(SUMMARIZE),
+            self.summarize_template,
+            keep_turns=config.MEMORY.get('keep_turns', 2),
+            compact_after_tokens=config.MEMORY.get('compact_after_tokens', 20000)
+        )
+        self.background_compaction = config.MEMORY.get('background', True)
+        self._compaction: Optional[asyncio.Task] = None
+        self._system_with_memory = ("", self.system_prompt)
+        # Large tool outputs are indexed here and only their most relevant passages are sent
+        self.retriever = ChunkRetriever.from_config(config.RETRIEVAL)
+        # Spans for execute > iteration > llm.query/llm.attempt and tool.act, plus latency histograms
+        self.tracer: Tracer = get_tracer()
+        # Iteration log lines are queued; a background thread appends them in batches
+        self.trace_writer = get_trace_writer()
+        self.trace_path = config.OUTPUT_TRACE_PATH
+        self._iteration_span: Optional[Span] = None
+
+    # The conversation lives in `state`; these keep the attribute names the rest of the code uses
+    @property
+    def messages(self) -> List[Message]:
+        return self.state.messages
+
+    @messages.setter
+    def messages(self, messages: List[Message]) -> None:
+        self.state.messages = messages
+
+    @property
+    def query(self) -> str:
+        return self.state.query
+
+    @property
+    def current_iteration(self) -> int:
+        return self.state.iteration
+
+    @property
+    def memory(self) -> str:
+        return self.state.memory
+
+    @memory.setter
+    def memory(self, memory: str) -> None:
+        self.state.memory = memory
 
-    def register(self, name: Name, func: Callable[[str], str], description: str = "Argument to search", input_schema: InputSchema = InputSchema()) -> None:
-        self.tools[name] = Tool(name, func, description, input_schema)
+    @property
+    def usage(self) -> Usage:
+        # Token usage (including prompt cache reads/writes) of the current query
+        return self.state.usage
+
+    @property
+    def stop_reason(self) -> Optional[str]:
+        # How the last model turn ended; anything but end_turn means the answer is an error message
+        return self.state.stop_reason
+
+    def register(self, name: Name, func: Callable[[str], str], description: str = "Argument to search", input_schema: InputSchema = InputSchema(), cache: Optional[ResultCache] = None, cache_params: Optional[Dict] = None) -> None:
+        self.tools[name] = Tool(name, func, description, input_schema, cache=cache, cache_params=cache_params)
+        self.tool_list = [tool.api_object for tool in self.tools.values()]
 
     def trace(self, role: str, content: str) -> None:
-        return
-        if role != "system":
-            self.messages.append(Message(role=role, content=content))
-        write_to_file(path=config.OUTPUT_TRACE_PATH, content=f"{role}: {content}\n")
-
-    def think(self, reason_chain: Optional[Message]) -> Message:
-        """Main thinking method that handles iteration logic and coordinates the thinking process."""
-        self.current_iteration += 1
-        logger.info(f"Starting iteration {self.current_iteration}")
-        write_to_file(path=config.OUTPUT_TRACE_PATH, content=f"\n{'='*50}\nIteration {self.current_iteration}\n{'='*50}\n")
-
-        if self.current_iteration > self.max_iterations:
+        # Kept as an event on the span being recorded (iteration, tool call...)
+        span = current_span()
+        if span is not None:
+            span.add_event(role, content=content)
+
+    def _end_iteration(self) -> None:
+        if self._iteration_span is not None:
+            self._iteration_span.end()
+            self._iteration_span = None
+
+    async def think(self) -> None:
+        """Think step: one model turn on the history plus the pending message, then `decide` picks the next phase."""
+        state = self.state
+        state.iteration += 1
+        logger.info(f"Starting iteration {state.iteration}")
+        self.trace_writer.write(self.trace_path, f"\n{'='*50}\nIteration {state.iteration}\n{'='*50}\n")
+        # An iteration spans the model call and the tools it asks for, not the iterations it leads to
+        self._end_iteration()
+        self._iteration_span = self.tracer.start_span("agent.iteration", iteration=state.iteration)
+
+        if state.iteration > self.max_iterations:
             logger.warning("Reached maximum iterations. Stopping.")
-            #self.trace("assistant", "I'm sorry, but I couldn't find a satisfactory answer within the allowed number of iterations.")
-            return self.decide({
+            if state.pending_message is not None:
+                # Tool results of the last turn: without them the history would end in an unanswered tool_use
+                self.add_message(state.pending_message)
+                state.pending_message = None
+            await self.decide({
                 "stop_reason": "error",
                 "content": "max_iteraction_reached : I'm sorry, but I couldn't find a satisfactory answer within the allowed number of iterations."
             })
-        
-        # Prepare the user query message
-        prompt = Message(
-            role="user",
-            content=self.query
-        )
-        if reason_chain:
-            self.add_message(reason_chain)
-        else:
-            self.add_message(prompt)
-        
+            return
+
+        if state.pending_message is not None:
+            self.add_message(state.pending_message)
+            state.pending_message = None
+
+        await self._maybe_compact()
+
         # Query the LLM and get response
-        response = self.query_llm()
-        
-        #("assistant", f"Thought: {response}")
-        return self.decide(response)
+        with self.tracer.activate(self._iteration_span):
+            response = await self.query_llm()
+        await self.decide(response)
+
+    async def act_pending(self) -> None:
+        """Act step: run the tool calls of the last model turn; their results are sent with the next think step."""
+        state = self.state
+        with self.tracer.activate(self._iteration_span):
+            tool_results = await self.act_all(state.pending_tool_calls)
+        self._end_iteration()
+        state.pending_tool_calls = []
+        state.pending_message = Message(role="user", content=tool_results)
+        state.phase = THINK
+
+    async def step(self) -> str:
+        """Advance the current query by one think or act step and return the phase it is in afterwards.
+
+        Each step is a bounded amount of work and leaves `state` consistent, so a caller can stop after
+        any step, checkpoint, interleave other agents, and carry on with `run()` later.
+        """
+        if self.state.phase == THINK:
+            await self.think()
+        elif self.state.phase == ACT:
+            await self.act_pending()
+        return self.state.phase
+
+    def _finish(self, answer: Message) -> None:
+        self.state.answer = answer
+        self.state.phase = DONE
 
-    
     def _is_valid_response(self, response: Dict) -> bool:
         if not isinstance(response, dict):
             return False
@@ -77,7 +214,21 @@ class Agent:
         if isinstance(message.content, str):
             print(f"{message.role}: {message.content}")
         else:
-            print(f"{message.role}: {''.join(block.text for block in message.content)}")
+            print(f"{message.role}: {''.join(block.text for block in message.content if block.text)}")
+
+    def print_delta(self, text: str) -> None:
+        if not self._stream_started:
+            self._stream_started = True
+            print("======================================")
+            print("assistant: ", end="")
+        print(text, end="", flush=True)
+
+    def end_delta(self) -> None:
+        print()
+
+    def _send_delta(self, text: str) -> None:
+        self._deltas_sent = True
+        self.on_text(text)
 
     
     def _normalize_content(self, content) -> List[ContentBlock]:
@@ -112,32 +263,37 @@ class Agent:
         return message
 
 
-    def decide(self, response: Dict) -> Message:
+    async def decide(self, response: Dict) -> None:
+        """Move `state` to the phase the model's turn calls for."""
+        state = self.state
         stop_reason = response.get('stop_reason')
+        state.stop_reason = stop_reason
         content_blocks = response.get('content', [])
+        if self._iteration_span is not None:
+            self._iteration_span.set(stop_reason=stop_reason)
+            if stop_reason != 'tool_use':
+                self._end_iteration()
 
         if stop_reason is None:
             logger.warning("No stop_reason found in response")
-            #self.trace("assistant", "I received an incomplete response. Let me try again.")
-            return self._create_and_print_message("Incomplete response received. Retrying.")
+            self._finish(self._create_and_print_message("Incomplete response received. Retrying."))
+            return
 
         if stop_reason == 'tool_use':
-            # Handle tool usage
-            tool_use_block = None
-            for content_block in content_blocks:
-                if content_block.get('type') == 'tool_use':
-                    tool_use_block = content_block
-                    break
-            
-            if tool_use_block:
-                tool_name = tool_use_block.get('name')
-                tool_input = tool_use_block.get('input', {})
-                act_result = self.act(tool_name, tool_input)
-                formatted_result = [obj.model_dump() for obj in act_result]
-                response_msg = self._create_and_print_message(
-                    f"Used {tool_name}, results: {formatted_result}. Considering next action."
-                )
-                return self.think(response_msg)
+            # Handle tool usage: every tool_use block of the turn is answered in one follow-up message
+            tool_use_blocks = [block for block in content_blocks if block.get('type') == 'tool_use']
+
+            if tool_use_blocks:
+                if self._stream_started:
+                    self.end_delta()
+                # The assistant turn must stay in the history so each tool_result can reference its tool_use_id
+                self.add_message(Message(
+                    role="assistant",
+                    content=[ContentBlock(**content) for content in content_blocks]
+                ))
+                state.pending_tool_calls = tool_use_blocks
+                state.phase = ACT
+                return
         elif stop_reason == 'end_turn':
             # Handle direct response
             assistant_answer = Message(
@@ -145,30 +301,39 @@ class Agent:
                 content=[ContentBlock(**content) for content in content_blocks]
             )
             self.add_message(assistant_answer)
-            self.print_message(assistant_answer)
-            return assistant_answer
+            if self._stream_started:
+                # Already shown delta by delta
+                self.end_delta()
+            else:
+                self.print_message(assistant_answer)
+            self._finish(assistant_answer)
+            return
         elif stop_reason == 'max_tokens':
-            #Summarize the messages
-            last_item = self.messages.pop()
-            summary_message = self.summarize()
+            # Summarize, then ask again on the compacted history (the current turn's last message is still in it)
+            summary_message = await self.summarize()
             if summary_message.content.startswith('error_summarizing: '):
-                return self._create_and_print_message(summary_message.content)
-            return self.think(last_item)
+                self._finish(self._create_and_print_message(summary_message.content))
+                return
+            state.phase = THINK
+            return
         elif stop_reason == 'error':
-            return self._create_and_print_message(f"I received an error {response['content']}.")
+            if self._stream_started:
+                self.end_delta()
+            self._finish(self._create_and_print_message(f"I received an error {response['content']}."))
+            return
         else:
             logger.warning(f"Unknown stop_reason: {stop_reason}")
-            response_msg = self._create_and_print_message(
+            state.pending_message = self._create_and_print_message(
                 f"Unexpected response type: {stop_reason}. Response: {str(response)}. Retrying."
             )
-            return self.think(response_msg)
+            state.phase = THINK
+            return
 
-        response_msg = self._create_and_print_message(
+        self._finish(self._create_and_print_message(
             f"No action taken... please check again"
-        )
-        return response_msg
+        ))
 
-    def act(self, tool_name: Name, tool_input: Dict) -> List[SearchResult]: 
+    async def act(self, tool_name: Name, tool_input: Dict) -> List[SearchResult]: 
         query_value = ""
         tool_str = tool_name.__str__()
         if 'query' in tool_input:
@@ -183,36 +348,212 @@ class Agent:
                 )
             ]
         
-        return self.tools[tool_str].use(query_value)
+        return await self.tools[tool_str].ause(query_value)
 
-    def summarize(self) -> Message:
-        content = self.messages
-        summarize_prompt = Message(
-            role="user",
-            content=self.summarize_template
-        )
-        response = self.query_llm()
+    async def act_all(self, tool_use_blocks: List[Dict]) -> List[ContentBlock]:
+        # Tools run concurrently, capped so a single turn cannot flood the executor
+        semaphore = asyncio.Semaphore(self.max_parallel_tools)
+
+        async def run(block: Dict) -> ContentBlock:
+            tool_name = block.get('name')
+            with self.tracer.span("tool.act", tool=tool_name) as span:
+                async with semaphore:
+                    act_result = await self.act(tool_name, block.get('input', {}))
+                if isinstance(act_result, list):
+                    raw_chars = sum(len(getattr(obj, 'summary', '')) for obj in act_result)
+                    act_result = self.retriever.reduce(act_result, self.query)
+                    formatted_result = [obj.model_dump() for obj in act_result]
+                    self._create_and_print_message(f"Used {tool_name}, results: {formatted_result}. Considering next action.")
+                    content = f"{formatted_result}"
+                    span.set(results=len(act_result), raw_chars=raw_chars, result_chars=len(content))
+                    return ContentBlock(type="tool_result", tool_use_id=block.get('id'), content=content)
+                span.error = str(act_result)
+                self._create_and_print_message(f"Used {tool_name}, failed: {act_result}")
+                return ContentBlock(type="tool_result", tool_use_id=block.get('id'), content=str(act_result), is_error=True)
+
+        return list(await asyncio.gather(*(run(block) for block in tool_use_blocks)))
 
-        if response['stop_reason'] == 'error':
+    def _system(self) -> str:
+        # Built once per memory update so the request/budget caches see a stable string
+        if self._system_with_memory[0] != self.memory:
+            self._system_with_memory = (self.memory, f"{self.system_prompt}\n\nMemory of the earlier conversation:\n{self.memory}")
+        return self._system_with_memory[1]
+
+    async def compact(self, keep_turns: Optional[int] = None) -> bool:
+        """Fold turns older than the last `keep_turns` into `self.memory`; returns whether the history shrank."""
+        split = self.summarizer.split_point(self.messages, keep_turns)
+        if split == 0:
+            return False
+        aged = self.messages[:split]
+        with self.tracer.span("agent.compact", messages=split):
+            memory = await self.summarizer.summarize(self.memory, aged)
+
+        # The history may have moved on (or been trimmed) meanwhile; only drop the prefix that was summarized
+        if len(self.messages) < split or any(old is not current for old, current in zip(aged, self.messages)):
+            logger.info("History changed while summarizing, discarding the summary")
+            return False
+        del self.messages[:split]
+        self.memory = memory
+        return True
+
+    async def compact_current_turn(self) -> bool:
+        """Fold the tool rounds of the current turn into `self.memory`, keeping its question; returns whether the history shrank."""
+        starts = turn_starts(self.messages)
+        if not starts or starts[-1] + 1 >= len(self.messages):
+            return False
+        start = starts[-1]
+        rounds = self.messages[start + 1:]
+        with self.tracer.span("agent.compact", messages=len(rounds), current_turn=True):
+            memory = await self.summarizer.summarize(self.memory, rounds)
+
+        if len(self.messages) != start + 1 + len(rounds) or any(old is not current for old, current in zip(rounds, self.messages[start + 1:])):
+            logger.info("History changed while summarizing, discarding the summary")
+            return False
+        del self.messages[start + 1:]
+        self.memory = memory
+        return True
+
+    async def _run_compaction(self) -> None:
+        try:
+            await self.compact()
+        except Exception as e:
+            logger.error(f"Background summarization failed: {e}")
+
+    @property
+    def compacting(self) -> bool:
+        """A background compaction is still running and may yet rewrite `messages` and `memory`."""
+        return self._compaction is not None and not self._compaction.done()
+
+    async def _maybe_compact(self) -> None:
+        if self.compacting:
+            return
+        if not self.summarizer.compact_after_tokens:
+            return
+        if self.token_budget.estimate(self.messages, self.tool_list, self._system())["messages"] < self.summarizer.compact_after_tokens:
+            return
+        if self.background_compaction:
+            # Runs alongside the next LLM call and tool round instead of in front of them
+            self._compaction = asyncio.create_task(self._run_compaction())
+        else:
+            await self._run_compaction()
+
+    async def wait_for_compaction(self) -> None:
+        if self._compaction is not None:
+            await self._compaction
+            self._compaction = None
+
+    async def summarize(self) -> Message:
+        # Blocking path, used when the model ran out of room: compact everything but the current turn now.
+        # On a first turn (every batch query) there is nothing older, so the turn's own tool rounds are folded
+        await self.wait_for_compaction()
+        try:
+            compacted = await self.compact(keep_turns=1) or await self.compact_current_turn()
+        except Exception as e:
             return Message(
                 role="assistant",
-                content=f"error_summarizing: {response['content']}"
+                content=f"error_summarizing: {e}"
             )
-        assistant_text = ''.join([item['text'] for item in response['content'] if item['type'] == 'text'])
-        summarized_content = Message(
+        if not compacted:
+            return Message(
+                role="assistant",
+                content="error_summarizing: nothing left to summarize"
+            )
+        return Message(
             role="assistant",
-            content=assistant_text
+            content=self.memory
         )
-        self.messages = [summarized_content]
-        return summarized_content
 
-    def execute(self, query: str) -> Message: 
-        self.current_iteration = 0
-        self.query = query
-        return self.think(None)
+    def start(self, query: str) -> None:
+        """Begin a new query on top of the existing history; `run()` (or `step()`) then drives it."""
+        state = self.state
+        state.query = query
+        state.iteration = 0
+        state.usage = Usage()
+        state.stop_reason = None
+        state.answer = None
+        state.pending_tool_calls = []
+        state.pending_message = Message(role="user", content=query)
+        state.phase = THINK
+
+    async def run(self, max_steps: Optional[int] = None) -> Optional[Message]:
+        """Step until the query is answered, or pause after `max_steps` steps and return None."""
+        steps = 0
+        with self.tracer.span("agent.execute", query_chars=len(self.query)) as span:
+            try:
+                while self.state.phase not in (DONE, IDLE) and (max_steps is None or steps < max_steps):
+                    await self.step()
+                    steps += 1
+            finally:
+                self._end_iteration()
+            span.set(iterations=self.current_iteration, stop_reason=self.stop_reason, phase=self.state.phase, **self.usage.model_dump())
+        if self.state.phase != DONE:
+            return None
+        await self._maybe_compact()
+        return self.state.answer
+
+    async def execute(self, query: str) -> Message:
+        self.start(query)
+        return await self.run()
+
+    def checkpoint(self) -> Dict[str, Any]:
+        """JSON-serializable snapshot of `state`, taken between steps.
+
+        Pages cut down by the retriever are saved with it, the history still tells the model to read_more of them.
+        """
+        return {**self.state.model_dump(mode="json"), "retrieval": self.retriever.dump()}
+
+    def restore(self, checkpoint: Dict[str, Any]) -> None:
+        self.state = AgentState.model_validate(checkpoint)
+        self.retriever.load(checkpoint.get("retrieval") or {})
+
+    async def _generate(self, tier: str, stream: bool) -> Dict:
+        model = self.router.tiers[tier]
+        with self.tracer.span("llm.call", tier=tier, model=getattr(model, 'model_id', None), stream=stream):
+            if stream:
+                return await model.agenerate_stream(
+                    messages=self.messages,
+                    tool_list=self.tool_list,
+                    system_prompt=self._system(),
+                    on_text=self._send_delta,
+                    request_builder=self.request_builders[tier]
+                )
+            return await model.agenerate(
+                messages=self.messages,
+                tool_list=self.tool_list,
+                system_prompt=self._system(),
+                request_builder=self.request_builders[tier]
+            )
+
+    async def _routed_generate(self, role: str) -> Dict:
+        """Ask the tier routed for `role`; a cheap tier's answer is redone by the escalation tier when it falls short."""
+        tier = self.router.tier_for(role)
+        if tier == self.router.escalate_to:
+            return await self._generate(tier, self.stream)
+
+        # Not streamed: a routing turn is mostly a tool call, and an escalated answer must not reach the user
+        try:
+            response = await self._generate(tier, False)
+            reason = self.router.escalation_reason(tier, response, self.tools)
+        except Exception as e:
+            response, reason = None, f"{type(e).__name__}: {e}"
+        if reason is None:
+            return response
+
+        if isinstance(response, dict):
+            # Paid for even though it is discarded
+            self.usage.add(response.get('usage'))
+        target = self.router.escalation_tier(tier, response)
+        logger.info(f"Escalating {role} turn from {tier} to {target}: {reason}")
+        self.tracer.metrics.count(f"llm.escalations[{tier}]")
+        span = current_span()
+        if span is not None:
+            span.set(escalated_from=tier, escalation_reason=reason)
+        return await self._generate(target, self.stream)
 
-    def query_llm(self) -> Dict:
-        max_retries = 3
+    async def query_llm(self) -> Dict:
+        max_retries = self.max_retries
+        # Turns that can still call tools are routing decisions; the last allowed turn has to answer
+        role = TOOL_SELECTION if self.tools and self.current_iteration < self.max_iterations else SYNTHESIS
         #print([tool.api_object.model_dump for tool in self.tools.values()])
 
         if len(self.messages) > 0:
@@ -223,35 +564,79 @@ class Agent:
                     content="With all the information gather, based on the query I've given, do you need more information from the tools? if not answer if you already have the information needed"
                 )
                 self.add_message(default_user_message)
+                role = SYNTHESIS
 
-        for attempt in range(max_retries):
-            try:
-                response = self.model.generate(
-                    messages=self.messages,
-                    tool_list=[tool.api_object for tool in self.tools.values()],
-                    system_prompt=self.system_prompt
-                )
-                logger.info(f"Thinking => {response}")
-                
-                # Validate response structure
-                if not self._is_valid_response(response):
-                    logger.warning(f"Invalid response structure on attempt {attempt + 1}: {response}")
-                    if attempt < max_retries - 1:
-                        continue
-                    else:
-                        raise Exception("Max retries reached, check the response again")
-                
-                return response
-                
-            except Exception as e:
-                logger.error(f"Error on attempt {attempt + 1}: {str(e)}")
-                if attempt < max_retries - 1:
-                    logger.info(f"Retrying... ({attempt + 2}/{max_retries})")
-                    continue
-                else:
-                    logger.error("Failed after all retries")
-                    #self.trace("assistant", f"I encountered an error: {str(e)}. Please try again.")
-                    return {
-                        'stop_reason': 'error',
-                        'content': f"I encountered an error: {str(e)}. Please try again."
-                    }
\ No newline at end of file
+        with self.tracer.span("llm.query", messages=len(self.messages)) as query_span:
+            token_estimate = self.token_budget.fit(self.messages, self.tool_list, self._system())
+            logger.info(f"Estimated request size: {token_estimate}")
+            query_span.set(estimated_input_tokens=token_estimate["total"])
+
+            for attempt in range(max_retries):
+                with self.tracer.span("llm.attempt", attempt=attempt + 1, stream=self.stream) as attempt_span:
+                    try:
+                        self._stream_started = False
+                        self._deltas_sent = False
+                        response = await self._routed_generate(role)
+                        logger.info("Thinking => %s", response, extra=PAYLOAD)
+                        if isinstance(response, dict):
+                            self.usage.add(response.get('usage'))
+                            attempt_span.set(stop_reason=response.get('stop_reason'), **(response.get('usage') or {}))
+                            if response.get('metrics'):
+                                attempt_span.set(time_to_first_token=response['metrics'].get('time_to_first_token'))
+
+                        # Validate response structure
+                        if not self._is_valid_response(response):
+                            logger.warning("Invalid response structure on attempt %s: %s", attempt + 1, response, extra=PAYLOAD)
+                            attempt_span.error = "invalid response structure"
+                            if attempt < max_retries - 1 and not self._deltas_sent:
+                                continue
+                            else:
+                                raise Exception("Max retries reached, check the response again")
+
+                        query_span.set(attempts=attempt + 1)
+                        return response
+
+                    except Exception as e:
+                        logger.error(f"Error on attempt {attempt + 1}: {str(e)}")
+                        attempt_span.error = str(e)
+                        retryable = is_retryable(e)
+                        attempt_span.set(retryable=retryable, error_code=error_code(e), partial_stream=self._deltas_sent)
+                        if self._deltas_sent:
+                            # A retry would stream the answer again after the part the client already shows
+                            logger.error("Stream failed after text was sent, not retrying")
+                            query_span.set(attempts=attempt + 1)
+                            query_span.error = str(e)
+                            return {
+                                'stop_reason': 'error',
+                                'content': f"The answer was interrupted: {str(e)}. Please try again."
+                            }
+                        if retryable and attempt < max_retries - 1:
+                            # Throttling and transient faults: back off with jitter so concurrent agents spread out
+                            delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                            attempt_span.set(backoff_seconds=round(delay, 3))
+                            logger.info(f"Retrying in {delay:.2f}s... ({attempt + 2}/{max_retries})")
+                            await asyncio.sleep(delay)
+                            continue
+                        else:
+                            logger.error("Failed after all retries" if retryable else f"Not retrying: {type(e).__name__}")
+                            #self.trace("assistant", f"I encountered an error: {str(e)}. Please try again.")
+                            query_span.set(attempts=attempt + 1)
+                            query_span.error = str(e)
+                            return {
+                                'stop_reason': 'error',
+                                'content': f"I encountered an error: {str(e)}. Please try again."
+                            }
+
+
+class Agent(AsyncAgent):
+    """Blocking facade kept for existing callers (REPL, scripts) that have no event loop of their own."""
+
+    def execute(self, query: str) -> Message:
+        return asyncio.run(self._execute_and_settle(query))
+
+    async def _execute_and_settle(self, query: str) -> Message:
+        install_executor(asyncio.get_running_loop())
+        answer = await super().execute(query)
+        # The event loop ends with this call, so a background summary has to land before returning
+        await self.wait_for_compaction()
+        return answer
@@ -0,0 +1,140 @@
+from src.config.logging import logger
+from src.types.models import Message, ContentBlock, APIToolSchema
+from src.agent.memory import is_turn_start
+from typing import List, Dict, Optional, Tuple, Any
+import json
+import math
+
+
+class TokenBudget:
+    """Pre-flight token accounting for the request the agent is about to send.
+
+    Counts are character-based estimates (no tokenizer round trip), cached per message so a growing
+    history is only measured once. When the estimate exceeds the budget, oversized tool outputs are
+    truncated (oldest first) and, if that is not enough, the oldest turns are dropped, before the
+    model is ever called. The current turn is never dropped (its question and tool_use/tool_result
+    pairs must stay together); when it alone is too large its tool outputs are cut down further.
+    """
+
+    message_overhead = 4
+    block_overhead = 4
+    # Tool results of the current turn are never cut below this
+    min_tool_result_chars = 200
+
+    def __init__(self, max_input_tokens: int, max_tool_result_tokens: int = 8000, chars_per_token: float = 3.5):
+        self.max_input_tokens = max_input_tokens
+        self.max_tool_result_tokens = max_tool_result_tokens
+        self.chars_per_token = chars_per_token
+        self.last_estimate: Dict[str, int] = {}
+
+        # id(message) -> (message, content object it was measured from, tokens)
+        self._message_tokens: Dict[int, Tuple[Message, Any, int]] = {}
+        self._system: Tuple[Optional[str], int] = (None, 0)
+        self._tools: Tuple[List[APIToolSchema], int] = ([], 0)
+
+    @classmethod
+    def from_config(cls, budget_config: Dict[str, Any], max_output_tokens: int) -> "TokenBudget":
+        # The context window is shared between the prompt and the completion
+        context_window = budget_config.get('context_window', 200000)
+        reserve = budget_config.get('reserve_tokens', 2000)
+        return cls(
+            max_input_tokens=context_window - max_output_tokens - reserve,
+            max_tool_result_tokens=budget_config.get('max_tool_result_tokens', 8000),
+            chars_per_token=budget_config.get('chars_per_token', 3.5)
+        )
+
+    def count(self, text: Optional[str]) -> int:
+        return math.ceil(len(text) / self.chars_per_token) if text else 0
+
+    def _block_tokens(self, block: ContentBlock) -> int:
+        tokens = self.block_overhead + self.count(block.text) + self.count(block.content)
+        if block.input:
+            tokens += self.count(json.dumps(block.input))
+        return tokens
+
+    def message_tokens(self, message: Message) -> int:
+        cached = self._message_tokens.get(id(message))
+        if cached and cached[0] is message and cached[1] is message.content:
+            return cached[2]
+        if isinstance(message.content, str):
+            tokens = self.message_overhead + self.count(message.content)
+        else:
+            tokens = self.message_overhead + sum(self._block_tokens(block) for block in message.content)
+        self._message_tokens[id(message)] = (message, message.content, tokens)
+        return tokens
+
+    def system_tokens(self, system_prompt: Optional[str]) -> int:
+        if self._system[0] is not system_prompt:
+            self._system = (system_prompt, self.count(system_prompt))
+        return self._system[1]
+
+    def tool_tokens(self, tool_list: List[APIToolSchema]) -> int:
+        cached_tools = self._tools[0]
+        if len(cached_tools) != len(tool_list) or any(cached is not tool for cached, tool in zip(cached_tools, tool_list)):
+            self._tools = (list(tool_list), sum(self.count(tool.model_dump_json(exclude_none=True)) for tool in tool_list))
+        return self._tools[1]
+
+    def estimate(self, messages: List[Message], tool_list: List[APIToolSchema], system_prompt: Optional[str]) -> Dict[str, int]:
+        estimate = {
+            "system": self.system_tokens(system_prompt),
+            "tools": self.tool_tokens(tool_list),
+            "messages": sum(self.message_tokens(message) for message in messages),
+        }
+        estimate["total"] = estimate["system"] + estimate["tools"] + estimate["messages"]
+        return estimate
+
+    def _truncate_tool_results(self, message: Message, max_chars: Optional[int] = None) -> bool:
+        if isinstance(message.content, str):
+            return False
+        max_chars = max_chars or int(self.max_tool_result_tokens * self.chars_per_token)
+        truncated = False
+        content = []
+        for block in message.content:
+            if block.type == "tool_result" and block.content and len(block.content) > max_chars:
+                dropped = len(block.content) - max_chars
+                block = block.model_copy(update={"content": f"{block.content[:max_chars]}\n... [truncated {dropped} characters]"})
+                truncated = True
+            content.append(block)
+        if truncated:
+            # A new content list (rather than in-place edits) lets the caches notice the change
+            message.content = content
+        return truncated
+
+    def fit(self, messages: List[Message], tool_list: List[APIToolSchema], system_prompt: Optional[str]) -> Dict[str, int]:
+        """Shrink `messages` in place until the request fits the budget; returns the final estimate."""
+        estimate = self.estimate(messages, tool_list, system_prompt)
+        initial_total = estimate["total"]
+
+        if estimate["total"] > self.max_input_tokens:
+            for message in messages:
+                if self._truncate_tool_results(message):
+                    estimate = self.estimate(messages, tool_list, system_prompt)
+                    if estimate["total"] <= self.max_input_tokens:
+                        break
+
+        dropped = 0
+        while estimate["total"] > self.max_input_tokens:
+            # Whole turns only, oldest first, so the history still starts on a clean user turn
+            next_start = next((index for index in range(1, len(messages)) if is_turn_start(messages[index])), None)
+            if next_start is None:
+                break
+            del messages[:next_start]
+            dropped += next_start
+            estimate = self.estimate(messages, tool_list, system_prompt)
+
+        max_chars = int(self.max_tool_result_tokens * self.chars_per_token)
+        while estimate["total"] > self.max_input_tokens and max_chars > self.min_tool_result_chars:
+            # Only the current turn is left: halve its tool outputs until the request fits
+            max_chars = max(self.min_tool_result_chars, max_chars // 2)
+            if any([self._truncate_tool_results(message, max_chars) for message in messages]):
+                estimate = self.estimate(messages, tool_list, system_prompt)
+
+        if estimate["total"] != initial_total:
+            logger.warning(f"Request trimmed from ~{initial_total} to ~{estimate['total']} tokens (budget {self.max_input_tokens}, dropped {dropped} messages)")
+        if len(self._message_tokens) > 2 * len(messages) + 16:
+            # Forget messages that left the history (trimmed, summarized away)
+            live = {id(message) for message in messages}
+            self._message_tokens = {key: value for key, value in self._message_tokens.items() if key in live}
+
+        self.last_estimate = estimate
+        return estimate
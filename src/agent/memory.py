@@ -0,0 +1,77 @@
+from src.config.logging import logger
+from src.types.models import Message
+from typing import List, Optional, Any
+import json
+
+
+def is_turn_start(message: Message) -> bool:
+    """A user message that opens a turn, i.e. one that does not answer a previous tool_use."""
+    if message.role != "user":
+        return False
+    return isinstance(message.content, str) or not any(block.type == "tool_result" for block in message.content)
+
+
+def turn_starts(messages: List[Message]) -> List[int]:
+    return [index for index, message in enumerate(messages) if is_turn_start(message)]
+
+
+def render_messages(messages: List[Message], max_result_chars: int = 2000) -> str:
+    """Plain-text transcript of `messages`, with tool calls and (clipped) tool outputs inline."""
+    lines = []
+    for message in messages:
+        if isinstance(message.content, str):
+            lines.append(f"{message.role}: {message.content}")
+            continue
+        for block in message.content:
+            if block.type == "tool_use":
+                lines.append(f"{message.role}: [called {block.name} with {json.dumps(block.input, ensure_ascii=False)}]")
+            elif block.type == "tool_result":
+                lines.append(f"tool result: {(block.content or '')[:max_result_chars]}")
+            elif block.text:
+                lines.append(f"{message.role}: {block.text}")
+    return "\n".join(lines)
+
+
+class RollingSummarizer:
+    """Folds aged conversation turns into a compact memory block.
+
+    The last `keep_turns` turns stay verbatim; everything older is merged into the running summary.
+    Each update only sends the previous summary plus the turns that aged out since the last one, never
+    the whole history again.
+    """
+
+    def __init__(self, model: Any, template: Optional[str], keep_turns: int = 2, compact_after_tokens: int = 20000):
+        self.model = model
+        self.template = template or "Summarize this conversation from beginning to finish with concise bullet point"
+        self.keep_turns = keep_turns
+        self.compact_after_tokens = compact_after_tokens
+
+    def split_point(self, messages: List[Message], keep_turns: Optional[int] = None) -> int:
+        """Index of the first message to keep verbatim; 0 when there is nothing old enough to compact."""
+        # The current (last) turn is always kept, it may still be waiting on tool results
+        keep_turns = max(1, self.keep_turns if keep_turns is None else keep_turns)
+        starts = turn_starts(messages)
+        if len(starts) <= keep_turns:
+            return 0
+        return starts[-keep_turns]
+
+    def prompt(self, summary: str, messages: List[Message]) -> str:
+        return (
+            f"{self.template}\n\n"
+            f"<previous_summary>\n{summary or 'None yet.'}\n</previous_summary>\n\n"
+            f"<new_turns>\n{render_messages(messages)}\n</new_turns>\n\n"
+            "Merge the new turns into the previous summary. Keep facts, names, sources and open questions. "
+            "Reply with the updated summary only."
+        )
+
+    async def summarize(self, summary: str, messages: List[Message]) -> str:
+        response = await self.model.agenerate(
+            messages=[Message(role="user", content=self.prompt(summary, messages))],
+            tool_list=[],
+            system_prompt="You maintain the running memory of a research conversation."
+        )
+        text = ''.join(item.get('text', '') for item in response.get('content', []) if item.get('type') == 'text')
+        if not text:
+            raise ValueError(f"Empty summary returned (stop_reason={response.get('stop_reason')})")
+        logger.info(f"Summarized {len(messages)} messages into {len(text)} characters of memory")
+        return text
@@ -0,0 +1,149 @@
+from src.config.logging import logger
+from src.agent.agent import AsyncAgent, install_executor
+from src.llm.model import Model
+from src.llm.router import ModelRouter
+from src.types.models import Message, Usage
+from typing import Any, Dict, List, Optional, Set
+import asyncio
+import json
+import os
+import time
+
+
+class BatchAgent(AsyncAgent):
+    """Silent, single-query agent: nothing is printed and no history is carried between questions."""
+
+    def __init__(self, model: Optional[Model], router: Optional[ModelRouter] = None) -> None:
+        super().__init__(model=model, router=router)
+        self.stream = False
+        # Discarded after one query, so summarizing its history would be wasted work
+        self.summarizer.compact_after_tokens = 0
+
+    def print_message(self, message: Message) -> None:
+        return
+
+    def print_delta(self, text: str) -> None:
+        return
+
+    def end_delta(self) -> None:
+        return
+
+
+def load_queries(path: str) -> List[Dict[str, Any]]:
+    """Read `{"id": ..., "query": ...}` lines; a missing id defaults to the line number."""
+    queries = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for line_number, line in enumerate(file, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"query": item}
+            if not item.get('query'):
+                raise ValueError(f"{path}:{line_number} has no 'query'")
+            item['id'] = str(item.get('id', line_number))
+            queries.append(item)
+    return queries
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    """Ids already answered successfully in `path`; failed and half-written lines are retried."""
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    # A crash mid-write can cut the last line inside a multibyte character
+    with open(path, 'r', encoding='utf-8', errors='replace') as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get('status') == 'ok':
+                done.add(str(record.get('id')))
+    return done
+
+
+class BatchRunner:
+    """Runs a list of queries over a pool of workers, appending one JSON record per query to `output_path`.
+
+    The output file doubles as the checkpoint: every record is flushed as soon as its query finishes,
+    and a rerun skips ids that already have an `ok` record.
+    """
+
+    def __init__(self, model: Optional[Model], toolkit: Any, workers: int = 4, router: Optional[ModelRouter] = None) -> None:
+        self.model = model
+        self.router = router
+        self.toolkit = toolkit
+        self.workers = workers
+        self.usage = Usage()
+        self.counters = {"ok": 0, "error": 0, "skipped": 0}
+
+    async def _answer(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        agent = BatchAgent(self.model, router=self.router)
+        self.toolkit.register(agent)
+        record: Dict[str, Any] = {"id": item['id'], "query": item['query']}
+        start = time.perf_counter()
+        try:
+            answer = await agent.execute(item['query'])
+            text = answer.content if isinstance(answer.content, str) else ''.join(block.text for block in answer.content if block.text)
+            record.update(status="ok" if agent.stop_reason == "end_turn" else "error", answer=text)
+        except Exception as e:
+            logger.exception(f"Query {item['id']} failed: {e}")
+            record.update(status="error", answer="", error=str(e))
+        record.update(
+            stop_reason=agent.stop_reason,
+            iterations=agent.current_iteration,
+            seconds=round(time.perf_counter() - start, 3),
+            usage=agent.usage.model_dump()
+        )
+        self.usage.add(record['usage'])
+        return record
+
+    async def run(self, queries: List[Dict[str, Any]], output_path: str) -> Dict[str, Any]:
+        install_executor(asyncio.get_running_loop(), self.workers)
+        done = load_checkpoint(output_path)
+        pending: asyncio.Queue = asyncio.Queue()
+        for item in queries:
+            if item['id'] in done:
+                self.counters["skipped"] += 1
+            else:
+                pending.put_nowait(item)
+        logger.info(f"Batch of {len(queries)} queries: {self.counters['skipped']} already done, {pending.qsize()} to run on {self.workers} workers")
+
+        start = time.perf_counter()
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        # A crash can leave a partial last line, possibly ending inside a multibyte character; start the
+        # next record on a fresh one. The last byte is checked in binary mode so it never has to be decoded.
+        needs_newline = False
+        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            with open(output_path, 'rb') as existing:
+                existing.seek(-1, os.SEEK_END)
+                needs_newline = existing.read(1) != b"\n"
+        with open(output_path, 'a', encoding='utf-8') as output:
+            if needs_newline:
+                output.write("\n")
+
+            async def worker() -> None:
+                while True:
+                    try:
+                        item = pending.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    record = await self._answer(item)
+                    self.counters[record['status']] += 1
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    output.flush()
+                    os.fsync(output.fileno())
+                    logger.info(f"Query {record['id']} {record['status']} in {record['seconds']}s")
+
+            await asyncio.gather(*(worker() for _ in range(max(1, self.workers))))
+
+        return {
+            "total": len(queries),
+            **self.counters,
+            "seconds": round(time.perf_counter() - start, 3),
+            "usage": self.usage.model_dump(),
+        }
@@ -1,11 +1,44 @@
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import json
 import logging
 import os
+import queue
+import random
+import re
+
+
+# Lines longer than this are cut; payload records (model responses...) are the usual offenders
+MAX_MESSAGE_CHARS = int(os.getenv('LOG_MAX_CHARS', '4000'))
+# Share of records logged with extra=PAYLOAD that are kept, e.g. 0.1 keeps one full response in ten
+PAYLOAD_SAMPLE_RATE = float(os.getenv('LOG_PAYLOAD_SAMPLE_RATE', '1.0'))
+# Mark a record as a (large, optional) payload: logger.info("Response: %s", body, extra=PAYLOAD)
+PAYLOAD = {"payload": True}
+
+SECRET_PATTERNS = [
+    # key=..., 'api_key': '...', "Authorization": "Bearer ..."
+    (re.compile(r"""(?i)(['"]?\b(?:key|api_?key|access_?token|secret|password|authorization)\b['"]?\s*[:=]\s*['"]?(?:bearer\s+)?)[^'"&\s,}]+"""), r"\1***"),
+    (re.compile(r"AIza[0-9A-Za-z\-_]{35}"), "***"),
+    (re.compile(r"\b(?:AKIA|ASIA)[0-9A-Z]{16}\b"), "***"),
+]
+
+
+def redact(text: str) -> str:
+    for pattern, replacement in SECRET_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def truncate(text: str, max_chars: int = MAX_MESSAGE_CHARS) -> str:
+    if max_chars and len(text) > max_chars:
+        return f"{text[:max_chars]}... [truncated {len(text) - max_chars} chars]"
+    return text
 
 
 def custom_path_filter(path):
     # Define the project root name
     project_root = "mcp_agent"
-    
+
     # Find the index of the project root in the path
     idx = path.find(project_root)
     if idx != -1:
@@ -19,13 +52,72 @@ class CustomLogRecord(logging.LogRecord):
         self.pathname = custom_path_filter(self.pathname)
 
 
-def setup_logger(log_filename="app.log", log_dir="logs"):
-    # Ensure the logging directory exists
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
+def safe_message(record: logging.LogRecord) -> str:
+    # Cut before redacting so the patterns never scan a multi-megabyte body
+    return redact(truncate(record.getMessage()))
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        record.message = safe_message(record)
+        line = f"{self.formatTime(record)} [{record.levelname}] [{record.module}] [{record.pathname}]: {record.message}"
+        if record.exc_info:
+            line = f"{line}\n{redact(self.formatException(record.exc_info))}"
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, module, location and the (redacted) message."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "module": record.module,
+            "path": record.pathname,
+            "line": record.lineno,
+            "thread": record.threadName,
+            "message": safe_message(record),
+        }
+        if getattr(record, "payload", False):
+            entry["payload"] = True
+        if record.exc_info:
+            entry["exception"] = redact(self.formatException(record.exc_info))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class PayloadSampler(logging.Filter):
+    """Keeps `rate` of the payload records; runs in the caller, before anything is queued."""
 
+    def __init__(self, rate: float = 1.0) -> None:
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1 or not getattr(record, "payload", False):
+            return True
+        return random.random() < self.rate
+
+
+class DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting (message interpolation, redaction, JSON) to the listener thread.
+
+    The stock handler formats every record before queueing it, which keeps payload formatting on the
+    caller's path. Records stay in-process, so they do not need to be made picklable either.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener = None
+
+
+def setup_logger(log_filename="app.log", log_dir="logs"):
+    global _listener
     is_production = os.getenv('ENV') == 'production'
-    
+
     if is_production:
         # Set to CRITICAL level to disable most logging
         log_level = logging.CRITICAL
@@ -34,21 +126,33 @@ def setup_logger(log_filename="app.log", log_dir="logs"):
         # Ensure the logging directory exists
         if not os.path.exists(log_dir):
             os.makedirs(log_dir)
-        
+
         log_filepath = os.path.join(log_dir, log_filename)
         log_level = logging.INFO
-        handlers = [
-            logging.StreamHandler(),
-            logging.FileHandler(log_filepath)
-        ]
+
+        # Console stays human readable, the file gets JSON lines; both are written by the listener thread
+        console = logging.StreamHandler()
+        console.setFormatter(TextFormatter())
+        file_handler = logging.FileHandler(log_filepath)
+        file_handler.setFormatter(JsonFormatter())
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(PayloadSampler(PAYLOAD_SAMPLE_RATE))
+        handlers = [queue_handler]
+
+        if _listener is None:
+            _listener = QueueListener(log_queue, console, file_handler, respect_handler_level=True)
+            _listener.start()
+            # Drain what is still queued when the interpreter exits
+            atexit.register(_listener.stop)
 
     logging.setLogRecordFactory(CustomLogRecord)
     logging.basicConfig(
         level=log_level,
-        format="%(asctime)s [%(levelname)s] [%(module)s] [%(pathname)s]: %(message)s",
         handlers=handlers
     )
 
     return logging.getLogger()
 
-logger = setup_logger()
\ No newline at end of file
+logger = setup_logger()
@@ -1,11 +1,12 @@
 from src.config.logging import logger
 from typing import Dict
 from typing import Any
-import yaml
 import os
+import threading
 
 
 class Config:
+    """Settings from config.yml. The file is read on first attribute access, not at import time."""
     _instance = None
 
     def __new__(cls, *args, **kwargs):
@@ -19,8 +20,26 @@ class Config:
         if self.__initialized:
             return
         self.__initialized = True
-        
-        self.__config = self._load_config(config_path)
+        self.__config_path = config_path
+        self.__loaded = False
+        self.__lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        # Only reached for attributes that are not set yet, i.e. settings before the file was loaded
+        if name.startswith('_') or self.__loaded:
+            raise AttributeError(f"'Config' object has no attribute '{name}'")
+        self._load()
+        return getattr(self, name)
+
+    def _load(self) -> None:
+        with self.__lock:
+            if self.__loaded:
+                return
+            self._apply(self._load_config(self.__config_path))
+            self.__loaded = True
+
+    def _apply(self, settings: Dict[str, Any]) -> None:
+        self.__config = settings
         self.PROJECT_ID = self.__config['project_id']
         self.REGION = self.__config['region']
         self.CREDENTIALS_PATH = self.__config['credentials_json']
@@ -31,9 +50,30 @@ class Config:
         self.PROMPT_TEMPLATE_PATH = self.__config['prompt_template_path']
         self.OUTPUT_TRACE_PATH  = self.__config['output_trace_path']
         self.SUMMARIZE_TEMPLATE_PATH = self.__config['summarize_template_path']
+        self.MAX_ITERATIONS = self.__config.get('max_iterations', 5)
+        self.MAX_PARALLEL_TOOLS = self.__config.get('max_parallel_tools', 4)
+        self.EXECUTOR_THREADS = self.__config.get('executor_threads', 0)
+        self.STREAM_RESPONSES = self.__config.get('stream_responses', False)
+        self.PROMPT_CACHING = self.__config.get('prompt_caching', False)
+        self.TOOL_CACHE = self.__config.get('tool_cache', {})
+        self.HTTP = self.__config.get('http', {})
+        self.HTML_EXTRACTOR = self.__config.get('html_extractor', 'html.parser')
+        self.TOKEN_BUDGET = self.__config.get('token_budget', {})
+        self.MEMORY = self.__config.get('memory', {})
+        self.RETRIEVAL = self.__config.get('retrieval', {})
+        self.SERVER = self.__config.get('server', {})
+        self.BATCH = self.__config.get('batch', {})
+        self.CASSETTE = self.__config.get('cassette', {})
+        self.TRACING = self.__config.get('tracing', {})
+        self.TRACE_OUTPUT = self.__config.get('trace_output', {})
+        self.BEDROCK = self.__config.get('bedrock', {})
+        self.ROUTING = self.__config.get('routing', {})
+        self.PREFETCH = self.__config.get('prefetch', {})
 
     @staticmethod
     def _load_config(config_path: str) -> Dict[str, Any]:
+        import yaml
+
         try:
             with open(config_path, 'r') as file:
                 return yaml.safe_load(file)
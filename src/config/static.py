@@ -13,6 +13,13 @@ wiki_search_properties = {
     }
 }
 
+read_more_properties = {
+    "query": {
+        "type": "string",
+        "description": "What to look for in the pages already read, for example \"release date\" or \"causes of the war\""
+    }
+}
+
 webpage_search_properties = {
     "query": {
           "type": "array",
@@ -1,31 +1,66 @@
-import boto3
+import asyncio
 import json
-from botocore.exceptions import ClientError
-from src.config.logging import logger
+from src.config.logging import logger, PAYLOAD
 from src.config.setup import config
-from src.types.models import Message, AnthropicAPIBody
+from src.types.models import Message
 from src.types.models import APIToolSchema, InputSchema
-from typing import List
+from src.llm.stream import StreamAccumulator
+from src.llm.request import RequestBuilder
+from src.llm.throttle import RateLimiter, Reservation, get_rate_limiter, stream_error
+from src.utils.cassette import get_cassette
+from src.utils.tracing import current_span
+from typing import List, Dict, Iterator, Optional, Callable
+import threading
+import time
 
 
 class Model:
-    def __init__(self, model_id="amazon.titan-text-express-v1"):
+    def __init__(self, model_id="amazon.titan-text-express-v1", model_config: Optional[Dict] = None):
         self.model_id = model_id
         self.region_name = config.REGION
-        self.client = self._init_client()
-        print(config.REGION)
+        # boto3 is imported and the Bedrock client built by the first request, see `client`
+        self._client = None
+        self._client_lock = threading.Lock()
+        # Per-model overrides (e.g. a smaller max_tokens for a fast tier) on top of model_config
+        model_config = {**config.MODEL_CONFIG, **(model_config or {})}
         try:
-            print(config.MODEL_CONFIG)
-            self.validate_config(config.MODEL_CONFIG)
-            self.__dict__.update(config.MODEL_CONFIG)
-        except (ClientError, Exception) as e:
+            self.validate_config(model_config)
+            self.__dict__.update(model_config)
+        except Exception as e:
             logger.exception(e)
             raise
-        self.config = config.MODEL_CONFIG
+        self.config = model_config
+        self.prompt_caching = config.PROMPT_CACHING
+        self.limiter: RateLimiter = get_rate_limiter()
+        self.chars_per_token = config.TOKEN_BUDGET.get('chars_per_token', 3.5)
+        self.expected_output_tokens = config.BEDROCK.get('expected_output_tokens', 2000)
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._init_client()
+        return self._client
 
     def _init_client(self):
         try:
-            return boto3.client("bedrock-runtime", region_name=self.region_name)
+            import boto3
+            from botocore.config import Config as BotoConfig
+
+            bedrock = config.BEDROCK
+            # Throttling is retried by the agent with backoff and a shared limiter; the SDK only retries
+            # transient connection errors, otherwise the two layers multiply each other's attempts
+            client_config = BotoConfig(
+                max_pool_connections=bedrock.get('max_pool_connections', 50),
+                connect_timeout=bedrock.get('connect_timeout', 5),
+                read_timeout=bedrock.get('read_timeout', 300),
+                retries={"mode": "standard", "total_max_attempts": bedrock.get('sdk_max_attempts', 2)}
+            )
+            client = boto3.client("bedrock-runtime", region_name=self.region_name, config=client_config)
+            # Record/replay of model traffic when a cassette is configured
+            cassette = get_cassette()
+            return cassette.wrap_bedrock(client) if cassette is not None else client
         except Exception as e:
             logger.error(f"Can't initialize Bedrock client. Reason: {e}")
             raise
@@ -46,25 +81,45 @@ class Model:
         logger.info("Configuration validation passed")
         return True
 
-    def generate(self, messages: List[Message], tool_list: List[APIToolSchema], system_prompt: str = "Proceed to answer as usual"):
-        
-        # Format the request payload using the model's native structure
-
-        api_request = AnthropicAPIBody(
-            anthropic_version="bedrock-2023-05-31",
-            max_tokens=self.config['max_tokens'],
-            top_k=self.config['top_k'],
-            top_p=self.config['top_p'],
-            messages=messages,
-            tools=tool_list,
-            tool_choice={"type": "auto"},
-            system=system_prompt
+    def request_builder(self) -> RequestBuilder:
+        """New incremental serializer; keep one per conversation and pass it to generate() on every call."""
+        return RequestBuilder(self.config, prompt_caching=self.prompt_caching)
+
+    def _build_request(self, messages: List[Message], tool_list: List[APIToolSchema], system_prompt: str, request_builder: Optional[RequestBuilder] = None) -> str:
+        # Without a conversation-scoped builder the whole body is encoded from scratch
+        request_builder = request_builder or self.request_builder()
+        return request_builder.build(messages, tool_list, system_prompt)
+
+    def _log_usage(self, model_response: Dict) -> None:
+        usage = model_response.get("usage") or {}
+        logger.info(
+            f"Usage for '{self.model_id}': input={usage.get('input_tokens', 0)} output={usage.get('output_tokens', 0)} "
+            f"cache_read={usage.get('cache_read_input_tokens', 0)} cache_write={usage.get('cache_creation_input_tokens', 0)}"
         )
-        
-        
-        # Convert the native request to JSON
-        request = api_request.model_dump_json(exclude_none=True)
-        
+
+    def _reserve_tokens(self, request: str) -> int:
+        # Rough size of the call for the tokens-per-minute bucket; settled against the reported usage
+        return int(len(request) / self.chars_per_token) + min(self.expected_output_tokens, self.config.get('max_tokens', self.expected_output_tokens))
+
+    def _queued(self, reservation: Reservation) -> None:
+        span = current_span()
+        if span is not None:
+            span.set(queued_seconds=round(reservation.waited, 4))
+
+    def _settle(self, reservation: Reservation, model_response: Optional[Dict]) -> None:
+        usage = (model_response or {}).get("usage") or {}
+        used = sum(usage.get(name) or 0 for name in ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens"))
+        # A call that failed before any usage was reported still counts against the request bucket only
+        self.limiter.settle(reservation, used)
+
+    def generate(self, messages: List[Message], tool_list: List[APIToolSchema], system_prompt: str = "Proceed to answer as usual", request_builder: Optional[RequestBuilder] = None):
+        request = self._build_request(messages, tool_list, system_prompt, request_builder)
+        reservation = self.limiter.acquire(self._reserve_tokens(request))
+        self._queued(reservation)
+        return self._generate(request, reservation)
+
+    def _generate(self, request: str, reservation: Reservation):
+        model_response = None
         try:
             # Invoke the model with the request
             response = self.client.invoke_model(modelId=self.model_id, body=request)
@@ -74,12 +129,94 @@ class Model:
             
             # Extract and return the response text
             response_content = model_response["content"]
-            logger.info(f"Successfully generated response for messages printing response text:\n {model_response}")
+            # %-style args: the body is only rendered (and truncated) by the logging thread
+            logger.info("Successfully generated response for messages printing response text:\n %s", model_response, extra=PAYLOAD)
+            self._log_usage(model_response)
             return model_response
             
-        except (ClientError, Exception) as e:
+        except Exception as e:
             logger.exception(f"Can't invoke '{self.model_id}'. Reason: {e}")
             raise
+        finally:
+            self._settle(reservation, model_response)
+
+    def stream(self, messages: List[Message], tool_list: List[APIToolSchema], system_prompt: str = "Proceed to answer as usual", request_builder: Optional[RequestBuilder] = None) -> Iterator[Dict]:
+        """Yield {"type": "text"} deltas as they arrive, then one {"type": "response"} event with the assembled body."""
+        request = self._build_request(messages, tool_list, system_prompt, request_builder)
+        reservation = self.limiter.acquire(self._reserve_tokens(request))
+        self._queued(reservation)
+        yield from self._stream(request, reservation)
+
+    def _stream(self, request: str, reservation: Reservation) -> Iterator[Dict]:
+        accumulator = StreamAccumulator()
+        time_to_first_token = None
+        start = time.perf_counter()
+
+        try:
+            response = self.client.invoke_model_with_response_stream(modelId=self.model_id, body=request)
+            for event in response["body"]:
+                if "chunk" not in event:
+                    # Mid-stream failures (throttling, model errors) arrive as typed exception events
+                    raise stream_error(event)
+
+                chunk = json.loads(event["chunk"]["bytes"])
+                text = accumulator.add(chunk)
+                if time_to_first_token is None and chunk.get("type") == "content_block_delta":
+                    time_to_first_token = time.perf_counter() - start
+                    logger.info(f"Time to first token for '{self.model_id}': {time_to_first_token:.3f}s")
+                if text:
+                    yield {"type": "text", "text": text}
+        finally:
+            # Usage seen so far, complete once message_delta has arrived
+            self._settle(reservation, accumulator.message)
+
+        model_response = accumulator.result()
+        model_response["metrics"] = {
+            "time_to_first_token": time_to_first_token,
+            "latency": time.perf_counter() - start
+        }
+        logger.info("Successfully streamed response for messages printing response text:\n %s", model_response, extra=PAYLOAD)
+        self._log_usage(model_response)
+        yield {"type": "response", "response": model_response}
+
+    def generate_stream(self, messages: List[Message], tool_list: List[APIToolSchema], system_prompt: str = "Proceed to answer as usual", on_text: Optional[Callable[[str], None]] = None, request_builder: Optional[RequestBuilder] = None) -> Dict:
+        """Streaming counterpart of generate(): same return value, text deltas are handed to on_text as they arrive."""
+        request = self._build_request(messages, tool_list, system_prompt, request_builder)
+        reservation = self.limiter.acquire(self._reserve_tokens(request))
+        self._queued(reservation)
+        return self._generate_stream(request, reservation, on_text)
+
+    def _generate_stream(self, request: str, reservation: Reservation, on_text: Optional[Callable[[str], None]] = None) -> Dict:
+        try:
+            model_response = {}
+            for event in self._stream(request, reservation):
+                if event["type"] == "text" and on_text:
+                    on_text(event["text"])
+                elif event["type"] == "response":
+                    model_response = event["response"]
+            return model_response
+
+        except Exception as e:
+            logger.exception(f"Can't stream '{self.model_id}'. Reason: {e}")
+            raise
+
+    async def _areserve(self, messages: List[Message], tool_list: List[APIToolSchema], system_prompt: str, request_builder: Optional[RequestBuilder]):
+        request = await asyncio.to_thread(self._build_request, messages, tool_list, system_prompt, request_builder)
+        # Waiting for quota happens on the loop, not in an executor thread
+        reservation = await self.limiter.aacquire(self._reserve_tokens(request))
+        self._queued(reservation)
+        return request, reservation
+
+    async def agenerate(self, messages: List[Message], tool_list: List[APIToolSchema], system_prompt: str = "Proceed to answer as usual", request_builder: Optional[RequestBuilder] = None):
+        request, reservation = await self._areserve(messages, tool_list, system_prompt, request_builder)
+        # boto3 has no native asyncio support; the blocking round trip runs in the loop's executor
+        # so the event loop stays free to drive other conversations meanwhile
+        return await asyncio.to_thread(self._generate, request, reservation)
+
+    async def agenerate_stream(self, messages: List[Message], tool_list: List[APIToolSchema], system_prompt: str = "Proceed to answer as usual", on_text: Optional[Callable[[str], None]] = None, request_builder: Optional[RequestBuilder] = None):
+        request, reservation = await self._areserve(messages, tool_list, system_prompt, request_builder)
+        # on_text is called from the worker thread consuming the stream
+        return await asyncio.to_thread(self._generate_stream, request, reservation, on_text)
 
 # Example usage:
 if __name__ == "__main__":
@@ -92,6 +229,6 @@ if __name__ == "__main__":
     
     try:
         response = model.generate(prompt)
-        logger.info(f"Generated response: {response}")
+        logger.info("Generated response: %s", response, extra=PAYLOAD)
     except Exception as e:
         logger.error(f"Generation failed: {e}")
\ No newline at end of file
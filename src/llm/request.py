@@ -0,0 +1,99 @@
+from src.types.models import Message, AnthropicAPIBody, APIToolSchema, ContentBlock
+from typing import List, Dict, Any, Optional, Tuple
+import json
+
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def _dumps(value: Any) -> str:
+    # Same compact, UTF-8 preserving layout as pydantic's model_dump_json
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def with_cache_breakpoint(message: Message) -> Message:
+    """Copy of `message` whose last content block carries an ephemeral cache_control breakpoint."""
+    if isinstance(message.content, str):
+        content = [ContentBlock(text=message.content, cache_control=CACHE_CONTROL)]
+    else:
+        content = message.content[:-1] + [message.content[-1].model_copy(update={"cache_control": CACHE_CONTROL})]
+    return message.model_copy(update={"content": content})
+
+
+class RequestBuilder:
+    """Incrementally serializes the invoke_model body of one conversation.
+
+    The JSON of the tool schemas, the system prompt and every message already sent is kept between
+    calls, so each iteration (and each retry) only encodes the messages appended or replaced since
+    the previous call instead of re-dumping the whole history.
+    """
+
+    def __init__(self, model_config: Dict[str, Any], prompt_caching: bool = False, anthropic_version: str = "bedrock-2023-05-31"):
+        # Validate the sampling parameters once instead of on every request
+        header = AnthropicAPIBody(
+            anthropic_version=anthropic_version,
+            max_tokens=model_config['max_tokens'],
+            top_k=model_config['top_k'],
+            top_p=model_config['top_p'],
+            messages=[],
+            tool_choice={"type": "auto"}
+        )
+        self.prompt_caching = prompt_caching
+        self._prefix = f'{{"anthropic_version":{_dumps(header.anthropic_version)},"max_tokens":{header.max_tokens},"messages":['
+        self._params = f',"top_p":{_dumps(header.top_p)},"top_k":{header.top_k}'
+        self._suffix = f',"tool_choice":{_dumps(header.tool_choice)}}}'
+
+        # (message, content object it was encoded from, json) in history order
+        self._messages: List[Tuple[Message, Any, str]] = []
+        self._system: Tuple[Optional[str], str] = (None, "")
+        self._tools: Tuple[List[APIToolSchema], str] = ([], "[]")
+        self.encoded_messages = 0
+
+    def _encode_messages(self, messages: List[Message]) -> List[str]:
+        # Reuse the longest prefix of messages that are still the same objects with the same content;
+        # merging into the last message replaces its content list, which invalidates only that entry
+        reused = 0
+        for cached, message in zip(self._messages, messages):
+            if cached[0] is not message or cached[1] is not message.content:
+                break
+            reused += 1
+
+        del self._messages[reused:]
+        for message in messages[reused:]:
+            self._messages.append((message, message.content, message.model_dump_json(exclude_none=True)))
+            self.encoded_messages += 1
+        return [encoded for _, _, encoded in self._messages]
+
+    def _encode_system(self, system_prompt: Optional[str]) -> str:
+        if system_prompt is None:
+            return ""
+        if self._system[0] is not system_prompt and self._system[0] != system_prompt:
+            if self.prompt_caching and system_prompt:
+                system = _dumps([ContentBlock(text=system_prompt, cache_control=CACHE_CONTROL).model_dump(exclude_none=True)])
+            else:
+                system = _dumps(system_prompt)
+            self._system = (system_prompt, f',"system":{system}')
+        return self._system[1]
+
+    def _encode_tools(self, tool_list: List[APIToolSchema]) -> str:
+        cached_tools = self._tools[0]
+        if len(cached_tools) != len(tool_list) or any(cached is not tool for cached, tool in zip(cached_tools, tool_list)):
+            encoded = [tool.model_dump_json(exclude_none=True) for tool in tool_list]
+            if self.prompt_caching and tool_list:
+                # A breakpoint on the last tool covers every tool definition before it
+                encoded[-1] = tool_list[-1].model_copy(update={"cache_control": CACHE_CONTROL}).model_dump_json(exclude_none=True)
+            self._tools = (list(tool_list), f'[{",".join(encoded)}]')
+        return self._tools[1]
+
+    def build(self, messages: List[Message], tool_list: List[APIToolSchema], system_prompt: Optional[str] = None) -> str:
+        encoded_messages = self._encode_messages(messages)
+        if self.prompt_caching and messages:
+            # The history is append-only, so everything sent now is the stable prefix of the next iteration.
+            # The breakpoint copy is encoded on the fly so the cached entry stays breakpoint-free
+            encoded_messages = encoded_messages[:-1] + [with_cache_breakpoint(messages[-1]).model_dump_json(exclude_none=True)]
+
+        body = self._prefix + ",".join(encoded_messages) + "]" + self._encode_system(system_prompt) + self._params
+        if not tool_list:
+            # tool_choice is only valid alongside tools (e.g. summarization calls send none)
+            return body + "}"
+        return body + ',"tools":' + self._encode_tools(tool_list) + self._suffix
@@ -0,0 +1,121 @@
+from src.config.logging import logger
+from src.config.setup import config
+from src.llm.model import Model
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import threading
+
+
+# Turn roles the agent asks the router about
+TOOL_SELECTION = "tool_selection"
+SYNTHESIS = "synthesis"
+SUMMARIZE = "summarize"
+ROLES = (TOOL_SELECTION, SYNTHESIS, SUMMARIZE)
+
+_models: Dict[Tuple[str, str], Model] = {}
+_models_lock = threading.Lock()
+
+
+def get_model(model_id: str, model_config: Optional[Dict] = None) -> Model:
+    """One Model (and Bedrock client) per model id and model config for the whole process."""
+    # Two tiers may share a model id with different overrides (e.g. max_tokens), each keeps its own
+    key = (model_id, json.dumps(model_config or {}, sort_keys=True))
+    with _models_lock:
+        if key not in _models:
+            _models[key] = Model(model_id, model_config)
+        return _models[key]
+
+
+class ModelRouter:
+    """Maps turn roles to model tiers and decides when a cheap tier's answer has to be redone.
+
+    Turns that only pick the next tool call go to a fast tier; synthesis goes to the tier named by
+    `escalate_to`. A fast-tier response is escalated, i.e. the same turn is re-asked to a larger tier,
+    when it is invalid, cut off, or calls a tool that does not exist or omits required arguments. Final
+    answers are always written by the synthesis tier: a fast-tier turn that ends the conversation is
+    redone there.
+    """
+
+    def __init__(self, tiers: Dict[str, Any], roles: Optional[Dict[str, str]] = None, escalate_to: Optional[str] = None) -> None:
+        if not tiers:
+            raise ValueError("A router needs at least one model tier")
+        self.tiers = tiers
+        self.escalate_to = escalate_to or next(iter(tiers))
+        self.roles = {role: (roles or {}).get(role, self.escalate_to) for role in ROLES}
+        unknown = set(self.roles.values()) - set(tiers)
+        if unknown or self.escalate_to not in tiers:
+            raise ValueError(f"Unknown model tiers {sorted(unknown | {self.escalate_to} - set(tiers))}. Available tiers are: {list(tiers)}")
+
+    @classmethod
+    def single(cls, model: Any) -> "ModelRouter":
+        return cls({"default": model})
+
+    @classmethod
+    def from_config(cls, routing_config: Dict[str, Any]) -> "ModelRouter":
+        if not routing_config.get('enabled'):
+            return cls.single(get_model(config.MODEL_NAME))
+        tiers = {}
+        for tier, settings in routing_config.get('tiers', {}).items():
+            if isinstance(settings, str):
+                settings = {"model_id": settings}
+            tiers[tier] = get_model(settings.get('model_id') or config.MODEL_NAME, settings.get('model_config'))
+        return cls(tiers, routing_config.get('roles'), routing_config.get('escalate_to'))
+
+    @property
+    def enabled(self) -> bool:
+        return len(set(self.roles.values())) > 1
+
+    def tier_for(self, role: str) -> str:
+        return self.roles.get(role, self.escalate_to)
+
+    def model_for(self, role: str) -> Any:
+        return self.tiers[self.tier_for(role)]
+
+    def escalation_tier(self, tier: str, response: Any) -> str:
+        """Tier that redoes an escalated response from `tier`: answers go to the synthesis tier, the rest to `escalate_to`."""
+        synthesis = self.tier_for(SYNTHESIS)
+        if tier != synthesis and isinstance(response, dict) and response.get('stop_reason') == "end_turn":
+            return synthesis
+        return self.escalate_to
+
+    def escalation_reason(self, tier: str, response: Any, tools: Dict[str, Any]) -> Optional[str]:
+        """Why a response from `tier` should be redone by the escalation tier; None keeps it."""
+        if tier == self.escalate_to:
+            return None
+        if not isinstance(response, dict) or 'content' not in response or 'stop_reason' not in response:
+            return "invalid response"
+        if response['stop_reason'] == "end_turn":
+            text = ''.join(block.get('text') or '' for block in response['content'] if block.get('type') == "text")
+            if not text.strip():
+                return "empty answer"
+            return None if tier == self.tier_for(SYNTHESIS) else "answer from a tool-selection tier"
+        if response['stop_reason'] != "tool_use":
+            return f"stop_reason {response['stop_reason']}"
+
+        calls = [block for block in response['content'] if block.get('type') == "tool_use"]
+        if not calls:
+            return "tool_use without a tool call"
+        for call in calls:
+            tool = tools.get(call.get('name'))
+            if tool is None:
+                return f"unknown tool {call.get('name')}"
+            required: List[str] = tool.api_object.input_schema.required or []
+            missing = [name for name in required if not (call.get('input') or {}).get(name)]
+            if missing:
+                return f"{call.get('name')} without {missing}"
+        return None
+
+
+_router: Optional[ModelRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_router() -> ModelRouter:
+    """Process-wide router, configured from the `routing` section of config.yml on first use."""
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = ModelRouter.from_config(config.ROUTING)
+                logger.info(f"Model routing: {_router.roles}")
+    return _router
@@ -0,0 +1,60 @@
+import json
+from typing import Dict, List, Optional
+
+
+class StreamAccumulator:
+    """Rebuilds the invoke_model response body from invoke_model_with_response_stream chunks."""
+
+    def __init__(self) -> None:
+        self.message: Dict = {"content": [], "stop_reason": None, "usage": {}}
+        self.blocks: Dict[int, Dict] = {}
+        self.partial_json: Dict[int, List[str]] = {}
+        self.invocation_metrics: Optional[Dict] = None
+
+    def add(self, chunk: Dict) -> Optional[str]:
+        """Consume one decoded chunk, returning the text delta it carries (if any)."""
+        chunk_type = chunk.get("type")
+
+        if chunk_type == "message_start":
+            message = chunk.get("message", {})
+            self.message.update({key: value for key, value in message.items() if key != "content"})
+            self.message["usage"] = dict(message.get("usage") or {})
+
+        elif chunk_type == "content_block_start":
+            index = chunk["index"]
+            self.blocks[index] = dict(chunk.get("content_block", {}))
+            if self.blocks[index].get("type") == "tool_use":
+                self.partial_json[index] = []
+
+        elif chunk_type == "content_block_delta":
+            index = chunk["index"]
+            delta = chunk.get("delta", {})
+            block = self.blocks.setdefault(index, {"type": "text", "text": ""})
+            if delta.get("type") == "text_delta":
+                block["text"] = block.get("text", "") + delta.get("text", "")
+                return delta.get("text")
+            if delta.get("type") == "input_json_delta":
+                # Tool arguments arrive as JSON fragments, only parseable once the block is closed
+                self.partial_json.setdefault(index, []).append(delta.get("partial_json", ""))
+
+        elif chunk_type == "content_block_stop":
+            index = chunk["index"]
+            if index in self.partial_json:
+                raw_input = "".join(self.partial_json.pop(index))
+                self.blocks[index]["input"] = json.loads(raw_input) if raw_input else {}
+
+        elif chunk_type == "message_delta":
+            self.message.update(chunk.get("delta", {}))
+            self.message["usage"].update(chunk.get("usage") or {})
+
+        elif chunk_type == "message_stop":
+            self.invocation_metrics = chunk.get("amazon-bedrock-invocationMetrics")
+
+        return None
+
+    def result(self) -> Dict:
+        response = dict(self.message)
+        response["content"] = [self.blocks[index] for index in sorted(self.blocks)]
+        if self.invocation_metrics:
+            response["amazon-bedrock-invocationMetrics"] = self.invocation_metrics
+        return response
@@ -0,0 +1,186 @@
+from src.config.logging import logger
+from src.config.setup import config
+from typing import Any, Dict, Optional
+import asyncio
+import random
+import threading
+import time
+
+
+# Bedrock error codes worth retrying after a pause; anything else (validation, access, unknown model) is fatal
+RETRYABLE_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceQuotaExceededException",
+    "ServiceUnavailableException",
+    "ModelNotReadyException",
+    "ModelTimeoutException",
+    "InternalServerException",
+}
+
+
+class ModelStreamError(Exception):
+    """Typed exception event received in the middle of a response stream."""
+
+    def __init__(self, code: str, message: str):
+        super().__init__(f"{code}: {message}")
+        self.code = code
+
+
+def stream_error(event: Dict[str, Any]) -> ModelStreamError:
+    # Stream events look like {"throttlingException": {"message": "..."}}
+    name, detail = next(iter(event.items()), ("unknown", {}))
+    message = detail.get('message', '') if isinstance(detail, dict) else str(detail)
+    return ModelStreamError(name[:1].upper() + name[1:], message)
+
+
+def error_code(e: BaseException) -> Optional[str]:
+    from botocore.exceptions import ClientError
+
+    if isinstance(e, ClientError):
+        return e.response.get('Error', {}).get('Code')
+    if isinstance(e, ModelStreamError):
+        return e.code
+    return None
+
+
+def is_retryable(e: BaseException) -> bool:
+    # botocore is only needed once a request failed, and by then the client has loaded it
+    from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, ReadTimeoutError
+
+    if isinstance(e, (BotoConnectionError, ReadTimeoutError)):
+        return True
+    if error_code(e) in RETRYABLE_CODES:
+        return True
+    if isinstance(e, ClientError):
+        return e.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0) >= 500
+    return False
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """Full jitter: uniform in [0, min(cap, base * 2**attempt)], so throttled callers spread out."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class Reservation:
+    __slots__ = ("tokens", "waited")
+
+    def __init__(self, tokens: int, waited: float) -> None:
+        self.tokens = tokens
+        self.waited = waited
+
+
+class RateLimiter:
+    """Client-side token buckets for requests and tokens per minute, shared by every agent in the process.
+
+    A caller takes its share up front, even if that leaves a bucket in debt, and then sleeps until the
+    debt would have been refilled; callers are therefore served roughly in arrival order and a large
+    request cannot be starved by small ones. The token share is an estimate (input plus expected output);
+    `settle` corrects it with the usage the model reports. A limit of 0 disables that bucket.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0) -> None:
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.stats = {"acquired": 0, "waited": 0, "waiting": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "tokens_reserved": 0, "tokens_refunded": 0}
+
+    @classmethod
+    def from_config(cls, bedrock_config: Dict[str, Any]) -> "RateLimiter":
+        return cls(
+            requests_per_minute=bedrock_config.get('requests_per_minute', 0),
+            tokens_per_minute=bedrock_config.get('tokens_per_minute', 0)
+        )
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def _take(self, tokens: int) -> float:
+        """Take one request and `tokens` from the buckets; returns how long the caller has to wait."""
+        with self._lock:
+            self._refill()
+            wait = 0.0
+            if self.requests_per_minute:
+                self._requests -= 1
+                wait = max(wait, -self._requests * 60 / self.requests_per_minute)
+            if self.tokens_per_minute:
+                # A single request can never need more than a full bucket
+                self._tokens -= min(tokens, self.tokens_per_minute)
+                wait = max(wait, -self._tokens * 60 / self.tokens_per_minute)
+            self.stats["acquired"] += 1
+            self.stats["tokens_reserved"] += tokens
+            if wait > 0:
+                self.stats["waited"] += 1
+                self.stats["waiting"] += 1
+                self.stats["wait_seconds"] += wait
+                self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], wait)
+            return wait
+
+    def _done_waiting(self, wait: float) -> None:
+        if wait > 0:
+            with self._lock:
+                self.stats["waiting"] -= 1
+
+    def acquire(self, tokens: int = 0) -> Reservation:
+        wait = self._take(tokens)
+        if wait > 0:
+            logger.info(f"Rate limit: waiting {wait:.2f}s for quota")
+            try:
+                time.sleep(wait)
+            finally:
+                self._done_waiting(wait)
+        return Reservation(tokens, wait)
+
+    async def aacquire(self, tokens: int = 0) -> Reservation:
+        wait = self._take(tokens)
+        if wait > 0:
+            logger.info(f"Rate limit: waiting {wait:.2f}s for quota")
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._done_waiting(wait)
+        return Reservation(tokens, wait)
+
+    def settle(self, reservation: Reservation, used_tokens: int) -> None:
+        """Give back (or take more of) the difference between the estimate and the reported usage."""
+        if not self.tokens_per_minute:
+            return
+        difference = reservation.tokens - used_tokens
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.tokens_per_minute, self._tokens + difference)
+            self.stats["tokens_refunded"] += difference
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refill()
+            return {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "requests_available": round(self._requests, 2),
+                "tokens_available": round(self._tokens),
+                **self.stats,
+            }
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter, configured from the `bedrock` section of config.yml on first use."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter.from_config(config.BEDROCK)
+    return _limiter
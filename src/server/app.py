@@ -0,0 +1,210 @@
+from src.config.logging import logger
+from src.config.setup import config
+from src.llm.router import get_router
+from src.llm.throttle import get_rate_limiter
+from src.server.session import SessionManager, AdmissionError, SessionBusyError, SessionClosedError
+from src.server.store import SessionStore
+from src.tools.toolkit import Toolkit
+from src.utils.http import get_http_client
+from src.utils.tracing import get_tracer
+from src.utils.io import get_trace_writer
+from concurrent.futures import CancelledError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+import json
+import queue
+
+
+class AgentRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front-end of the session manager.
+
+    POST   /sessions                 open a session
+    POST   /sessions/<id>/query      {"query": "...", "stream": true} answered as server-sent events or JSON
+    DELETE /sessions/<id>            close a session
+    GET    /health, /metrics
+    """
+
+    protocol_version = "HTTP/1.1"
+    heartbeat_seconds = 15
+
+    @property
+    def manager(self) -> SessionManager:
+        return self.server.manager
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.info(f"{self.address_string()} {format % args}")
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        payload = json.loads(self.rfile.read(length))
+        if not isinstance(payload, dict):
+            raise ValueError("Request body must be a JSON object")
+        return payload
+
+    def _route(self) -> List[str]:
+        return [part for part in self.path.split('?', 1)[0].split('/') if part]
+
+    def do_GET(self) -> None:
+        parts = self._route()
+        if parts == ["health"]:
+            self._send_json(200, {"status": "ok"})
+        elif parts == ["metrics"]:
+            metrics = self.manager.metrics()
+            metrics["http"] = get_http_client().stats()
+            metrics["tracing"] = get_tracer().metrics.snapshot()
+            metrics["trace_writer"] = dict(get_trace_writer().stats)
+            metrics["rate_limit"] = get_rate_limiter().snapshot()
+            cache = getattr(self.manager.toolkit, 'result_cache', None)
+            if cache is not None:
+                metrics["tool_cache"] = dict(cache.stats)
+            prefetcher = getattr(self.manager.toolkit, 'prefetcher', None)
+            if prefetcher is not None:
+                metrics["prefetch"] = prefetcher.snapshot()
+            self._send_json(200, metrics)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_DELETE(self) -> None:
+        parts = self._route()
+        if len(parts) == 2 and parts[0] == "sessions" and self.manager.close(parts[1]):
+            self._send_json(200, {"session_id": parts[1], "closed": True})
+        else:
+            self._send_json(404, {"error": "unknown session"})
+
+    def do_POST(self) -> None:
+        parts = self._route()
+        try:
+            payload = self._read_json()
+        except ValueError as e:
+            self._send_json(400, {"error": f"invalid JSON body: {e}"})
+            return
+
+        if parts == ["sessions"]:
+            try:
+                session = self.manager.create()
+            except AdmissionError as e:
+                self._send_json(503, {"error": str(e)}, {"Retry-After": str(e.retry_after)})
+                return
+            self._send_json(201, {"session_id": session.id})
+            return
+
+        if len(parts) != 3 or parts[0] != "sessions" or parts[2] != "query":
+            self._send_json(404, {"error": "not found"})
+            return
+        session = self.manager.get(parts[1])
+        if session is None:
+            self._send_json(404, {"error": "unknown session"})
+            return
+        query = payload.get('query')
+        if not isinstance(query, str) or not query.strip():
+            self._send_json(400, {"error": "'query' must be a non-empty string"})
+            return
+
+        events: "queue.Queue" = queue.Queue()
+        stream = payload.get('stream', True)
+        try:
+            future = self.manager.submit(session, query.strip(), sink=(lambda event, data: events.put((event, data))) if stream else None)
+        except AdmissionError as e:
+            self._send_json(503, {"error": str(e)}, {"Retry-After": str(e.retry_after)})
+            return
+        except SessionBusyError as e:
+            self._send_json(409, {"error": str(e)})
+            return
+        except SessionClosedError as e:
+            self._send_json(404, {"error": str(e)})
+            return
+
+        if stream:
+            future.add_done_callback(lambda _: events.put(None))
+            self._stream(future, events)
+            return
+        try:
+            self._send_json(200, future.result())
+        except Exception as e:
+            logger.exception(f"Query failed in session {session.id}: {e}")
+            self._send_json(500, {"error": str(e)})
+
+    def _write_event(self, event: str, data: Dict[str, Any]) -> None:
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+    def _stream(self, future, events: "queue.Queue") -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        # No length is known up front, so the end of the stream is the end of the connection
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        try:
+            while True:
+                try:
+                    item = events.get(timeout=self.heartbeat_seconds)
+                except queue.Empty:
+                    self.wfile.write(b": keep-alive\n\n")
+                    self.wfile.flush()
+                    continue
+                if item is None:
+                    break
+                self._write_event(*item)
+            try:
+                self._write_event("done", future.result())
+            except CancelledError:
+                return
+            except Exception as e:
+                logger.exception(f"Query failed: {e}")
+                self._write_event("error", {"error": str(e)})
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away; stop working on its answer
+            logger.info("Client disconnected, cancelling its query")
+            future.cancel()
+
+
+class AgentHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, manager: SessionManager):
+        super().__init__(address, AgentRequestHandler)
+        self.manager = manager
+
+
+def serve(host: Optional[str] = None, port: Optional[int] = None) -> None:
+    server_config = config.SERVER
+    store_path = server_config.get('store_path')
+    manager = SessionManager(
+        None,
+        Toolkit(),
+        max_sessions=server_config.get('max_sessions', 100),
+        max_hot_sessions=server_config.get('max_hot_sessions'),
+        store=SessionStore(store_path) if store_path else None,
+        max_active_queries=server_config.get('max_active_queries', 16),
+        session_ttl=server_config.get('session_ttl', 1800),
+        trace_dir=config.TRACE_OUTPUT.get('session_dir'),
+        router=get_router()
+    )
+    address = (host or server_config.get('host', '127.0.0.1'), port or server_config.get('port', 8080))
+    server = AgentHTTPServer(address, manager)
+    logger.info(f"Serving agent sessions on http://{address[0]}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        manager.shutdown()
+        manager.toolkit.close()
+        get_http_client().close()
+        get_tracer().close()
+        get_trace_writer().close()
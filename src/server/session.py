@@ -0,0 +1,276 @@
+from src.config.logging import logger
+from src.agent.agent import AsyncAgent, install_executor
+from src.llm.model import Model
+from src.llm.router import ModelRouter
+from src.server.store import SessionStore
+from src.types.models import Message, Usage
+from src.utils.tracing import get_tracer
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+import asyncio
+import os
+import threading
+import time
+import uuid
+
+
+Sink = Callable[[str, Dict[str, Any]], None]
+
+
+class AdmissionError(Exception):
+    """Raised when the server is at capacity; `retry_after` is a hint in seconds."""
+
+    def __init__(self, message: str, retry_after: int = 5):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class SessionBusyError(Exception):
+    pass
+
+
+class SessionClosedError(LookupError):
+    pass
+
+
+def message_text(message: Message) -> str:
+    if isinstance(message.content, str):
+        return message.content
+    return ''.join(block.text for block in message.content if block.text)
+
+
+class SessionAgent(AsyncAgent):
+    """AsyncAgent whose console output goes to the event sink of the request it is serving."""
+
+    def __init__(self, model: Optional[Model], router: Optional[ModelRouter] = None) -> None:
+        super().__init__(model=model, router=router)
+        self.stream = True
+        self.sink: Optional[Sink] = None
+
+    def _emit(self, event: str, data: Dict[str, Any]) -> None:
+        if self.sink is not None:
+            self.sink(event, data)
+
+    def print_message(self, message: Message) -> None:
+        self._emit("message", {"role": message.role, "text": message_text(message)})
+
+    def print_delta(self, text: str) -> None:
+        self._stream_started = True
+        self._emit("delta", {"text": text})
+
+    def end_delta(self) -> None:
+        return
+
+
+class Session:
+    def __init__(self, session_id: str, agent: SessionAgent) -> None:
+        self.id = session_id
+        self.agent = agent
+        self.created = time.time()
+        self.last_used = self.created
+        self.busy = False
+
+
+class SessionManager:
+    """Per-session agents over one shared model client and toolkit, driven by a single event loop.
+
+    The loop runs in a background thread so blocking front-ends (the stdlib HTTP server) can submit
+    queries from their own threads. Admission control caps both the number of open sessions and the
+    number of queries running at once; idle sessions are closed after `session_ttl` seconds.
+
+    With a `store`, only the `max_hot_sessions` most recently used agents stay in memory: the least
+    recently used idle one is checkpointed to the store and dropped, and rehydrated from its checkpoint
+    on the next `get`. A session lives either in memory or in the store, never in both.
+    """
+
+    def __init__(self, model: Optional[Model], toolkit: Any, max_sessions: int = 100, max_active_queries: int = 16, session_ttl: float = 1800, trace_dir: Optional[str] = None, router: Optional[ModelRouter] = None, store: Optional[SessionStore] = None, max_hot_sessions: Optional[int] = None):
+        self.model = model
+        self.router = router
+        self.toolkit = toolkit
+        self.store = store
+        self.max_sessions = max_sessions
+        # Without a store an evicted session would be lost, so every open session stays hot
+        self.max_hot_sessions = max_hot_sessions if store is not None and max_hot_sessions else max_sessions
+        self.max_active_queries = max_active_queries
+        self.session_ttl = session_ttl
+        self.trace_dir = trace_dir
+        self.sessions: "OrderedDict[str, Session]" = OrderedDict()
+        self.active_queries = 0
+        self.counters = {"sessions_created": 0, "sessions_expired": 0, "sessions_evicted": 0, "sessions_rehydrated": 0, "queries": 0, "queries_failed": 0, "queries_rejected": 0}
+        self.query_seconds = 0.0
+        self.usage = Usage()
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.tracer = get_tracer()
+
+        self.loop = asyncio.new_event_loop()
+        # Every running query holds executor threads for its model call and tools
+        self._executor = install_executor(self.loop, max_active_queries)
+        self._thread = threading.Thread(target=self.loop.run_forever, name="agent-loop", daemon=True)
+        self._thread.start()
+
+    def _expire(self) -> None:
+        # Caller holds the lock; sessions are kept in last-used order
+        now = time.time()
+        while self.sessions:
+            session = next(iter(self.sessions.values()))
+            if session.busy or now - session.last_used < self.session_ttl:
+                break
+            del self.sessions[session.id]
+            self.counters["sessions_expired"] += 1
+            logger.info(f"Session {session.id} expired")
+        if self.store is not None:
+            self.counters["sessions_expired"] += len(self.store.expire(now - self.session_ttl))
+
+    def _evict(self) -> None:
+        # Caller holds the lock; busy sessions are skipped, their agent is in use, and so are sessions whose
+        # background compaction has not landed yet, it would rewrite the history after the checkpoint
+        while len(self.sessions) > self.max_hot_sessions:
+            session = next((session for session in self.sessions.values() if not session.busy and not session.agent.compacting), None)
+            if session is None:
+                return
+            size = self.store.save(session.id, session.agent.checkpoint(), session.created, session.last_used)
+            del self.sessions[session.id]
+            self.counters["sessions_evicted"] += 1
+            self.tracer.metrics.observe("session.stored_bytes", size)
+
+    def _total_sessions(self) -> int:
+        return len(self.sessions) + (self.store.count() if self.store is not None else 0)
+
+    def _new_agent(self, session_id: str) -> SessionAgent:
+        agent = SessionAgent(self.model, router=self.router)
+        self.toolkit.register(agent)
+        if self.trace_dir:
+            agent.trace_path = os.path.join(self.trace_dir, f"{session_id}.txt")
+        return agent
+
+    def create(self) -> Session:
+        with self._lock:
+            self._expire()
+            if self._total_sessions() >= self.max_sessions:
+                raise AdmissionError(f"Session limit of {self.max_sessions} reached", retry_after=30)
+            session_id = uuid.uuid4().hex
+            session = Session(session_id, self._new_agent(session_id))
+            self.sessions[session.id] = session
+            self.counters["sessions_created"] += 1
+            self._evict()
+        logger.info(f"Session {session.id} created")
+        return session
+
+    def get(self, session_id: str) -> Optional[Session]:
+        with self._lock:
+            session = self.sessions.get(session_id)
+            if session is not None or self.store is None:
+                return session
+
+            start = time.perf_counter()
+            stored = self.store.load(session_id)
+            if stored is None:
+                return None
+            state, created, last_used = stored
+            session = Session(session_id, self._new_agent(session_id))
+            session.agent.restore(state)
+            session.created = created
+            session.last_used = time.time()
+            self.store.delete(session_id)
+            self.sessions[session_id] = session
+            self.counters["sessions_rehydrated"] += 1
+            self.tracer.metrics.observe("session.rehydrate.seconds", time.perf_counter() - start)
+            self._evict()
+        logger.info(f"Session {session_id} rehydrated, idle for {time.time() - last_used:.0f}s")
+        return session
+
+    def close(self, session_id: str) -> bool:
+        with self._lock:
+            closed = self.sessions.pop(session_id, None) is not None
+            if self.store is not None:
+                closed = self.store.delete(session_id) or closed
+            return closed
+
+    def submit(self, session: Session, query: str, sink: Optional[Sink] = None) -> Future:
+        """Schedule `query` on the loop; the future resolves to the answer payload."""
+        with self._lock:
+            if self.sessions.get(session.id) is not session:
+                # Evicted between get() and now: the stored checkpoint is this same idle state
+                if self.store is None or not self.store.delete(session.id):
+                    raise SessionClosedError(f"Session {session.id} was closed")
+                self.sessions[session.id] = session
+                self._evict()
+            if session.busy:
+                raise SessionBusyError(f"Session {session.id} is already answering a query")
+            if self.active_queries >= self.max_active_queries:
+                self.counters["queries_rejected"] += 1
+                raise AdmissionError(f"{self.active_queries} queries already running")
+            self.active_queries += 1
+            session.busy = True
+            session.agent.sink = sink
+        return asyncio.run_coroutine_threadsafe(self._run(session, query), self.loop)
+
+    async def _run(self, session: Session, query: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        failed = True
+        try:
+            answer = await session.agent.execute(query)
+            failed = False
+            return {
+                "answer": message_text(answer),
+                "iterations": session.agent.current_iteration,
+                "usage": session.agent.usage.model_dump(),
+                "seconds": round(time.perf_counter() - start, 3),
+            }
+        finally:
+            with self._lock:
+                self.active_queries -= 1
+                self.counters["queries"] += 1
+                self.counters["queries_failed"] += failed
+                self.query_seconds += time.perf_counter() - start
+                self.usage.add(session.agent.usage.model_dump())
+                session.busy = False
+                session.agent.sink = None
+                session.last_used = time.time()
+                if session.id in self.sessions:
+                    self.sessions.move_to_end(session.id)
+            if session.agent.compacting:
+                self.loop.create_task(self._evict_after_compaction(session))
+
+    async def _evict_after_compaction(self, session: Session) -> None:
+        # The session was not evictable while its compaction ran; make room now if it is still over the cap
+        await session.agent.wait_for_compaction()
+        with self._lock:
+            if self.store is not None:
+                self._evict()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire()
+            completed = self.counters["queries"]
+            # Serialized size of the in-memory agent states, a proxy for their memory footprint
+            state_bytes = [len(session.agent.state.model_dump_json()) for session in self.sessions.values()]
+            return {
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "sessions": self._total_sessions(),
+                "hot_sessions": len(self.sessions),
+                "max_sessions": self.max_sessions,
+                "max_hot_sessions": self.max_hot_sessions,
+                "mean_session_state_bytes": round(sum(state_bytes) / len(state_bytes)) if state_bytes else 0,
+                "max_session_state_bytes": max(state_bytes, default=0),
+                "active_queries": self.active_queries,
+                "max_active_queries": self.max_active_queries,
+                **self.counters,
+                "mean_query_seconds": round(self.query_seconds / completed, 3) if completed else 0.0,
+                "usage": self.usage.model_dump(),
+                **({"store": self.store.snapshot()} if self.store is not None else {}),
+            }
+
+    def shutdown(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False)
+        if self.store is not None:
+            # Open sessions survive a restart; they are rehydrated on their next query
+            with self._lock:
+                for session in self.sessions.values():
+                    self.store.save(session.id, session.agent.checkpoint(), session.created, session.last_used)
+                self.sessions.clear()
+            self.store.close()
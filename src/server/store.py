@@ -0,0 +1,117 @@
+from src.config.logging import logger
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # optional 'compact-sessions' extra
+    zstandard = None
+
+
+def _compress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=6).compress(data)
+    return zlib.compress(data, 6)
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Session was stored with zstd but the zstandard package is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class SessionStore:
+    """Agent state checkpoints of idle sessions, as compressed JSON rows in SQLite.
+
+    Rows are compressed with zstd when the `zstandard` package is installed and with zlib otherwise;
+    the codec is stored per row so a store written by one setup can be read by the other (zstd rows
+    need the package). Safe to share between threads.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.codec = "zstd" if zstandard is not None else "zlib"
+        self.stats = {"saves": 0, "loads": 0, "deletes": 0, "raw_bytes": 0, "stored_bytes": 0}
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, codec TEXT, state BLOB, raw_size INTEGER, created REAL, last_used REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions (last_used)")
+        self._db.commit()
+
+    def save(self, session_id: str, state: Dict[str, Any], created: float, last_used: float) -> int:
+        """Store `state` for `session_id`, replacing any older copy; returns the compressed size."""
+        raw = json.dumps(state, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+        blob = _compress(raw, self.codec)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (id, codec, state, raw_size, created, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (session_id, self.codec, blob, len(raw), created, last_used)
+            )
+            self._db.commit()
+            self.stats["saves"] += 1
+            self.stats["raw_bytes"] += len(raw)
+            self.stats["stored_bytes"] += len(blob)
+        return len(blob)
+
+    def load(self, session_id: str) -> Optional[Tuple[Dict[str, Any], float, float]]:
+        """The stored state with its created and last-used times, or None for an unknown id."""
+        with self._lock:
+            row = self._db.execute("SELECT codec, state, created, last_used FROM sessions WHERE id = ?", (session_id,)).fetchone()
+            if row is None:
+                return None
+            self.stats["loads"] += 1
+        return json.loads(_decompress(row[1], row[0])), row[2], row[3]
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            deleted = self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount > 0
+            self._db.commit()
+            self.stats["deletes"] += deleted
+        return deleted
+
+    def expire(self, older_than: float) -> List[str]:
+        """Delete sessions last used before `older_than` (epoch seconds); returns their ids."""
+        with self._lock:
+            ids = [row[0] for row in self._db.execute("SELECT id FROM sessions WHERE last_used < ?", (older_than,))]
+            if ids:
+                self._db.execute("DELETE FROM sessions WHERE last_used < ?", (older_than,))
+                self._db.commit()
+                logger.info(f"Expired {len(ids)} stored sessions")
+        return ids
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            count, raw_size, stored_size = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(state)), 0) FROM sessions"
+            ).fetchone()
+            return {
+                "codec": self.codec,
+                "stored_sessions": count,
+                "stored_bytes": stored_size,
+                "mean_stored_bytes": round(stored_size / count) if count else 0,
+                "compression_ratio": round(raw_size / stored_size, 2) if stored_size else 0.0,
+                **{f"total_{key}": value for key, value in self.stats.items()},
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
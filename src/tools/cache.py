@@ -0,0 +1,163 @@
+from src.config.logging import logger
+from src.types.models import SearchResult
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, Union, Tuple
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+if TYPE_CHECKING:
+    import sqlite3
+
+
+def normalize_query(query: Union[List[str], str], fold_case: bool = False) -> Union[List[str], str]:
+    """Whitespace-insensitive (and with `fold_case`, case-insensitive) form of a tool query, used to build cache keys."""
+    if isinstance(query, list):
+        return [normalize_query(item, fold_case) for item in query]
+    query = re.sub(r'\s+', ' ', str(query)).strip()
+    return query.lower() if fold_case else query
+
+
+class ResultCache:
+    """Two-tier cache for tool results: an in-memory LRU in front of an optional on-disk SQLite store.
+
+    Entries are keyed by tool name, normalized query and the tool's own parameters (``num_results``,
+    ``language``...), expire after a per-tool TTL and are evicted by count in memory and by total size
+    on disk. Queries are compared case-insensitively only for the tools in `case_insensitive` (search
+    engines); page titles and URLs are case-sensitive. Safe to share between agents and worker threads.
+    """
+
+    def __init__(self, path: Optional[str] = None, memory_entries: int = 1024, disk_max_bytes: int = 256 * 1024 * 1024, ttl: Optional[Dict[str, float]] = None, default_ttl: float = 3600, case_insensitive: Optional[List[str]] = None):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.disk_max_bytes = disk_max_bytes
+        self.ttl = ttl or {}
+        self.default_ttl = default_ttl
+        self.case_insensitive = set(case_insensitive if case_insensitive is not None else ["google_search"])
+        self.stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+
+        self._memory: "OrderedDict[str, Tuple[float, List[SearchResult]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional["sqlite3.Connection"] = None
+        self._closed = False
+
+    @classmethod
+    def from_config(cls, cache_config: Dict[str, Any]) -> "ResultCache":
+        return cls(
+            path=cache_config.get('path'),
+            memory_entries=cache_config.get('memory_entries', 1024),
+            disk_max_bytes=int(cache_config.get('disk_max_mb', 256) * 1024 * 1024),
+            ttl=cache_config.get('ttl', {}),
+            default_ttl=cache_config.get('default_ttl', 3600),
+            case_insensitive=cache_config.get('case_insensitive')
+        )
+
+    @staticmethod
+    def _init_db(path: str) -> "sqlite3.Connection":
+        import sqlite3
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, tool TEXT, value TEXT, size INTEGER, expires_at REAL, accessed_at REAL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)")
+        db.commit()
+        return db
+
+    def key(self, tool: str, query: Union[List[str], str], params: Optional[Dict[str, Any]] = None) -> str:
+        raw = json.dumps([tool, normalize_query(query, tool in self.case_insensitive), params or {}], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, tool: str, query: Union[List[str], str], params: Optional[Dict[str, Any]] = None) -> Optional[List[SearchResult]]:
+        key = self.key(tool, query, params)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and entry[0] > now:
+                self._memory.move_to_end(key)
+                self.stats["hits"] += 1
+                self.stats["memory_hits"] += 1
+                return entry[1]
+            if entry:
+                del self._memory[key]
+
+            self._open()
+            if self._db is not None:
+                row = self._db.execute("SELECT value, expires_at FROM results WHERE key = ?", (key,)).fetchone()
+                if row and row[1] > now:
+                    self._db.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    results = [SearchResult(**item) for item in json.loads(row[0])]
+                    # Promote to the memory tier for the next lookup
+                    self._remember(key, row[1], results)
+                    self.stats["hits"] += 1
+                    self.stats["disk_hits"] += 1
+                    return results
+
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, tool: str, query: Union[List[str], str], results: List[SearchResult], params: Optional[Dict[str, Any]] = None, ttl: Optional[float] = None) -> None:
+        key = self.key(tool, query, params)
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.ttl.get(tool, self.default_ttl))
+        with self._lock:
+            self._remember(key, expires_at, results)
+            self.stats["writes"] += 1
+            self._open()
+            if self._db is not None:
+                value = json.dumps([result.model_dump() for result in results], ensure_ascii=False)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, tool, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, tool, value, len(value), expires_at, now)
+                )
+                self._evict_disk(now)
+                self._db.commit()
+
+    def _open(self) -> None:
+        # Caller holds the lock; the store is opened by the first lookup, not when the cache is built
+        if self._db is None and self.path and not self._closed:
+            self._db = self._init_db(self.path)
+
+    def _remember(self, key: str, expires_at: float, results: List[SearchResult]) -> None:
+        self._memory[key] = (expires_at, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _evict_disk(self, now: float) -> None:
+        self._db.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.disk_max_bytes:
+            return
+        # Drop least recently used rows until the store fits again
+        for key, size in self._db.execute("SELECT key, size FROM results ORDER BY accessed_at").fetchall():
+            if total <= self.disk_max_bytes:
+                break
+            self._db.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._open()
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+        logger.info(f"Result cache closed with stats {self.stats}")
@@ -0,0 +1,206 @@
+from src.config.logging import logger
+from src.types.models import ExtractedPage
+from typing import Dict, List, Optional, Type
+import re
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:  # optional 'fast-html' extra
+    lxml = None
+
+
+BOILERPLATE_TAGS = ("script", "style", "noscript", "template", "iframe", "svg", "canvas", "button", "select", "input", "textarea")
+# Page chrome, unless it wraps most of the page: WebForms sites put the whole body in a <form>
+CONTAINER_TAGS = ("nav", "footer", "header", "aside", "form")
+BLOCK_TAGS = {"p", "div", "section", "article", "main", "li", "ul", "ol", "dl", "dt", "dd", "table", "tr", "td", "th", "pre", "blockquote",
+              "h1", "h2", "h3", "h4", "h5", "h6", "br", "hr", "figure", "figcaption", "caption", "address"}
+
+# Always boilerplate, whatever other hints the element carries
+UNLIKELY_PATTERN = re.compile(r"cookie|consent|gdpr|popup|modal|newsletter|subscribe|advert|sponsor|paywall", re.I)
+NEGATIVE_PATTERN = re.compile(r"cookie|consent|banner|popup|modal|newsletter|subscribe|share|social|promo|sponsor|advert|\bads?\b|comment|related|recommend|sidebar|widget|menu|breadcrumb|footer|masthead|navbar|pagination|skip|references|reflist", re.I)
+POSITIVE_PATTERN = re.compile(r"article|body|content|entry|main|page|post|story|text|blog", re.I)
+WHITESPACE_PATTERN = re.compile(r"[ \t\r\f\v\u00a0]+")
+
+
+def clean_lines(text: str) -> str:
+    # Remove extra whitespace and empty lines
+    lines = (WHITESPACE_PATTERN.sub(" ", line).strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+
+class Extractor:
+    """Turns raw HTML into a page title and the text worth sending to the model."""
+    name = "base"
+
+    def extract(self, html: str) -> ExtractedPage:
+        raise NotImplementedError
+
+
+class SoupExtractor(Extractor):
+    """Pure-Python BeautifulSoup path: the whole document text, boilerplate included."""
+    name = "html.parser"
+
+    def extract(self, html: str) -> ExtractedPage:
+        from bs4 import BeautifulSoup
+
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # Extract the plain text content
+        text = soup.get_text()
+        lines = (line.strip() for line in text.splitlines())
+        text = '\n'.join(line for line in lines if line)
+
+        # Get page title if available
+        title_tag = soup.find('title')
+        page_title = title_tag.get_text().strip() if title_tag else "Webpage Content"
+        return ExtractedPage(title=page_title, text=text)
+
+
+class LxmlExtractor(Extractor):
+    """libxml2-backed extractor that strips boilerplate and keeps the main content.
+
+    Scripts, styles, form controls, navigation, footers and elements whose class/id look like banners or
+    menus are dropped (page-level containers only when they do not wrap most of the text), then a readability-style pass scores block containers by the paragraphs they hold
+    (text length, commas, link density, class/id hints) and keeps the best one plus related siblings.
+    Pages with no clear winner fall back to the cleaned body text.
+    """
+    name = "lxml"
+    min_paragraph_length = 25
+    # Containers holding at least this share of the page text are content, not chrome
+    max_container_share = 0.5
+
+    def extract(self, html: str) -> ExtractedPage:
+        try:
+            tree = lxml.html.document_fromstring(html)
+        except ValueError:
+            # lxml refuses str input that still carries an XML encoding declaration
+            tree = lxml.html.document_fromstring(html.encode('utf-8'))
+        except etree.ParserError:
+            return ExtractedPage(title="Webpage Content", text="")
+
+        title = tree.findtext('.//title')
+        page_title = title.strip() if title and title.strip() else "Webpage Content"
+
+        self._remove_boilerplate(tree)
+        body = tree.find('body')
+        root = body if body is not None else tree
+
+        main = self._main_content(root) or [root]
+        text = clean_lines('\n'.join(self._text(node) for node in main))
+        return ExtractedPage(title=page_title, text=text)
+
+    def _remove_boilerplate(self, tree) -> None:
+        for node in tree.xpath('//comment() | //processing-instruction()'):
+            node.drop_tree()
+        for node in list(tree.iter(*BOILERPLATE_TAGS)):
+            node.drop_tree()
+        body = tree.find('body')
+        page_length = len((body if body is not None else tree).text_content()) or 1
+        for node in list(tree.iter(*CONTAINER_TAGS)):
+            # The header of an article holds its title and byline
+            if node.tag == "header" and any(ancestor.tag in ("article", "main") for ancestor in node.iterancestors()):
+                continue
+            if len(node.text_content()) / page_length < self.max_container_share:
+                node.drop_tree()
+        for node in tree.xpath('//*[@class or @id or @role or @aria-hidden or @hidden]'):
+            if node.tag in ("html", "body", "main", "article"):
+                continue
+            hints = f"{node.get('class', '')} {node.get('id', '')}"
+            if UNLIKELY_PATTERN.search(hints) \
+                    or (NEGATIVE_PATTERN.search(hints) and not POSITIVE_PATTERN.search(hints)) \
+                    or node.get('role') in ("navigation", "banner", "contentinfo", "dialog") \
+                    or node.get('aria-hidden') == "true" or node.get('hidden') is not None:
+                node.drop_tree()
+
+    @staticmethod
+    def _class_weight(node) -> float:
+        hints = f"{node.get('class', '')} {node.get('id', '')}"
+        weight = 0.0
+        if NEGATIVE_PATTERN.search(hints):
+            weight -= 25
+        if POSITIVE_PATTERN.search(hints):
+            weight += 25
+        return weight
+
+    @staticmethod
+    def _link_density(node) -> float:
+        text_length = len(node.text_content())
+        if not text_length:
+            return 0.0
+        link_length = sum(len(link.text_content()) for link in node.iter('a'))
+        return link_length / text_length
+
+    def _main_content(self, root) -> List:
+        scores: Dict = {}
+
+        def initial_score(node) -> float:
+            base = {"article": 10, "main": 10, "section": 5, "div": 5, "pre": 3, "td": 3, "blockquote": 3,
+                    "ol": -3, "ul": -3, "dl": -3, "li": -3, "h1": -5, "h2": -5, "h3": -5, "th": -5}.get(node.tag, 0)
+            return base + self._class_weight(node)
+
+        for paragraph in root.iter('p', 'pre', 'td', 'blockquote'):
+            text = paragraph.text_content().strip()
+            if len(text) < self.min_paragraph_length:
+                continue
+            score = 1 + text.count(',') + min(len(text) / 100, 3)
+            parent = paragraph.getparent()
+            grandparent = parent.getparent() if parent is not None else None
+            for ancestor, share in ((parent, 1.0), (grandparent, 0.5)):
+                if ancestor is None or not isinstance(ancestor.tag, str):
+                    continue
+                if ancestor not in scores:
+                    scores[ancestor] = initial_score(ancestor)
+                scores[ancestor] += score * share
+
+        if not scores:
+            return []
+
+        for node in scores:
+            scores[node] *= 1 - self._link_density(node)
+        best = max(scores, key=scores.get)
+        if scores[best] < 20:
+            return []
+
+        # Keep siblings that score close to the winner, e.g. an article split over several containers
+        parent = best.getparent()
+        if parent is None:
+            return [best]
+        threshold = max(10, scores[best] * 0.2)
+        return [sibling for sibling in parent if sibling is best or scores.get(sibling, 0) >= threshold]
+
+    @staticmethod
+    def _text(node) -> str:
+        # Walk the tree once, turning block boundaries into line breaks
+        parts = []
+        for event, element in etree.iterwalk(node, events=("start", "end")):
+            if not isinstance(element.tag, str):
+                continue
+            block = element.tag in BLOCK_TAGS
+            if event == "start":
+                if block:
+                    parts.append("\n")
+                if element.text:
+                    parts.append(element.text)
+            else:
+                if block:
+                    parts.append("\n")
+                if element.tail and element is not node:
+                    parts.append(element.tail)
+        return ''.join(parts)
+
+
+EXTRACTORS: Dict[str, Type[Extractor]] = {
+    SoupExtractor.name: SoupExtractor,
+    LxmlExtractor.name: LxmlExtractor,
+}
+
+
+def get_extractor(name: Optional[str] = None) -> Extractor:
+    name = name or SoupExtractor.name
+    if name not in EXTRACTORS:
+        raise ValueError(f"Unknown HTML extractor '{name}'. Available extractors are: {list(EXTRACTORS)}")
+    if name == LxmlExtractor.name and lxml is None:
+        logger.warning("lxml is not installed, falling back to the html.parser extractor")
+        name = SoupExtractor.name
+    return EXTRACTORS[name]()
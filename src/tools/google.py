@@ -1,7 +1,9 @@
-from src.config.logging import logger
+from src.config.logging import logger, PAYLOAD
 from src.config.setup import config
 from src.types.models import SearchResult
-from typing import List
+from src.tools.prefetch import PagePrefetcher
+from src.utils.http import HttpClient, get_http_client
+from typing import List, Optional
 import requests
 import os
 
@@ -9,11 +11,14 @@ import os
 class GoogleSearcher:
     """Google Custom Search API wrapper class"""
     
-    def __init__(self, num_results=10):
+    def __init__(self, num_results=10, http_client: Optional[HttpClient] = None):
         self.base_url = "https://www.googleapis.com/customsearch/v1"
+        self.http = http_client or get_http_client()
         self.api_key = os.environ.get('GOOGLE_CUSTOM_SEARCH_API_KEY')
         self.cx = config.CUSTOMSEARCH_ID
         self.num_results = num_results
+        # When set, the top links of every search are fetched in the background for read_web_page
+        self.prefetcher: Optional[PagePrefetcher] = None
         
         if not self.api_key:
             raise ValueError("GOOGLE_CUSTOM_SEARCH_API_KEY environment variable not set")
@@ -41,10 +46,10 @@ class GoogleSearcher:
             'num': results_count
         }
         
-        logger.info(f"Searching for query: '{query}' with params: {params}")
+        logger.info(f"Searching for query: '{query}' with num={results_count}")
         
         try:
-            response = requests.get(self.base_url, params=params)
+            response = self.http.get(self.base_url, params=params)
             
             if response.status_code == 200:
                 data = response.json()
@@ -65,6 +70,8 @@ class GoogleSearcher:
                         continue
                 
                 logger.info(f"Successfully retrieved {len(results)} results for query: '{query}'")
+                if self.prefetcher is not None:
+                    self.prefetcher.prefetch([item.get('link') for item in data.get('items', [])])
                 if results == []:
                     return default_result
                 return results
@@ -74,7 +81,7 @@ class GoogleSearcher:
                     error_data = response.json()
                     logger.error(f"Error response: {error_data}")
                 except:
-                    logger.error(f"Error response text: {response.text}")
+                    logger.error("Error response text: %s", response.text, extra=PAYLOAD)
                 return default_result
                 
         except requests.RequestException as e:
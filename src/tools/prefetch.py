@@ -0,0 +1,199 @@
+from src.config.logging import logger
+from src.types.models import SearchResult
+from src.utils.http import FetchLimiter
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+import threading
+import time
+
+
+# A fetch returns the formatted page and the number of bytes downloaded (0 when the fetch failed)
+Fetch = Callable[[str], Tuple[SearchResult, int]]
+
+
+def page_key(url: str) -> str:
+    # The model often drops or adds a trailing slash or fragment when it copies a link
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), parts.query, ""))
+
+
+class _Entry:
+    __slots__ = ("future", "expires_at", "used", "bytes")
+
+    def __init__(self, future: Future, expires_at: float) -> None:
+        self.future = future
+        self.expires_at = expires_at
+        self.used = False
+        self.bytes = 0
+
+
+class PagePrefetcher:
+    """Short-lived page cache filled speculatively with the top links of each search.
+
+    `prefetch` starts background fetches for up to `top_n` links per search (at most `max_inflight`
+    in flight, extra links are skipped rather than queued) and `claim`/`take` hand a fetched page to
+    read_web_page, once the fetch is done when it is still running. Entries live for `ttl` seconds;
+    failed fetches are not served, so the reader fetches those pages itself. Fetches run on `limiter`,
+    normally read_web_page's, so prefetches count against the same global and per-host caps.
+
+    `stats` tracks how many prefetched pages were read (`used`, and `hit_rate` over all prefetched) and
+    the bytes downloaded for pages that expired or were evicted unread (`wasted_bytes`); `top_n` is
+    tuned on those two.
+    """
+
+    def __init__(self, fetch: Fetch, limiter: Optional[FetchLimiter] = None, top_n: int = 3, max_inflight: int = 6, ttl: float = 120, max_entries: int = 64) -> None:
+        self.fetch = fetch
+        self.top_n = top_n
+        self.max_inflight = max_inflight
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {"prefetched": 0, "skipped": 0, "failed": 0, "used": 0, "hits": 0, "inflight_hits": 0, "misses": 0, "wasted": 0, "wasted_bytes": 0, "used_bytes": 0}
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight = 0
+        # Reentrant: a claimed page's callback runs (and takes the lock) inside the fetch's set_result
+        self._lock = threading.RLock()
+        self._owns_limiter = limiter is None
+        self.limiter = limiter or FetchLimiter(max(1, max_inflight), max(1, max_inflight), thread_name_prefix="prefetch")
+
+    @classmethod
+    def from_config(cls, fetch: Fetch, prefetch_config: Dict[str, Any], limiter: Optional[FetchLimiter] = None) -> Optional["PagePrefetcher"]:
+        if not prefetch_config.get('enabled', True) or prefetch_config.get('top_n', 3) <= 0:
+            return None
+        return cls(
+            fetch,
+            limiter=limiter,
+            top_n=prefetch_config.get('top_n', 3),
+            max_inflight=prefetch_config.get('max_inflight', 6),
+            ttl=prefetch_config.get('ttl', 120),
+            max_entries=prefetch_config.get('max_entries', 64)
+        )
+
+    def _drop(self, key: str) -> None:
+        # Caller holds the lock
+        entry = self._entries.pop(key)
+        if entry.used:
+            return
+        if entry.future.done() and entry.bytes:
+            self.stats["wasted"] += 1
+            self.stats["wasted_bytes"] += entry.bytes
+
+    def _expire(self, now: float) -> None:
+        for key in [key for key, entry in self._entries.items() if entry.expires_at <= now]:
+            self._drop(key)
+
+    def prefetch(self, urls: List[str]) -> int:
+        """Start fetching the first `top_n` http(s) links that are not cached yet; returns how many were started."""
+        started = 0
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            for url in [url for url in urls if url and url.startswith(('http://', 'https://'))][:self.top_n]:
+                key = page_key(url)
+                if key in self._entries:
+                    continue
+                if self._inflight >= self.max_inflight:
+                    self.stats["skipped"] += 1
+                    continue
+                while len(self._entries) >= self.max_entries:
+                    self._drop(next(iter(self._entries)))
+                entry = _Entry(Future(), now + self.ttl)
+                self._entries[key] = entry
+                self._inflight += 1
+                self.stats["prefetched"] += 1
+                self.limiter.submit(partial(self._run, entry=entry), url).add_done_callback(partial(self._not_run, entry))
+                started += 1
+        if started:
+            logger.info(f"Prefetching {started} pages")
+        return started
+
+    def _run(self, url: str, entry: _Entry) -> None:
+        try:
+            result, size = self.fetch(url)
+        except Exception as e:
+            logger.warning(f"Prefetch of {url} failed: {e}")
+            result, size = None, 0
+        with self._lock:
+            self._inflight -= 1
+            entry.bytes = size
+            if not size:
+                self.stats["failed"] += 1
+            if entry.used:
+                self.stats["used_bytes"] += size
+            # Resolved under the lock so `take` sees the entry either in flight or complete, never in between
+            entry.future.set_result(result if size else None)
+
+    def _not_run(self, entry: _Entry, future: Future) -> None:
+        # Cancelled or rejected by a closed limiter, so _run never resolved the entry
+        if future.cancelled() or future.exception() is not None:
+            with self._lock:
+                if not entry.future.done():
+                    self._inflight -= 1
+                    entry.future.set_result(None)
+
+    def claim(self, url: str) -> Optional[Future]:
+        """Future of the prefetched page for `url` (resolving to None when the fetch failed), or None when it was not prefetched.
+
+        Waiting on the future holds no fetch worker, unlike calling `take` from inside one.
+        """
+        key = page_key(url)
+        with self._lock:
+            self._expire(time.monotonic())
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats["misses"] += 1
+                return None
+            inflight = not entry.future.done()
+            first_use = not entry.used
+            entry.used = True
+            if first_use and not inflight:
+                self.stats["used_bytes"] += entry.bytes
+
+        claimed: Future = Future()
+
+        def settle(done: Future) -> None:
+            result = done.result()
+            with self._lock:
+                if result is None:
+                    self.stats["misses"] += 1
+                else:
+                    self.stats["hits"] += 1
+                    self.stats["inflight_hits"] += inflight
+                    self.stats["used"] += first_use
+            claimed.set_result(result)
+
+        # Waiting for a fetch that is already running beats starting a second one
+        entry.future.add_done_callback(settle)
+        return claimed
+
+    def take(self, url: str, timeout: Optional[float] = None) -> Optional[SearchResult]:
+        """The prefetched page for `url`, or None when it was not prefetched or the fetch failed."""
+        claimed = self.claim(url)
+        if claimed is None:
+            return None
+        try:
+            return claimed.result(timeout=timeout)
+        except Exception:
+            return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                **self.stats,
+                # Share of prefetched pages read_web_page asked for; pages still cached may raise it later
+                "hit_rate": round(self.stats["used"] / self.stats["prefetched"], 3) if self.stats["prefetched"] else 0.0,
+                "inflight": self._inflight,
+                "entries": len(self._entries),
+            }
+
+    def close(self) -> None:
+        if self._owns_limiter:
+            self.limiter.close()
+        # Nothing is fetched after this; whoever waits on a page falls back to its own fetch
+        with self._lock:
+            for entry in self._entries.values():
+                if not entry.future.done():
+                    entry.future.set_result(None)
@@ -1,27 +1,41 @@
 from src.config.logging import logger
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Tuple
 import requests
 from requests.cookies import RequestsCookieJar
-from bs4 import BeautifulSoup
 from src.types.models import SearchResult
+from src.utils.http import FetchLimiter, HttpClient, get_http_client
+from src.tools.extract import get_extractor
+from src.tools.prefetch import PagePrefetcher
+from src.config.setup import config
 import json
 
 
 class ReadWebPage:
     
-    def __init__(self, user_agent: str = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36 Edg/137.0.0.0', timeout: int = 10):
+    def __init__(self, user_agent: str = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36 Edg/137.0.0.0', timeout: int = 10, http_client: Optional[HttpClient] = None, max_concurrency: int = 8, max_per_host: int = 2, extractor: Optional[str] = None):
         self.user_agent = user_agent
         self.timeout = timeout
         self.max_retries = 3
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.extractor = get_extractor(extractor or config.HTML_EXTRACTOR)
+        # Caps fetches across all calls; a host's slots are taken before a fetch gets a worker
+        self.limiter = FetchLimiter(max_concurrency, max_per_host, thread_name_prefix="read_web_page")
+        # Accept-Encoding and keep-alive come from the shared client
+        self.http = http_client or get_http_client()
+        # Pages fetched ahead of time from search results, checked before going to the network
+        self.prefetcher: Optional[PagePrefetcher] = None
         self.headers = {
             'User-Agent': self.user_agent,
-            # 'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            # 'Accept-Language': 'en-US,en;q=0.5',
-            # 'Accept-Encoding': 'gzip, deflate',
-            # 'Connection': 'keep-alive',
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
         }
 
     def get_and_format(self, url: str) -> SearchResult:
+        return self.fetch_page(url)[0]
+
+    def fetch_page(self, url: str) -> Tuple[SearchResult, int]:
+        """Formatted page and the number of bytes downloaded; 0 bytes means the result describes an error."""
         # Default error result
         default_result = SearchResult(
             title=f"Unable to read content from {url}",
@@ -29,94 +43,90 @@ class ReadWebPage:
             summary=""
         )
         
-        with requests.Session() as session:
-            for attempt in range(self.max_retries):
-                try:
-                    logger.info(f"Reading webpage: {url}")
-                    
-                    # Validate URL format
-                    if not url.startswith(('http://', 'https://')):
-                        logger.warning(f"Invalid URL format: {url}")
-                        return SearchResult(
-                            title="Invalid URL format",
-                            query=url,
-                            summary="URL must start with http:// or https://"
-                        )
-                    
-                    # Get HTML source code of the webpage
-                    response = session.get(url, headers=self.headers, timeout=self.timeout)
-                    response.raise_for_status()  # Raises an HTTPError for bad responses
-                    
-                    # Parse the source code using BeautifulSoup
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Extract the plain text content
-                    text = soup.get_text()
-                    
-                    # Clean up the text - remove extra whitespace and empty lines
-                    lines = (line.strip() for line in text.splitlines())
-                    text = '\n'.join(line for line in lines if line)
-                    
-                    # Get page title if available
-                    title_tag = soup.find('title')
-                    page_title = title_tag.get_text().strip() if title_tag else "Webpage Content"
-                    
-                    result = SearchResult(
-                        title=f"result for {url} is page {page_title}",
-                        query=url,
-                        summary=text
-                    )
-                    
-                    logger.info(f"Successfully extracted content from: {url}")
-                    return result
-                    
-                except requests.exceptions.Timeout:
-                    logger.error(f"Timeout error while reading: {url}")
-                    default_result = SearchResult(
-                        title="Timeout Error",
-                        query=url,
-                        summary=f"Request timed out after {self.timeout} seconds"
-                    )
-                    continue
-                    
-                except requests.exceptions.ConnectionError:
-                    logger.error(f"Connection error while reading: {url}")
-                    default_result = SearchResult(
-                        title="Connection Error",
-                        query=url,
-                        summary="Unable to establish connection to the webpage"
-                    )
-                    continue
-                    
-                except requests.exceptions.HTTPError as e:
-                    logger.error(f"HTTP error while reading {url}: {e}")
-                    default_result = SearchResult(
-                        title=f"HTTP Error {e.response.status_code}",
+        for attempt in range(self.max_retries):
+            try:
+                logger.info(f"Reading webpage: {url}")
+                
+                # Validate URL format
+                if not url.startswith(('http://', 'https://')):
+                    logger.warning(f"Invalid URL format: {url}")
+                    return SearchResult(
+                        title="Invalid URL format",
                         query=url,
-                        summary=f"HTTP Error: {e.response.status_code} - {e.response.reason}"
-                    )
-                    continue
-                    
-                except Exception as e:
-                    logger.exception(f"An error occurred while reading the webpage: {e}")
-                    continue
+                        summary="URL must start with http:// or https://"
+                    ), 0
+                
+                # Get HTML source code of the webpage
+                response = self.http.get(url, headers=self.headers, timeout=(self.http.timeout[0], self.timeout))
+                response.raise_for_status()  # Raises an HTTPError for bad responses
+                
+                # Parse the source code with the configured extractor backend
+                page = self.extractor.extract(response.text)
+                
+                result = SearchResult(
+                    title=f"result for {url} is page {page.title}",
+                    query=url,
+                    summary=page.text
+                )
+                
+                logger.info(f"Successfully extracted content from: {url}")
+                return result, len(response.content)
                 
-        return default_result
+            except requests.exceptions.Timeout:
+                logger.error(f"Timeout error while reading: {url}")
+                default_result = SearchResult(
+                    title="Timeout Error",
+                    query=url,
+                    summary=f"Request timed out after {self.timeout} seconds"
+                )
+                continue
+                
+            except requests.exceptions.ConnectionError:
+                logger.error(f"Connection error while reading: {url}")
+                default_result = SearchResult(
+                    title="Connection Error",
+                    query=url,
+                    summary="Unable to establish connection to the webpage"
+                )
+                continue
+                
+            except requests.exceptions.HTTPError as e:
+                logger.error(f"HTTP error while reading {url}: {e}")
+                default_result = SearchResult(
+                    title=f"HTTP Error {e.response.status_code}",
+                    query=url,
+                    summary=f"HTTP Error: {e.response.status_code} - {e.response.reason}"
+                )
+                continue
+                
+            except Exception as e:
+                logger.exception(f"An error occurred while reading the webpage: {e}")
+                continue
+            
+        return default_result, 0
     
+    def _fetch(self, url: str) -> SearchResult:
+        return self.fetch_page(url)[0]
+
     def search(self, query: Union[List[str], str]) -> List[SearchResult]:
         # Handle single string input by converting to list
-        if isinstance(query, str):
-            queries = [query]
-        
-        results = []
-        
-        for url in query:
-            result = self.get_and_format(url)
-            results.append(result)
+        urls = [query] if isinstance(query, str) else list(query)
+
+        # Prefetched pages are claimed up front: waiting for one that is still downloading holds neither a
+        # worker nor a host slot, which the prefetch itself may need
+        claimed = [self.prefetcher.claim(url) if self.prefetcher is not None else None for url in urls]
+        futures = [future if future is not None else self.limiter.submit(self._fetch, url) for url, future in zip(urls, claimed)]
+        # Results come back in input order
+        results = [future.result() for future in futures]
+        # A failed prefetch resolves to None; those pages are fetched now
+        retries = {index: self.limiter.submit(self._fetch, urls[index]) for index, result in enumerate(results) if result is None}
+        for index, future in retries.items():
+            results[index] = future.result()
         
-        logger.info(f"Processed {len(query)} URLs, got {len(results)} results")
+        logger.info(f"Processed {len(urls)} URLs, got {len(results)} results")
         return results
 
+
 if __name__ == '__main__':
     # Create an instance of the ReadWebPage class
     reader = ReadWebPage()
@@ -0,0 +1,230 @@
+from src.config.logging import logger
+from src.types.models import SearchResult
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple, Any
+import math
+import re
+import threading
+
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+")
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have he her his how i if in into is it its me my no not of on or our
+she so than that the their them then there these they this to was we were what when where which who why will with
+you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def chunk_text(text: str, max_chars: int = 1200) -> List[str]:
+    """Pack consecutive lines into chunks of at most `max_chars`, splitting overlong lines on sentences."""
+    pieces = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if len(line) <= max_chars:
+            pieces.append(line)
+            continue
+        for sentence in SENTENCE_PATTERN.split(line):
+            # A single run-on "sentence" (tables, minified text) is cut hard
+            pieces.extend(sentence[start:start + max_chars] for start in range(0, len(sentence), max_chars))
+
+    chunks, current, size = [], [], 0
+    for piece in pieces:
+        if current and size + len(piece) + 1 > max_chars:
+            chunks.append('\n'.join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += len(piece) + 1
+    if current:
+        chunks.append('\n'.join(current))
+    return chunks
+
+
+class BM25Index:
+    """In-memory inverted index over text chunks, ranked with Okapi BM25."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # term -> {chunk id: term frequency}
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.lengths: Dict[int, int] = {}
+        self.total_length = 0
+        self._next_id = 0
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    def add(self, text: str) -> int:
+        chunk_id = self._next_id
+        self._next_id += 1
+        terms = tokenize(text)
+        for term, frequency in Counter(terms).items():
+            self.postings.setdefault(term, {})[chunk_id] = frequency
+        self.lengths[chunk_id] = len(terms)
+        self.total_length += len(terms)
+        return chunk_id
+
+    def remove(self, chunk_id: int, text: str) -> None:
+        for term in set(tokenize(text)):
+            postings = self.postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(chunk_id, None)
+            if not postings:
+                del self.postings[term]
+        self.total_length -= self.lengths.pop(chunk_id, 0)
+
+    def scores(self, query: str) -> Dict[int, float]:
+        """BM25 score of every chunk sharing at least one term with `query`."""
+        if not self.lengths:
+            return {}
+        average_length = self.total_length / len(self.lengths) or 1
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (len(self.lengths) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for chunk_id, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[chunk_id] / average_length)
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        return scores
+
+
+class ChunkRetriever:
+    """Keeps large tool outputs out of the prompt.
+
+    Results whose summary is longer than `threshold_chars` are split into chunks and indexed; only the
+    `top_k` chunks most relevant to the user's query are sent to the model, with a note that the rest
+    can be pulled through the `read_more` tool. Indexed sources are evicted least recently used first.
+    """
+
+    def __init__(self, threshold_chars: int = 6000, chunk_chars: int = 1200, top_k: int = 4, max_sources: int = 32):
+        self.threshold_chars = threshold_chars
+        self.chunk_chars = chunk_chars
+        self.top_k = top_k
+        self.max_sources = max_sources
+        self.index = BM25Index()
+        # source id -> (title, chunk ids in document order)
+        self.sources: "OrderedDict[str, Tuple[str, List[int]]]" = OrderedDict()
+        # chunk id -> (source id, position, text)
+        self.chunks: Dict[int, Tuple[str, int, str]] = {}
+        # Chunks the model has already been given
+        self.shown: set = set()
+        self._next_source = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, retrieval_config: Dict[str, Any]) -> "ChunkRetriever":
+        return cls(
+            threshold_chars=retrieval_config.get('threshold_chars', 6000),
+            chunk_chars=retrieval_config.get('chunk_chars', 1200),
+            top_k=retrieval_config.get('top_k', 4),
+            max_sources=retrieval_config.get('max_sources', 32)
+        )
+
+    def _add_source(self, title: str, text: str) -> str:
+        source_id = f"s{self._next_source}"
+        self._next_source += 1
+        chunk_ids = []
+        for position, chunk in enumerate(chunk_text(text, self.chunk_chars)):
+            chunk_id = self.index.add(chunk)
+            self.chunks[chunk_id] = (source_id, position, chunk)
+            chunk_ids.append(chunk_id)
+        self.sources[source_id] = (title, chunk_ids)
+
+        while len(self.sources) > self.max_sources:
+            _, (_, evicted) = self.sources.popitem(last=False)
+            for chunk_id in evicted:
+                self.index.remove(chunk_id, self.chunks.pop(chunk_id)[2])
+                self.shown.discard(chunk_id)
+        return source_id
+
+    def _rank(self, query: str, candidates: List[int]) -> List[int]:
+        scores = self.index.scores(query)
+        ranked = sorted((chunk_id for chunk_id in candidates if scores.get(chunk_id)), key=lambda chunk_id: -scores[chunk_id])
+        return ranked[:self.top_k]
+
+    def _render(self, chunk_ids: List[int]) -> str:
+        # Passages go back in document order, labelled so the model can tell they are excerpts
+        parts = []
+        for chunk_id in sorted(chunk_ids, key=lambda chunk_id: self.chunks[chunk_id][:2]):
+            source_id, position, text = self.chunks[chunk_id]
+            parts.append(f"[{source_id} passage {position + 1}/{len(self.sources[source_id][1])}]\n{text}")
+        return '\n\n'.join(parts)
+
+    def reduce(self, results: List[SearchResult], query: str) -> List[SearchResult]:
+        """Replace oversized summaries with their most relevant passages for `query`."""
+        reduced = []
+        with self._lock:
+            for result in results:
+                if len(result.summary) <= self.threshold_chars:
+                    reduced.append(result)
+                    continue
+                source_id = self._add_source(result.title, result.summary)
+                chunk_ids = self.sources[source_id][1]
+                # No overlap with the query (e.g. a bare URL or name) falls back to the opening passages
+                selected = self._rank(query, chunk_ids) or chunk_ids[:self.top_k]
+                self.shown.update(selected)
+                note = f"\n\n[Showing {len(selected)} of {len(chunk_ids)} passages from {source_id}. Use read_more with a query to get other passages.]"
+                logger.info(f"Indexed {len(result.summary)} characters of '{result.title}' as {source_id} ({len(chunk_ids)} passages, sent {len(selected)})")
+                reduced.append(result.model_copy(update={"summary": self._render(selected) + note}))
+        return reduced
+
+    def read_more(self, query: str) -> List[SearchResult]:
+        """Follow-up tool: passages of previously read pages, not yet shown, that best match `query`."""
+        with self._lock:
+            unseen = [chunk_id for chunk_id in self.chunks if chunk_id not in self.shown]
+            selected = self._rank(query, unseen)
+            if not selected:
+                return [SearchResult(title=f"No further passages match {query}", query=query, summary="")]
+            self.shown.update(selected)
+
+            results = []
+            for source_id, (title, chunk_ids) in list(self.sources.items()):
+                matches = [chunk_id for chunk_id in selected if self.chunks[chunk_id][0] == source_id]
+                if matches:
+                    self.sources.move_to_end(source_id)
+                    results.append(SearchResult(title=title, query=query, summary=self._render(matches)))
+            return results
+
+    def dump(self) -> Dict[str, Any]:
+        """JSON-serializable copy of the indexed sources and of which passages were already shown."""
+        with self._lock:
+            sources = []
+            for source_id, (title, chunk_ids) in self.sources.items():
+                sources.append({
+                    "id": source_id,
+                    "title": title,
+                    "chunks": [self.chunks[chunk_id][2] for chunk_id in chunk_ids],
+                    "shown": [position for position, chunk_id in enumerate(chunk_ids) if chunk_id in self.shown],
+                })
+            return {"next_source": self._next_source, "sources": sources}
+
+    def load(self, dumped: Dict[str, Any]) -> None:
+        """Replace the index with one rebuilt from `dump()`, so read_more keeps serving the same passages."""
+        with self._lock:
+            self.index = BM25Index(self.index.k1, self.index.b)
+            self.sources.clear()
+            self.chunks.clear()
+            self.shown.clear()
+            for source in dumped.get("sources", []):
+                chunk_ids = []
+                for position, chunk in enumerate(source["chunks"]):
+                    chunk_id = self.index.add(chunk)
+                    self.chunks[chunk_id] = (source["id"], position, chunk)
+                    chunk_ids.append(chunk_id)
+                self.sources[source["id"]] = (source["title"], chunk_ids)
+                self.shown.update(chunk_ids[position] for position in source["shown"])
+            self._next_source = dumped.get("next_source", len(self.sources))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"sources": len(self.sources), "chunks": len(self.chunks), "shown": len(self.shown), "terms": len(self.index.postings)}
@@ -1,9 +1,14 @@
+from src.config.logging import logger
 from src.types.typing import Name, Observation 
 from src.types.models import APIToolSchema, InputSchema
-from typing import Callable
+from src.tools.cache import ResultCache
+from src.utils.tracing import current_span
+from typing import Callable, Optional, Dict, Any
+import asyncio
+import inspect
 
 class Tool:
-    def __init__(self, name: Name, func: Callable[[str], str], description: str = "Argument to search", input_schema: InputSchema = InputSchema()):
+    def __init__(self, name: Name, func: Callable[[str], str], description: str = "Argument to search", input_schema: InputSchema = InputSchema(), cache: Optional[ResultCache] = None, cache_params: Optional[Dict[str, Any]] = None):
             self.name = name
             self.func = func
             self.api_object = APIToolSchema(
@@ -11,10 +16,44 @@ class Tool:
                 description=description,
                 input_schema=input_schema
             )
+            # Opt-in result cache; cache_params holds the tool settings that change its output (num_results, language...)
+            self.cache = cache
+            self.cache_params = cache_params or {}
+
+    def _cached(self, query: str) -> Optional[Observation]:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(self.name.__str__(), query, self.cache_params)
+        span = current_span()
+        if span is not None:
+            span.set(cache_hit=cached is not None)
+        return cached
+
+    def _store(self, query: str, result: Observation) -> Observation:
+        # Errors and empty lookups are not cached so a transient failure is retried next time
+        if self.cache is not None and isinstance(result, list) and any(getattr(item, 'summary', '') for item in result):
+            self.cache.set(self.name.__str__(), query, result, self.cache_params)
+        return result
 
     def use(self, query: str) -> Observation:
         try:
-            return self.func(query)
+            cached = self._cached(query)
+            if cached is not None:
+                return cached
+            return self._store(query, self.func(query))
+        except Exception as e:
+            logger.error(f"Error executing tool {self.name}: {e}")
+            return str(e)
+
+    async def ause(self, query: str) -> Observation:
+        try:
+            # Native coroutine tools are awaited directly, blocking ones are pushed to a worker thread
+            if inspect.iscoroutinefunction(self.func):
+                cached = self._cached(query)
+                if cached is not None:
+                    return cached
+                return self._store(query, await self.func(query))
+            return await asyncio.to_thread(self.use, query)
         except Exception as e:
             logger.error(f"Error executing tool {self.name}: {e}")
-            return str(e)
\ No newline at end of file
+            return str(e)
@@ -0,0 +1,104 @@
+from src.config.setup import config
+from src.config.static import google_search_properties, wiki_search_properties, webpage_search_properties, read_more_properties
+from src.tools.cache import ResultCache
+from src.types.models import InputSchema, SearchResult
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union
+import threading
+
+if TYPE_CHECKING:
+    from src.tools.google import GoogleSearcher
+    from src.tools.prefetch import PagePrefetcher
+    from src.tools.readwebpage import ReadWebPage
+    from src.tools.wiki import WikipediaSearcher
+
+
+class Toolkit:
+    """Tool backends built once per process and registered on any number of agents.
+
+    Searchers, their HTTP pools, the fetch executor, the page prefetcher and the result cache are shared;
+    only `read_more` is bound per agent since it reads that agent's own passage index. Each backend (and
+    the modules behind it: requests, wikipediaapi, bs4) is built by the first call of its tool, so a
+    process that answers from the cache or never reads a page does not pay for it.
+    """
+
+    def __init__(self, google_num_results: int = 10, wiki_language: str = 'en') -> None:
+        self.google_num_results = google_num_results
+        self.wiki_language = wiki_language
+        self.result_cache = ResultCache.from_config(config.TOOL_CACHE)
+        self.prefetcher: Optional["PagePrefetcher"] = None
+        self._backends: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+        self.google_input_schema = InputSchema(properties=google_search_properties, required=["query"])
+        self.wiki_input_schema = InputSchema(properties=wiki_search_properties, required=["query"])
+        self.webpage_input_schema = InputSchema(properties=webpage_search_properties, required=["query"])
+        self.read_more_input_schema = InputSchema(properties=read_more_properties, required=["query"])
+
+    def _backend(self, name: str, build: Callable[[], Any]) -> Any:
+        backend = self._backends.get(name)
+        if backend is None:
+            with self._lock:
+                backend = self._backends.get(name)
+                if backend is None:
+                    backend = self._backends[name] = build()
+        return backend
+
+    def _build_read_web_page(self) -> "ReadWebPage":
+        from src.tools.prefetch import PagePrefetcher
+        from src.tools.readwebpage import ReadWebPage
+
+        read_web_page = ReadWebPage()
+        # A search is usually followed by reading its top links; start those fetches right away
+        # Prefetches share the reader's limiter, so they count against the same global and per-host caps
+        self.prefetcher = PagePrefetcher.from_config(read_web_page.fetch_page, config.PREFETCH, limiter=read_web_page.limiter)
+        read_web_page.prefetcher = self.prefetcher
+        return read_web_page
+
+    def _build_google_searcher(self) -> "GoogleSearcher":
+        from src.tools.google import GoogleSearcher
+
+        google_searcher = GoogleSearcher(num_results=self.google_num_results)
+        # The prefetcher fetches through the page reader, so both are built together
+        google_searcher.prefetcher = self.read_web_page.prefetcher
+        return google_searcher
+
+    def _build_wiki_searcher(self) -> "WikipediaSearcher":
+        from src.tools.wiki import WikipediaSearcher
+
+        return WikipediaSearcher(language=self.wiki_language)
+
+    @property
+    def google_searcher(self) -> "GoogleSearcher":
+        return self._backend("google_search", self._build_google_searcher)
+
+    @property
+    def wiki_searcher(self) -> "WikipediaSearcher":
+        return self._backend("wikipedia_search", self._build_wiki_searcher)
+
+    @property
+    def read_web_page(self) -> "ReadWebPage":
+        return self._backend("read_web_page", self._build_read_web_page)
+
+    def google_search(self, query: str) -> List[SearchResult]:
+        return self.google_searcher.search(query)
+
+    def wikipedia_search(self, query: str) -> List[SearchResult]:
+        return self.wiki_searcher.search(query)
+
+    def read_web_pages(self, query: Union[List[str], str]) -> List[SearchResult]:
+        return self.read_web_page.search(query)
+
+    def register(self, agent) -> None:
+        agent.register("google_search", self.google_search, "Search Google for up-to-date information", self.google_input_schema,
+                       cache=self.result_cache, cache_params={"num_results": self.google_num_results, "cx": config.CUSTOMSEARCH_ID})
+        agent.register("wikipedia_search", self.wikipedia_search, "Search Wikipedia for people, places, phenomenon. Note that we should only search the full name of people or places like \"Harry Style\" \"Paris\" multiple name in one search is not supported", self.wiki_input_schema,
+                       cache=self.result_cache, cache_params={"language": self.wiki_language})
+        agent.register("read_web_page", self.read_web_pages, "Read the text content of a web page when an url is provided. Note that if a page is unaccessible retry until it work", self.webpage_input_schema)
+        agent.register("read_more", agent.retriever.read_more, "Get more passages from pages and articles already read whose content was cut down to the most relevant parts", self.read_more_input_schema)
+
+    def close(self) -> None:
+        self.result_cache.close()
+        if "read_web_page" in self._backends:
+            self._backends["read_web_page"].limiter.close()
+        if self.prefetcher is not None:
+            self.prefetcher.close()
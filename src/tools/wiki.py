@@ -2,15 +2,18 @@ from src.config.logging import logger
 from typing import Optional
 import wikipediaapi
 from src.types.models import SearchResult
+from src.utils.http import HttpClient, get_http_client
 from typing import List
 import json
 
 
 class WikipediaSearcher:
     
-    def __init__(self, user_agent: str = 'ReAct Agents (shankar.arunp@gmail.com)', language: str = 'en'):
-
-        self.wiki = wikipediaapi.Wikipedia(user_agent=user_agent, language=language)
+    def __init__(self, user_agent: str = 'ReAct Agents (shankar.arunp@gmail.com)', language: str = 'en', http_client: Optional[HttpClient] = None):
+        self.http = http_client or get_http_client()
+        self.wiki = wikipediaapi.Wikipedia(user_agent=user_agent, language=language, timeout=self.http.timeout)
+        # wikipediaapi owns its session (and User-Agent); only its connection pools are shared
+        self.http.share_pool(self.wiki._session)
         self.user_agent = user_agent
         self.language = language
     
@@ -5,7 +5,16 @@ from src.types.typing import Name
 
 class ContentBlock(BaseModel):
     type: str = Field(default="text", description="The type of content block.")
-    text: str = Field(..., description="The text content of the block.")
+    text: Optional[str] = Field(None, description="The text content of the block.")
+    # tool_use blocks
+    id: Optional[str] = Field(None, description="Identifier of a tool_use block.")
+    name: Optional[str] = Field(None, description="Name of the tool requested by a tool_use block.")
+    input: Optional[Dict[str, Any]] = Field(None, description="Arguments of a tool_use block.")
+    # tool_result blocks
+    tool_use_id: Optional[str] = Field(None, description="Identifier of the tool_use block this result answers.")
+    content: Optional[str] = Field(None, description="Output of the tool for a tool_result block.")
+    is_error: Optional[bool] = Field(None, description="Whether the tool_result reports a failure.")
+    cache_control: Optional[Dict[str, str]] = Field(None, description="Prompt cache breakpoint, e.g. {\"type\": \"ephemeral\"}.")
 
 class Message(BaseModel):
     role: str = Field(..., description="The role of the message sender.")
@@ -25,17 +34,43 @@ class APIToolSchema(BaseModel):
     name: str
     description: str
     input_schema: InputSchema = Field(default_factory=InputSchema)
+    cache_control: Optional[Dict[str, str]] = None
 
 class AnthropicAPIBody(BaseModel):
     anthropic_version: str = Field(..., description="The version of the Anthropic API.")
     max_tokens: int = Field(..., description="Maximum number of tokens to generate.")
     messages: List[Message] = Field(..., description="List of messages in the conversation.")
-    system: Optional[str] = Field(None, description="System prompt to set assistant behavior.")
+    system: Optional[Union[str, List[ContentBlock]]] = Field(None, description="System prompt to set assistant behavior.")
     top_p: Optional[float] = Field(None, ge=0.0, le=1.0, description="Nucleus sampling: only consider tokens with cumulative probability up to top_p (0.0-1.0).")
     top_k: Optional[int] = Field(None, ge=1, description="Only consider the top_k most likely tokens at each step.")
     temperature: Optional[float] = Field(None, ge=0.0, le=1.0, description="Controls randomness in responses (0.0-1.0).")
     tools: Optional[List[APIToolSchema]] = Field(None, description="List of available tools for the assistant.")
     tool_choice: Optional[Dict[str, str]] = Field(None, description="Strategy for tool selection.")
+
+class Usage(BaseModel):
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+
+    def add(self, usage: Optional[Dict[str, Any]]) -> None:
+        """Accumulate the `usage` field of a model response."""
+        for key, value in (usage or {}).items():
+            if key in Usage.model_fields and value:
+                setattr(self, key, getattr(self, key) + value)
+
+class AgentState(BaseModel):
+    """Where a query stands between two agent steps; round-trips through model_dump()/model_validate()."""
+    phase: str = Field(default="idle", description="Next step to run: idle, think, act or done.")
+    query: str = Field(default="", description="Question being answered.")
+    messages: List[Message] = Field(default_factory=list, description="Conversation history sent to the model.")
+    memory: str = Field(default="", description="Summary of the turns folded out of `messages`.")
+    iteration: int = Field(default=0, description="Model turns taken for the current query.")
+    pending_message: Optional[Message] = Field(None, description="Message the next think step appends before calling the model.")
+    pending_tool_calls: List[Dict[str, Any]] = Field(default_factory=list, description="tool_use blocks the next act step runs.")
+    stop_reason: Optional[str] = Field(None, description="How the last model turn ended.")
+    answer: Optional[Message] = Field(None, description="Final message, set once the phase is done.")
+    usage: Usage = Field(default_factory=Usage, description="Token usage of the current query.")
     
 #Search Models
 
@@ -43,4 +78,7 @@ class SearchResult(BaseModel):
     title: str = Field(..., description="Title of the search result")
     query: str = Field(..., description="Original search query")
     summary: str = Field(default="", description="Snippet/summary of the search result")
-    
\ No newline at end of file
+
+class ExtractedPage(BaseModel):
+    title: str = Field(default="", description="Title of the page")
+    text: str = Field(default="", description="Readable text content of the page")
@@ -0,0 +1,250 @@
+from src.config.logging import logger
+from src.config.setup import config
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import base64
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+if TYPE_CHECKING:
+    import requests
+
+
+MODES = ("off", "record", "replay")
+# Query parameters that identify the caller, not the request (API keys)
+REDACTED_PARAMS = {"key", "api_key", "apikey", "access_token"}
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded interaction for a request."""
+
+
+def _canonical_json(body: Any) -> str:
+    if isinstance(body, bytes):
+        body = body.decode('utf-8')
+    try:
+        return json.dumps(json.loads(body), sort_keys=True, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return str(body)
+
+
+def redact_url(url: str) -> str:
+    parts = urlsplit(url)
+    query = sorted((name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True) if name.lower() not in REDACTED_PARAMS)
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+
+
+def _encode_body(content: bytes) -> Dict[str, str]:
+    try:
+        return {"text": content.decode('utf-8')}
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(content).decode('ascii')}
+
+
+def _decode_body(body: Dict[str, str]) -> bytes:
+    if "base64" in body:
+        return base64.b64decode(body["base64"])
+    return body.get("text", "").encode('utf-8')
+
+
+class Cassette:
+    """Recorded Bedrock and HTTP interactions, one gzip-compressed JSON line each.
+
+    In `record` mode every call goes out for real and is appended to the file as soon as it returns.
+    In `replay` mode nothing leaves the process: calls are matched on a hash of the operation and its
+    canonical request (API keys stripped) and answered from the file in recorded order. With
+    `latency_scale` > 0, replay sleeps for the recorded duration (times the scale), chunk by chunk for
+    streams, so throughput benchmarks see realistic timing.
+    """
+
+    def __init__(self, path: str, mode: str = "replay", latency_scale: float = 0.0) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}'. Available modes are: {list(MODES)}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.stats = {"recorded": 0, "replayed": 0, "missed": 0}
+        self._interactions: Dict[str, List[Dict[str, Any]]] = {}
+        self._positions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        if mode == "replay":
+            self._load()
+        elif mode == "record":
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # A recording session always starts from an empty cassette
+            open(path, 'wb').close()
+
+    @classmethod
+    def from_config(cls, cassette_config: Dict[str, Any]) -> Optional["Cassette"]:
+        # An unquoted `off` in YAML loads as False
+        mode = cassette_config.get('mode') or 'off'
+        if mode == "off":
+            return None
+        return cls(
+            path=cassette_config.get('path', './cassettes/default.jsonl.gz'),
+            mode=mode,
+            latency_scale=cassette_config.get('latency_scale', 0.0)
+        )
+
+    def _load(self) -> None:
+        with gzip.open(self.path, 'rt', encoding='utf-8') as file:
+            for line in file:
+                if line.strip():
+                    interaction = json.loads(line)
+                    self._interactions.setdefault(interaction["key"], []).append(interaction)
+        logger.info(f"Loaded {sum(len(items) for items in self._interactions.values())} interactions from cassette {self.path}")
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        return hashlib.sha256("\n".join(parts).encode('utf-8')).hexdigest()
+
+    def record(self, key: str, request: Dict[str, Any], response: Dict[str, Any], elapsed: float) -> None:
+        line = json.dumps({"key": key, "request": request, "response": response, "elapsed": round(elapsed, 4)}, ensure_ascii=False)
+        with self._lock:
+            # Each append is a complete gzip member, so a crash loses at most the interaction being written
+            with gzip.open(self.path, 'at', encoding='utf-8') as file:
+                file.write(line + "\n")
+            self.stats["recorded"] += 1
+
+    def replay(self, key: str, description: str) -> Dict[str, Any]:
+        with self._lock:
+            interactions = self._interactions.get(key)
+            if not interactions:
+                self.stats["missed"] += 1
+                raise CassetteMiss(f"No recorded interaction for {description} in {self.path}")
+            # Repeated identical requests are answered in recorded order; the last answer repeats after that
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+            self.stats["replayed"] += 1
+            return interactions[min(position, len(interactions) - 1)]
+
+    def sleep(self, seconds: float) -> None:
+        if self.latency_scale > 0 and seconds > 0:
+            time.sleep(seconds * self.latency_scale)
+
+    def wrap_bedrock(self, client: Any) -> "BedrockCassetteClient":
+        return BedrockCassetteClient(client, self)
+
+
+class BedrockCassetteClient:
+    """Stands in for the bedrock-runtime client; everything but the two invoke calls is delegated."""
+
+    def __init__(self, client: Any, cassette: Cassette) -> None:
+        self._client = client
+        self.cassette = cassette
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+
+    def _key(self, operation: str, kwargs: Dict[str, Any]) -> str:
+        return self.cassette.key("bedrock", operation, kwargs.get('modelId', ''), _canonical_json(kwargs.get('body', '')))
+
+    def invoke_model(self, **kwargs: Any) -> Dict[str, Any]:
+        key = self._key("invoke_model", kwargs)
+        if self.cassette.mode == "replay":
+            interaction = self.cassette.replay(key, f"invoke_model on {kwargs.get('modelId')}")
+            self.cassette.sleep(interaction["elapsed"])
+            return {"body": io.BytesIO(_decode_body(interaction["response"]["body"]))}
+
+        start = time.perf_counter()
+        response = self._client.invoke_model(**kwargs)
+        content = response["body"].read()
+        self.cassette.record(key, {"operation": "invoke_model", "modelId": kwargs.get('modelId')}, {"body": _encode_body(content)}, time.perf_counter() - start)
+        return {**response, "body": io.BytesIO(content)}
+
+    def invoke_model_with_response_stream(self, **kwargs: Any) -> Dict[str, Any]:
+        key = self._key("invoke_model_with_response_stream", kwargs)
+        if self.cassette.mode == "replay":
+            interaction = self.cassette.replay(key, f"invoke_model_with_response_stream on {kwargs.get('modelId')}")
+            return {"body": self._replay_events(interaction["response"]["events"])}
+
+        start = time.perf_counter()
+        response = self._client.invoke_model_with_response_stream(**kwargs)
+        return {**response, "body": self._record_events(key, kwargs.get('modelId'), response["body"], start)}
+
+    def _record_events(self, key: str, model_id: Optional[str], events: Any, start: float) -> Iterator[Dict[str, Any]]:
+        recorded = []
+        for event in events:
+            offset = round(time.perf_counter() - start, 4)
+            if "chunk" in event:
+                recorded.append({"t": offset, "chunk": _encode_body(event["chunk"]["bytes"])})
+            else:
+                recorded.append({"t": offset, "event": json.loads(json.dumps(event, default=str))})
+            yield event
+        self.cassette.record(key, {"operation": "invoke_model_with_response_stream", "modelId": model_id}, {"events": recorded}, time.perf_counter() - start)
+
+    def _replay_events(self, events: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        previous = 0.0
+        for event in events:
+            self.cassette.sleep(event["t"] - previous)
+            previous = event["t"]
+            if "chunk" in event:
+                yield {"chunk": {"bytes": _decode_body(event["chunk"])}}
+            else:
+                yield event["event"]
+
+
+def http_key(cassette: Cassette, request: "requests.PreparedRequest") -> str:
+    body = request.body or b""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return cassette.key("http", request.method or "GET", redact_url(request.url), hashlib.sha256(body).hexdigest())
+
+
+def record_http(cassette: Cassette, request: "requests.PreparedRequest", response: "requests.Response", elapsed: float) -> None:
+    # Reading the body here is what the caller would do next anyway; the content stays cached on the response
+    content = response.content
+    cassette.record(
+        http_key(cassette, request),
+        {"method": request.method, "url": redact_url(request.url)},
+        {"status": response.status_code, "reason": response.reason, "headers": dict(response.headers), "body": _encode_body(content)},
+        elapsed
+    )
+
+
+def replay_http(cassette: Cassette, request: "requests.PreparedRequest") -> "requests.Response":
+    # Only the HTTP client calls this, and it has requests loaded already; the model path does not need it
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    interaction = cassette.replay(http_key(cassette, request), f"{request.method} {redact_url(request.url)}")
+    cassette.sleep(interaction["elapsed"])
+    recorded = interaction["response"]
+
+    response = requests.Response()
+    response.status_code = recorded["status"]
+    response.reason = recorded.get("reason")
+    # The stored body is already decoded, so the transfer headers no longer apply
+    response.headers = CaseInsensitiveDict({name: value for name, value in recorded["headers"].items()
+                                            if name.lower() not in ("content-encoding", "content-length", "transfer-encoding")})
+    response._content = _decode_body(recorded["body"])
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.url = request.url
+    response.request = request
+    return response
+
+
+_cassette: Optional[Cassette] = None
+_cassette_loaded = False
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Process-wide cassette from the `cassette` section of config.yml; None when mode is off."""
+    global _cassette, _cassette_loaded
+    if not _cassette_loaded:
+        with _cassette_lock:
+            if not _cassette_loaded:
+                _cassette = Cassette.from_config(config.CASSETTE)
+                _cassette_loaded = True
+                if _cassette is not None:
+                    logger.info(f"Cassette {_cassette.path} in {_cassette.mode} mode")
+    return _cassette
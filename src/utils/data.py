@@ -1,8 +1,5 @@
 import re
 import string
-from bs4 import BeautifulSoup
-import contractions
-from spellchecker import SpellChecker
 from typing import Optional, List, Dict, Callable
 # from nltk.tokenize import word_tokenize
 # from nltk.corpus import stopwords
@@ -14,6 +11,8 @@ from typing import Optional, List, Dict, Callable
 
 
 def clean_text(text: str):
+    from bs4 import BeautifulSoup
+
     text = text.lower()  # Lowercase
     text = re.sub(r'\d+', '', text)  # Remove numbers
     text = text.translate(str.maketrans('', '', string.punctuation))  # Remove punctuation
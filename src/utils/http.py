@@ -0,0 +1,193 @@
+from src.config.logging import logger
+from src.config.setup import config
+from src.utils.cassette import Cassette, get_cassette, record_http, replay_http
+from requests.adapters import HTTPAdapter
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Optional, Dict, Any, Tuple
+from urllib.parse import urlsplit
+import requests
+import threading
+import time
+import urllib3
+
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter that records per-host request counts, errors and wall time.
+
+    With a cassette attached, responses are recorded to it or, in replay mode, served from it without
+    touching the network.
+    """
+
+    def __init__(self, *args, cassette: Optional[Cassette] = None, **kwargs) -> None:
+        self.host_stats: Dict[str, Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+        self.cassette = cassette
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, *args, **kwargs):
+        if self.cassette is not None and self.cassette.mode == "replay":
+            return replay_http(self.cassette, request)
+        host = urlsplit(request.url).netloc
+        start = time.perf_counter()
+        error = False
+        try:
+            response = super().send(request, *args, **kwargs)
+            if self.cassette is not None:
+                record_http(self.cassette, request, response, time.perf_counter() - start)
+            return response
+        except Exception:
+            error = True
+            raise
+        finally:
+            with self._stats_lock:
+                stats = self.host_stats.setdefault(host, {"requests": 0, "errors": 0, "seconds": 0.0})
+                stats["requests"] += 1
+                stats["errors"] += error
+                stats["seconds"] += time.perf_counter() - start
+
+
+class HttpClient:
+    """Process-wide HTTP client shared by every web tool.
+
+    One requests.Session over a pooled adapter: connections are kept alive per host, responses are
+    transparently decompressed (gzip/deflate, plus brotli/zstd with the `http-compression` extra)
+    and every call gets default connect/read timeouts.
+    """
+
+    def __init__(self, pool_connections: int = 20, pool_maxsize: int = 10, connect_timeout: float = 5, read_timeout: float = 15, user_agent: Optional[str] = None, cassette: Optional[Cassette] = None) -> None:
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+        # pool_connections is the number of per-host pools kept, pool_maxsize the keep-alive connections per host
+        self.adapter = PooledAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0, cassette=cassette)
+        self.session = requests.Session()
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+        self.session.headers.update({
+            'Accept-Encoding': urllib3.util.make_headers(accept_encoding=True)['accept-encoding'],
+            'Connection': 'keep-alive',
+        })
+        if user_agent:
+            self.session.headers['User-Agent'] = user_agent
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def share_pool(self, session: requests.Session) -> None:
+        """Route another library's session (e.g. wikipediaapi) through the shared connection pools."""
+        session.mount("http://", self.adapter)
+        session.mount("https://", self.adapter)
+
+    def stats(self) -> Dict[str, Any]:
+        pools = {}
+        pool_manager = self.adapter.poolmanager
+        for key in list(pool_manager.pools.keys()):
+            pool = pool_manager.pools.get(key)
+            if pool is None:
+                continue
+            pools[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+            }
+        with self.adapter._stats_lock:
+            hosts = {host: dict(stats) for host, stats in self.adapter.host_stats.items()}
+        return {"pools": pools, "hosts": hosts}
+
+    def close(self) -> None:
+        logger.info(f"Closing HTTP client with stats {self.stats()}")
+        self.session.close()
+
+
+class FetchLimiter:
+    """Runs page fetches on one bounded pool, at most `max_per_host` at a time for any host.
+
+    A fetch whose host is busy waits in a per-host queue and only gets a worker once a slot frees up,
+    so requests piling up on one slow site never hold workers the other sites could use.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_per_host: int = 2, thread_name_prefix: str = "fetch") -> None:
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix=thread_name_prefix)
+        self._active: Dict[str, int] = {}
+        self._waiting: Dict[str, Deque[Tuple[Callable[[str], Any], str, Future]]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fetch: Callable[[str], Any], url: str) -> Future:
+        """Future of `fetch(url)`, started as soon as the url's host has a free slot."""
+        host = urlsplit(url).netloc
+        future: Future = Future()
+        with self._lock:
+            if self._active.get(host, 0) >= self.max_per_host:
+                self._waiting.setdefault(host, deque()).append((fetch, url, future))
+                return future
+            self._active[host] = self._active.get(host, 0) + 1
+        self._start(host, fetch, url, future)
+        return future
+
+    def _start(self, host: str, fetch: Callable[[str], Any], url: str, future: Future) -> None:
+        def run() -> None:
+            try:
+                if future.set_running_or_notify_cancel():
+                    future.set_result(fetch(url))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                self._release(host)
+        try:
+            # Fetches the executor drops on shutdown never run; their callers must not wait forever
+            self._executor.submit(run).add_done_callback(lambda submitted: submitted.cancelled() and future.cancel())
+        except RuntimeError as e:
+            # Shut down meanwhile
+            future.set_exception(e)
+            self._release(host)
+
+    def _release(self, host: str) -> None:
+        with self._lock:
+            waiting = self._waiting.get(host)
+            if not waiting:
+                self._active[host] -= 1
+                if not self._active[host]:
+                    del self._active[host]
+                return
+            # The slot passes straight to the next fetch for the same host
+            task = waiting.popleft()
+            if not waiting:
+                del self._waiting[host]
+        self._start(host, *task)
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"active": sum(self._active.values()), "waiting": sum(len(queue) for queue in self._waiting.values())}
+
+    def close(self) -> None:
+        with self._lock:
+            waiting = [task for queue in self._waiting.values() for task in queue]
+            self._waiting.clear()
+        for _, _, future in waiting:
+            future.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_http_client: Optional[HttpClient] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Return the shared client, creating it from the `http` section of config.yml on first use."""
+    global _http_client
+    if _http_client is None:
+        with _http_client_lock:
+            if _http_client is None:
+                http_config = config.HTTP
+                _http_client = HttpClient(
+                    pool_connections=http_config.get('pool_connections', 20),
+                    pool_maxsize=http_config.get('pool_maxsize', 10),
+                    connect_timeout=http_config.get('connect_timeout', 5),
+                    read_timeout=http_config.get('read_timeout', 15),
+                    cassette=get_cassette()
+                )
+    return _http_client
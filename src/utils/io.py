@@ -1,9 +1,14 @@
 from src.config.logging import logger
+from src.config.setup import config
 from typing import Optional
 from typing import Dict 
 from typing import Any 
+from typing import List
+import atexit
 import json 
-import yaml
+import os
+import queue
+import threading
 
 
 def read_file(path: str) -> Optional[str]:
@@ -20,6 +25,8 @@ def read_file(path: str) -> Optional[str]:
 
 
 def load_yaml(filename: str) -> Dict[str, Any]:
+    import yaml
+
     try:
         with open(filename, 'r') as file:
             return yaml.safe_load(file)
@@ -59,4 +66,149 @@ def write_to_file(path: str, content: str) -> None:
         raise
     except Exception as e:
         logger.error(f"Error writing to file '{path}': {e}")
-        raise
\ No newline at end of file
+        raise
+
+class BufferedWriter:
+    """Appends text to files from one background thread, in batches.
+
+    `write` only enqueues, so callers (agent iterations, span export, request threads) never touch the
+    disk. The writer thread drains the queue every `flush_interval` seconds or once `batch_size` records
+    are waiting, and opens each target file once per batch. The queue is bounded: when the disk falls
+    behind, new records are dropped and counted rather than blocking the caller. Files larger than
+    `max_bytes` are rotated to `<path>.1` ... `<path>.<backups>`.
+    """
+
+    def __init__(self, max_queue: int = 10000, batch_size: int = 256, flush_interval: float = 1.0, max_bytes: int = 50 * 1024 * 1024, backups: int = 3, autostart: bool = True) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.stats = {"written": 0, "dropped": 0, "batches": 0, "rotations": 0, "errors": 0}
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._sizes: Dict[str, int] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        if autostart:
+            self.start()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="buffered-writer", daemon=True)
+            self._thread.start()
+
+    def write(self, path: str, content: str) -> bool:
+        """Queue `content` for `path`; returns False when it had to be dropped."""
+        if self._closed:
+            return False
+        try:
+            self._queue.put_nowait((path, content))
+            return True
+        except queue.Full:
+            self.stats["dropped"] += 1
+            return False
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Block until everything queued so far is on disk."""
+        if self._thread is None:
+            return False
+        done = threading.Event()
+        # Control records are never dropped, even on a full queue
+        self._queue.put((None, done))
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        if self._closed or self._thread is None:
+            self._closed = True
+            return
+        self._closed = True
+        self._queue.put((None, None))
+        self._thread.join(timeout)
+        if self.stats["dropped"]:
+            logger.warning(f"Buffered writer dropped {self.stats['dropped']} records")
+
+    def _run(self) -> None:
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            pending: Dict[str, List[str]] = {}
+            stop = False
+            for path, content in batch:
+                if path is not None:
+                    pending.setdefault(path, []).append(content)
+                    continue
+                # Flush and stop markers: write what came before them first
+                self._write_batch(pending)
+                pending = {}
+                if content is None:
+                    stop = True
+                else:
+                    content.set()
+            self._write_batch(pending)
+            if stop:
+                return
+
+    def _write_batch(self, pending: Dict[str, List[str]]) -> None:
+        for path, contents in pending.items():
+            data = ''.join(contents)
+            try:
+                self._rotate_if_needed(path, len(data))
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(path, 'a', encoding='utf-8') as file:
+                    file.write(data)
+                    self._sizes[path] = file.tell()
+                self.stats["written"] += len(contents)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Error writing to file '{path}': {e}")
+        if pending:
+            self.stats["batches"] += 1
+
+    def _rotate_if_needed(self, path: str, incoming: int) -> None:
+        if not self.max_bytes:
+            return
+        if path not in self._sizes:
+            self._sizes[path] = os.path.getsize(path) if os.path.exists(path) else 0
+        if self._sizes[path] == 0 or self._sizes[path] + incoming <= self.max_bytes:
+            return
+        for index in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{path}.{index}"):
+                os.replace(f"{path}.{index}", f"{path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.remove(path)
+        self._sizes[path] = 0
+        self.stats["rotations"] += 1
+
+
+_trace_writer: Optional[BufferedWriter] = None
+_trace_writer_lock = threading.Lock()
+
+
+def get_trace_writer() -> BufferedWriter:
+    """Process-wide writer for trace output, configured from the `trace_output` section of config.yml."""
+    global _trace_writer
+    if _trace_writer is None:
+        with _trace_writer_lock:
+            if _trace_writer is None:
+                writer_config = config.TRACE_OUTPUT
+                _trace_writer = BufferedWriter(
+                    max_queue=writer_config.get('max_queue', 10000),
+                    batch_size=writer_config.get('batch_size', 256),
+                    flush_interval=writer_config.get('flush_interval', 1.0),
+                    max_bytes=int(writer_config.get('max_mb', 50) * 1024 * 1024),
+                    backups=writer_config.get('backups', 3)
+                )
+                # Whatever is still queued at interpreter exit is written out
+                atexit.register(_trace_writer.close)
+    return _trace_writer
@@ -0,0 +1,251 @@
+from src.config.logging import logger
+from src.config.setup import config
+from src.utils.io import BufferedWriter, get_trace_writer
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+import json
+import math
+import secrets
+import threading
+import time
+
+
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+# Numeric span attributes that also get a histogram of their own
+MEASURED_ATTRIBUTES = ("input_tokens", "output_tokens", "cache_read_input_tokens", "result_chars", "queued_seconds", "backoff_seconds")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+class Span:
+    """One timed unit of work; ended spans are exported and fed to the histograms."""
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "events", "error", "_tracer")
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"], attributes: Dict[str, Any]) -> None:
+        self._tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.events: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+
+    @property
+    def seconds(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        self.events.append({"timeUnixNano": str(time.time_ns()), "name": name, "attributes": _otlp_attributes(attributes)})
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self._tracer._finish(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.events:
+            span["events"] = self.events
+        return span
+
+
+class Histogram:
+    """Log-bucketed histogram (about 5% relative error) with constant memory, for p50/p95/p99."""
+    growth = 1.1
+    smallest = 1e-6
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = math.ceil(math.log(max(value, self.smallest) / self.smallest, self.growth))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # Upper bound of the bucket, capped by the largest value actually seen
+                return min(self.smallest * self.growth ** index, self.max)
+        return self.max
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+
+class Metrics:
+    """In-process histograms and counters, keyed by name, safe to update from any thread."""
+
+    def __init__(self) -> None:
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "histograms": {name: histogram.snapshot() for name, histogram in sorted(self.histograms.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+
+class JsonlSpanSink:
+    """Appends one OTLP-shaped span per line through the buffered background writer."""
+
+    def __init__(self, path: str, writer: Optional[BufferedWriter] = None) -> None:
+        self.path = path
+        self.writer = writer or get_trace_writer()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self.writer.write(self.path, json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        self.writer.flush()
+
+
+class Tracer:
+    """Creates spans, tracks the current one across awaits and threads (contextvars), and records every
+    ended span into `metrics` and the optional export sink.
+
+    Histograms are named `<span name>.seconds`, with a `<span name>[<tool or tier>]` variant for tool and
+    model-call spans, plus one per measured numeric attribute (token counts, result sizes).
+    """
+
+    def __init__(self, sink: Optional[JsonlSpanSink] = None) -> None:
+        self.sink = sink
+        self.metrics = Metrics()
+
+    @classmethod
+    def from_config(cls, tracing_config: Dict[str, Any]) -> "Tracer":
+        path = tracing_config.get('export_path')
+        return cls(sink=JsonlSpanSink(path) if path else None)
+
+    def current(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def start_span(self, name: str, parent: Optional[Span] = None, **attributes: Any) -> Span:
+        """Start a span without making it current; pass it to `activate` or end it explicitly."""
+        return Span(self, name, parent if parent is not None else _current_span.get(), attributes)
+
+    @contextmanager
+    def activate(self, span: Optional[Span]) -> Iterator[Optional[Span]]:
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    @contextmanager
+    def span(self, name: str, **attributes: Any) -> Iterator[Span]:
+        span = self.start_span(name, **attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def _finish(self, span: Span) -> None:
+        seconds = span.seconds
+        self.metrics.observe(f"{span.name}.seconds", seconds)
+        # Per tool for tool calls, per model tier for LLM calls
+        label = span.attributes.get('tool') or span.attributes.get('tier')
+        if label:
+            self.metrics.observe(f"{span.name}[{label}].seconds", seconds)
+        for attribute in MEASURED_ATTRIBUTES:
+            value = span.attributes.get(attribute)
+            if isinstance(value, (int, float)):
+                self.metrics.observe(f"{span.name}.{attribute}", value)
+        if span.attributes.get('cache_hit'):
+            self.metrics.count(f"{span.name}.cache_hits")
+        if span.error:
+            self.metrics.count(f"{span.name}.errors")
+
+        if self.sink is not None:
+            try:
+                self.sink.write(span.to_otlp())
+            except Exception as e:
+                logger.error(f"Could not export span {span.name}: {e}")
+
+    def close(self) -> None:
+        if self.sink is not None:
+            self.sink.close()
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer, configured from the `tracing` section of config.yml on first use."""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer.from_config(config.TRACING)
+    return _tracer
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
@@ -0,0 +1,135 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.agent.agent import AsyncAgent, install_executor
+from src.config.setup import config
+from src.llm.request import RequestBuilder
+from src.types.models import SearchResult
+
+
+def test_executor_is_sized_for_concurrent_queries(monkeypatch):
+    monkeypatch.setattr(config, "EXECUTOR_THREADS", 0)
+    monkeypatch.setattr(config, "MAX_PARALLEL_TOOLS", 3)
+
+    async def blocking_calls(count):
+        executor = install_executor(asyncio.get_running_loop(), concurrent_queries=4)
+        assert executor._max_workers == 16
+        start = time.perf_counter()
+        await asyncio.gather(*(asyncio.to_thread(time.sleep, 0.1) for _ in range(count)))
+        return time.perf_counter() - start
+
+    # 16 blocking calls overlap instead of queueing behind min(32, cpus + 4) threads
+    assert asyncio.run(blocking_calls(16)) < 0.5
+
+
+class TwoToolModel:
+    """Asks for two tool calls in one turn, then answers; every call takes `delay` seconds on the loop."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = 0
+
+    def request_builder(self):
+        return RequestBuilder({"max_tokens": 100, "top_k": 1, "top_p": 1.0})
+
+    async def agenerate(self, messages, tool_list, system_prompt=None, request_builder=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.calls == 1:
+            return {"stop_reason": "tool_use", "content": [
+                {"type": "tool_use", "id": "a", "name": "slow", "input": {"query": "first"}},
+                {"type": "tool_use", "id": "b", "name": "slow", "input": {"query": "second"}},
+            ]}
+        return {"stop_reason": "end_turn", "content": [{"type": "text", "text": "done"}]}
+
+
+def slow_lookup(query):
+    time.sleep(0.2)
+    return [SearchResult(title=query, query=query, summary=f"about {query}")]
+
+
+def failing_lookup(query):
+    raise RuntimeError(f"backend down for {query}")
+
+
+@pytest.fixture
+def make_agent(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "OUTPUT_TRACE_PATH", str(tmp_path / "trace.txt"))
+
+    def make(model):
+        agent = AsyncAgent(model=model)
+        agent.stream = False
+        agent.print_message = lambda message: None
+        agent.summarizer.compact_after_tokens = 0
+        agent.register("slow", slow_lookup)
+        agent.register("fail", failing_lookup)
+        return agent
+    return make
+
+
+def test_tool_calls_overlap_and_keep_their_order(make_agent):
+    agent = make_agent(TwoToolModel())
+    blocks = [
+        {"type": "tool_use", "id": "t1", "name": "slow", "input": {"query": "one"}},
+        {"type": "tool_use", "id": "t2", "name": "fail", "input": {"query": "two"}},
+        {"type": "tool_use", "id": "t3", "name": "slow", "input": {"query": "three"}},
+    ]
+
+    async def act():
+        install_executor(asyncio.get_running_loop(), concurrent_queries=1)
+        start = time.perf_counter()
+        results = await agent.act_all(blocks)
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(act())
+    assert [result.tool_use_id for result in results] == ["t1", "t2", "t3"]
+    assert "one" in results[0].content and "three" in results[2].content
+    assert not results[0].is_error and not results[2].is_error
+    assert results[1].is_error and "backend down for two" in results[1].content
+    # Two 0.2 s lookups run side by side, not one after the other
+    assert elapsed < 0.35
+
+
+def test_tool_results_answer_the_turn_in_one_message(make_agent):
+    agent = make_agent(TwoToolModel())
+    answer = asyncio.run(agent.execute("question"))
+    assert answer.content[0].text == "done"
+    roles = [message.role for message in agent.messages]
+    assert roles == ["user", "assistant", "user", "assistant"]
+    results = agent.messages[2].content
+    assert [block.type for block in results] == ["tool_result", "tool_result"]
+    assert [block.tool_use_id for block in results] == ["a", "b"]
+
+
+def test_agents_share_one_loop_concurrently(make_agent):
+    agents = [make_agent(TwoToolModel(delay=0.1)) for _ in range(4)]
+
+    async def run_all():
+        install_executor(asyncio.get_running_loop(), concurrent_queries=len(agents))
+        start = time.perf_counter()
+        answers = await asyncio.gather(*(agent.execute(f"question {i}") for i, agent in enumerate(agents)))
+        return answers, time.perf_counter() - start
+
+    answers, elapsed = asyncio.run(run_all())
+    assert all(answer.content[0].text == "done" for answer in answers)
+    # Each query is two 0.1 s model calls and a 0.2 s tool round; serially four would take 1.6 s
+    assert elapsed < 0.9
+
+
+def test_coroutine_tools_run_on_the_loop(make_agent):
+    agent = make_agent(TwoToolModel())
+    threads = []
+
+    async def native_lookup(query):
+        threads.append(threading.current_thread())
+        await asyncio.sleep(0.2)
+        return [SearchResult(title=query, query=query, summary=f"about {query}")]
+
+    agent.register("slow", native_lookup)
+    answer = asyncio.run(agent.execute("question"))
+    assert answer.content[0].text == "done"
+    # Awaited directly instead of holding an executor thread
+    assert threads == [threading.main_thread()] * 2
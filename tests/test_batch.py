@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+import pytest
+
+from src.batch.runner import BatchRunner, load_checkpoint, load_queries
+from src.config.setup import config
+from src.llm.request import RequestBuilder
+
+
+class FakeModel:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.seen = []
+        self.running = 0
+        self.max_running = 0
+
+    def request_builder(self):
+        return RequestBuilder({"max_tokens": 100, "top_k": 1, "top_p": 1.0})
+
+    async def agenerate(self, messages, tool_list, system_prompt=None, request_builder=None):
+        query = messages[0].content
+        self.seen.append(query)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        if query in self.fail:
+            raise RuntimeError("throttled")
+        return {"stop_reason": "end_turn", "content": [{"type": "text", "text": f"answer to {query}"}], "usage": {"input_tokens": 3, "output_tokens": 1}}
+
+
+class NoTools:
+    def register(self, agent):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def trace_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "OUTPUT_TRACE_PATH", str(tmp_path / "trace.txt"))
+
+
+def write_queries(path, count):
+    path.write_text("".join(json.dumps({"id": f"q{i}", "query": f"question {i}"}) + "\n" for i in range(count)))
+    return load_queries(str(path))
+
+
+def test_runs_queries_concurrently_and_records_usage(tmp_path):
+    queries = write_queries(tmp_path / "in.jsonl", 6)
+    model = FakeModel()
+    summary = asyncio.run(BatchRunner(model, NoTools(), workers=3).run(queries, str(tmp_path / "out.jsonl")))
+
+    assert summary["ok"] == 6 and summary["usage"]["input_tokens"] == 18
+    assert model.max_running == 3
+    records = [json.loads(line) for line in (tmp_path / "out.jsonl").read_text().splitlines()]
+    assert {record["id"] for record in records} == {f"q{i}" for i in range(6)}
+    assert records[0]["answer"].startswith("answer to") and records[0]["seconds"] >= 0
+
+
+def test_resume_skips_finished_and_retries_failed(tmp_path):
+    queries = write_queries(tmp_path / "in.jsonl", 4)
+    output = tmp_path / "out.jsonl"
+    first = asyncio.run(BatchRunner(FakeModel(fail={"question 2"}), NoTools(), workers=2).run(queries, str(output)))
+    assert first["ok"] == 3 and first["error"] == 1
+    assert load_checkpoint(str(output)) == {"q0", "q1", "q3"}
+
+    # Simulate a crash in the middle of writing a record, inside a multibyte character
+    with open(output, "ab") as file:
+        file.write('{"id": "q9", "answer": "café'.encode("utf-8")[:-1])
+
+    model = FakeModel()
+    second = asyncio.run(BatchRunner(model, NoTools(), workers=2).run(queries, str(output)))
+    assert model.seen == ["question 2"]
+    assert second["skipped"] == 3 and second["ok"] == 1
+    assert load_checkpoint(str(output)) == {"q0", "q1", "q2", "q3"}
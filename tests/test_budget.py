@@ -0,0 +1,72 @@
+from src.agent.budget import TokenBudget
+from src.types.models import Message, ContentBlock, APIToolSchema
+
+
+tools = [APIToolSchema(name="google_search", description="Search Google")]
+
+
+def tool_round(i, size):
+    return [
+        Message(role="assistant", content=[ContentBlock(type="tool_use", id=f"t{i}", name="google_search", input={"query": str(i)})]),
+        Message(role="user", content=[ContentBlock(type="tool_result", tool_use_id=f"t{i}", content="x" * size)]),
+    ]
+
+
+def test_estimates_are_cached_per_message_and_follow_content_changes():
+    budget = TokenBudget(max_input_tokens=10000, chars_per_token=4)
+    message = Message(role="user", content="a" * 400)
+    assert budget.message_tokens(message) == 104
+    assert budget.message_tokens(message) == 104
+
+    message.content = "a" * 40
+    assert budget.message_tokens(message) == 14
+
+    estimate = budget.estimate([message], tools, "s" * 40)
+    assert estimate["system"] == 10 and estimate["messages"] == 14
+    assert estimate["total"] == estimate["system"] + estimate["tools"] + estimate["messages"]
+
+
+def test_fit_leaves_small_requests_alone():
+    budget = TokenBudget(max_input_tokens=10000)
+    messages = [Message(role="user", content="question")] + tool_round(1, 100)
+    budget.fit(messages, tools, "system")
+    assert len(messages) == 3
+    assert budget.last_estimate["total"] < 10000
+
+
+def test_fit_truncates_tool_results_before_dropping_turns():
+    budget = TokenBudget(max_input_tokens=3000, max_tool_result_tokens=500, chars_per_token=4)
+    messages = [Message(role="user", content="question")] + tool_round(1, 20000)
+    original_content = messages[-1].content
+
+    estimate = budget.fit(messages, tools, "system")
+    assert len(messages) == 3
+    assert estimate["total"] <= 3000
+    assert messages[-1].content is not original_content
+    assert messages[-1].content[0].content.endswith("characters]")
+
+
+def test_fit_drops_oldest_turns_without_orphaning_tool_results():
+    budget = TokenBudget(max_input_tokens=1500, max_tool_result_tokens=1000, chars_per_token=4)
+    messages = [Message(role="user", content="first question")] + tool_round(1, 3000) + tool_round(2, 3000)
+    messages += [Message(role="assistant", content="answer"), Message(role="user", content="second question")] + tool_round(3, 3000)
+
+    estimate = budget.fit(messages, tools, "system")
+    assert estimate["total"] <= 1500
+    assert messages[0].role == "user" and messages[0].content == "second question"
+    assert len(messages) == 3
+
+
+def test_fit_keeps_the_current_turn_and_shrinks_its_tool_results():
+    budget = TokenBudget(max_input_tokens=1500, max_tool_result_tokens=1000, chars_per_token=4)
+    messages = [Message(role="user", content="question")]
+    for i in range(4):
+        messages += tool_round(i, 5000)
+
+    estimate = budget.fit(messages, tools, "system")
+    assert estimate["total"] <= 1500
+    assert len(messages) == 9 and messages[0].content == "question"
+    tool_uses = [block.id for message in messages[1::2] for block in message.content]
+    tool_results = [block.tool_use_id for message in messages[2::2] for block in message.content]
+    assert tool_uses == tool_results == ["t0", "t1", "t2", "t3"]
+    assert all(block.content.endswith("characters]") for message in messages[2::2] for block in message.content)
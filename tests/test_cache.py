@@ -0,0 +1,75 @@
+import time
+from src.tools.cache import ResultCache
+from src.tools.tool import Tool
+from src.types.models import SearchResult
+
+
+def results(query):
+    return [SearchResult(title=query, query=query, summary=f"about {query}")]
+
+
+def test_queries_are_normalized_and_params_are_part_of_the_key():
+    cache = ResultCache()
+    cache.set("google_search", "Neil  Perry ", results("Neil Perry"), {"num_results": 10})
+
+    assert cache.get("google_search", "neil perry", {"num_results": 10})[0].title == "Neil Perry"
+    assert cache.get("google_search", "neil perry", {"num_results": 5}) is None
+    assert cache.get("wikipedia_search", "neil perry", {"num_results": 10}) is None
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 2
+
+
+def test_per_tool_ttl_and_lru_eviction():
+    cache = ResultCache(memory_entries=2, ttl={"google_search": 0.05})
+    cache.set("google_search", "a", results("a"))
+    cache.set("wikipedia_search", "b", results("b"))
+    time.sleep(0.06)
+    assert cache.get("google_search", "a") is None
+    assert cache.get("wikipedia_search", "b") is not None
+
+    cache.set("wikipedia_search", "c", results("c"))
+    cache.set("wikipedia_search", "d", results("d"))
+    assert cache.get("wikipedia_search", "b") is None
+    assert cache.stats["evictions"] >= 1
+
+
+def test_disk_tier_survives_a_new_process_and_respects_size(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = ResultCache(path=path)
+    cache.set("wikipedia_search", "Paris", results("Paris"), {"language": "en"})
+    cache.close()
+
+    reopened = ResultCache(path=path)
+    assert reopened.get("wikipedia_search", "Paris ", {"language": "en"})[0].summary == "about Paris"
+    assert reopened.stats["disk_hits"] == 1
+
+    small = ResultCache(path=str(tmp_path / "small.sqlite"), memory_entries=1, disk_max_bytes=200)
+    for query in ["a", "b", "c", "d"]:
+        small.set("google_search", query, results(query))
+    assert small.get("google_search", "a") is None
+    assert small.get("google_search", "d") is not None
+
+
+def test_tool_opt_in_skips_the_function_on_hit_and_does_not_cache_failures():
+    calls = []
+
+    def search(query):
+        calls.append(query)
+        return results(query) if query != "missing" else [SearchResult(title="No information found", query=query)]
+
+    tool = Tool("wikipedia_search", search, cache=ResultCache(), cache_params={"language": "en"})
+    tool.use("Paris")
+    tool.use(" Paris")
+    tool.use("missing")
+    tool.use("missing")
+    assert calls == ["Paris", "missing", "missing"]
+
+
+def test_only_search_queries_ignore_case():
+    cache = ResultCache()
+    cache.set("wikipedia_search", "AIDS", results("AIDS"), {"language": "en"})
+    cache.set("google_search", "AIDS", results("AIDS"))
+
+    # Different Wikipedia pages
+    assert cache.get("wikipedia_search", "Aids", {"language": "en"}) is None
+    assert cache.get("wikipedia_search", "AIDS", {"language": "en"}) is not None
+    assert cache.get("google_search", "aids") is not None
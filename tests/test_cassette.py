@@ -0,0 +1,96 @@
+import gzip
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.utils.cassette import Cassette, CassetteMiss
+from src.utils.http import HttpClient
+
+
+class FakeBedrock:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke_model(self, modelId, body):
+        self.calls += 1
+        return {"body": io.BytesIO(json.dumps({"content": [{"type": "text", "text": f"call {self.calls}"}]}).encode())}
+
+    def invoke_model_with_response_stream(self, modelId, body):
+        self.calls += 1
+
+        def events():
+            for text in ["Hel", "lo"]:
+                time.sleep(0.02)
+                yield {"chunk": {"bytes": json.dumps({"type": "content_block_delta", "delta": {"text": text}}).encode()}}
+        return {"body": events()}
+
+
+def test_bedrock_record_then_replay(tmp_path):
+    path = str(tmp_path / "bedrock.jsonl.gz")
+    recorder = Cassette(path, mode="record").wrap_bedrock(FakeBedrock())
+    body = json.dumps({"messages": [{"role": "user", "content": "hi"}], "max_tokens": 10})
+    first = recorder.invoke_model(modelId="m", body=body)["body"].read()
+    second = recorder.invoke_model(modelId="m", body=body)["body"].read()
+    streamed = [event["chunk"]["bytes"] for event in recorder.invoke_model_with_response_stream(modelId="m", body=body)["body"]]
+
+    replayer = Cassette(path, mode="replay").wrap_bedrock(None)
+    # Key order in the body does not matter, repeated requests come back in recorded order
+    reordered = json.dumps({"max_tokens": 10, "messages": [{"role": "user", "content": "hi"}]})
+    assert replayer.invoke_model(modelId="m", body=reordered)["body"].read() == first
+    assert replayer.invoke_model(modelId="m", body=body)["body"].read() == second
+    assert [event["chunk"]["bytes"] for event in replayer.invoke_model_with_response_stream(modelId="m", body=body)["body"]] == streamed
+    with pytest.raises(CassetteMiss):
+        replayer.invoke_model(modelId="m", body="{}")
+
+
+def test_replay_injects_recorded_latency(tmp_path):
+    path = str(tmp_path / "bedrock.jsonl.gz")
+    recorder = Cassette(path, mode="record").wrap_bedrock(FakeBedrock())
+    list(recorder.invoke_model_with_response_stream(modelId="m", body="{}")["body"])
+
+    start = time.perf_counter()
+    list(Cassette(path, mode="replay").wrap_bedrock(None).invoke_model_with_response_stream(modelId="m", body="{}")["body"])
+    assert time.perf_counter() - start < 0.02
+
+    start = time.perf_counter()
+    list(Cassette(path, mode="replay", latency_scale=1.0).wrap_bedrock(None).invoke_model_with_response_stream(modelId="m", body="{}")["body"])
+    assert time.perf_counter() - start >= 0.035
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = f"<html><title>{self.path}</title></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_http_record_then_replay_without_network(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/page"
+    path = str(tmp_path / "http.jsonl.gz")
+
+    recording = HttpClient(cassette=Cassette(path, mode="record"))
+    recorded = recording.get(url, params={"q": "eiffel", "key": "secret"})
+    assert recorded.text == "<html><title>/page?q=eiffel&key=secret</title></html>"
+    server.shutdown()
+    server.server_close()
+
+    cassette = Cassette(path, mode="replay")
+    with gzip.open(path, "rt") as file:
+        assert "secret" not in json.loads(file.readline())["request"]["url"]
+    # A different API key still matches the recording
+    replayed = HttpClient(cassette=cassette).get(url, params={"key": "other", "q": "eiffel"})
+    assert replayed.status_code == 200 and replayed.text == recorded.text
+    assert replayed.headers["Content-Type"].startswith("text/html")
+    assert cassette.stats["replayed"] == 1
@@ -0,0 +1,50 @@
+import os
+import pytest
+from src.tools.extract import get_extractor, SoupExtractor
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "fixtures")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as file:
+        return file.read()
+
+
+def test_lxml_keeps_main_content_and_drops_boilerplate():
+    pytest.importorskip("lxml")
+    page = get_extractor("lxml").extract(read_fixture("news_article.html"))
+
+    assert page.title.startswith("Council approves plan")
+    assert "The city council voted on Tuesday evening" in page.text
+    assert "taxpayers end up covering the difference" in page.text
+    for boilerplate in ["We use cookies", "Popular story number", "Reader comment", "All rights reserved", "dataLayer"]:
+        assert boilerplate not in page.text
+
+
+def test_lxml_falls_back_to_body_text_for_short_pages():
+    pytest.importorskip("lxml")
+    page = get_extractor("lxml").extract("<html><head><title> Hi </title><script>x()</script></head><body><div>Short page</div></body></html>")
+    assert page.title == "Hi"
+    assert page.text == "Short page"
+
+
+def test_lxml_keeps_pages_wrapped_in_a_form():
+    pytest.importorskip("lxml")
+    paragraphs = "".join(f"<p>Paragraph {n} of the permit guidance, with details, dates and fees for applicants.</p>" for n in range(6))
+    html = ("<html><head><title>Permits</title></head><body><form id='aspnetForm' action='/permits.aspx'>"
+            "<input type='hidden' name='__VIEWSTATE' value='abc'/><nav>Home | Services</nav>"
+            f"<div id='content'><article><header><h1>Building permits</h1><p>By the planning office</p></header>{paragraphs}</article></div>"
+            "<footer>Contact us</footer><button>Search</button></form></body></html>")
+    page = get_extractor("lxml").extract(html)
+
+    assert "Paragraph 5 of the permit guidance" in page.text
+    assert "Building permits" in page.text and "By the planning office" in page.text
+    for boilerplate in ["Home | Services", "Contact us", "Search"]:
+        assert boilerplate not in page.text
+
+
+def test_default_and_unknown_extractors():
+    assert isinstance(get_extractor(), SoupExtractor)
+    with pytest.raises(ValueError):
+        get_extractor("regex")
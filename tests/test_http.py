@@ -0,0 +1,39 @@
+import threading
+
+from src.utils.http import FetchLimiter
+
+
+def test_busy_host_does_not_starve_other_hosts():
+    release = threading.Event()
+    limiter = FetchLimiter(max_concurrency=2, max_per_host=1)
+
+    def fetch(url):
+        if "slow.com" in url:
+            release.wait(2)
+        return url
+
+    slow = [limiter.submit(fetch, f"https://slow.com/{i}") for i in range(3)]
+    # Two slow.com fetches wait for the host slot without holding the second worker
+    assert limiter.snapshot() == {"active": 1, "waiting": 2}
+    assert limiter.submit(fetch, "https://fast.com/").result(timeout=1) == "https://fast.com/"
+
+    release.set()
+    assert [future.result(timeout=2) for future in slow] == [f"https://slow.com/{i}" for i in range(3)]
+    assert limiter.snapshot() == {"active": 0, "waiting": 0}
+    limiter.close()
+
+
+def test_fetch_errors_reach_the_caller_and_free_the_slot():
+    limiter = FetchLimiter(max_concurrency=1, max_per_host=1)
+
+    def fail(url):
+        raise ValueError(url)
+
+    future = limiter.submit(fail, "https://a.com/1")
+    try:
+        future.result(timeout=1)
+        assert False, "expected the fetch error"
+    except ValueError:
+        pass
+    assert limiter.submit(lambda url: "ok", "https://a.com/2").result(timeout=1) == "ok"
+    limiter.close()
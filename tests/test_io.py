@@ -0,0 +1,52 @@
+import threading
+
+from src.utils.io import BufferedWriter
+
+
+def test_writes_are_batched_per_file_and_flushed(tmp_path):
+    writer = BufferedWriter(batch_size=100, flush_interval=0.05)
+    paths = [tmp_path / "a.txt", tmp_path / "sessions" / "b.txt"]
+
+    def produce(index):
+        for line in range(50):
+            writer.write(str(paths[index % 2]), f"{index}:{line}\n")
+
+    threads = [threading.Thread(target=produce, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert writer.flush()
+
+    lines = paths[0].read_text().splitlines()
+    assert len(lines) == 100 and set(line.split(":")[0] for line in lines) == {"0", "2"}
+    assert len(paths[1].read_text().splitlines()) == 100
+    assert writer.stats["written"] == 200 and writer.stats["batches"] < 200
+    writer.close()
+
+
+def test_full_queue_drops_and_counts(tmp_path):
+    writer = BufferedWriter(max_queue=3, autostart=False)
+    path = str(tmp_path / "trace.txt")
+    results = [writer.write(path, f"{i}\n") for i in range(5)]
+    assert results == [True, True, True, False, False]
+    assert writer.stats["dropped"] == 2
+
+    writer.start()
+    writer.close()
+    assert (tmp_path / "trace.txt").read_text() == "0\n1\n2\n"
+    assert writer.write(path, "late\n") is False
+
+
+def test_rotation_keeps_bounded_backups(tmp_path):
+    writer = BufferedWriter(max_bytes=100, backups=2)
+    path = tmp_path / "trace.txt"
+    for i in range(6):
+        writer.write(str(path), f"{i}" * 60 + "\n")
+        writer.flush()
+    writer.close()
+
+    assert path.read_text() == "5" * 60 + "\n"
+    assert (tmp_path / "trace.txt.1").read_text() == "4" * 60 + "\n"
+    assert (tmp_path / "trace.txt.2").exists() and not (tmp_path / "trace.txt.3").exists()
+    assert writer.stats["rotations"] == 5
@@ -0,0 +1,126 @@
+import asyncio
+
+from src.agent.agent import AsyncAgent
+from src.agent.memory import RollingSummarizer, render_messages
+from src.config.setup import config
+from src.llm.request import RequestBuilder
+from src.types.models import Message, ContentBlock, SearchResult
+
+
+class FakeModel:
+    def __init__(self):
+        self.prompts = []
+        self.release = asyncio.Event()
+        self.release.set()
+
+    def request_builder(self):
+        return RequestBuilder({"max_tokens": 100, "top_k": 1, "top_p": 1.0})
+
+    async def agenerate(self, messages, tool_list, system_prompt=None, request_builder=None):
+        self.prompts.append(messages[-1].content)
+        await self.release.wait()
+        return {"stop_reason": "end_turn", "content": [{"type": "text", "text": f"summary {len(self.prompts)}"}]}
+
+
+def turn(i):
+    return [
+        Message(role="user", content=f"question {i}"),
+        Message(role="assistant", content=[ContentBlock(type="tool_use", id=f"t{i}", name="google_search", input={"query": str(i)})]),
+        Message(role="user", content=[ContentBlock(type="tool_result", tool_use_id=f"t{i}", content=f"result {i}")]),
+        Message(role="assistant", content=f"answer {i}"),
+    ]
+
+
+def test_split_point_keeps_recent_turns_and_tool_pairs():
+    summarizer = RollingSummarizer(FakeModel(), None, keep_turns=2)
+    messages = turn(1) + turn(2) + turn(3)
+    assert summarizer.split_point(messages) == 4
+    assert summarizer.split_point(messages, keep_turns=1) == 8
+    # The current turn is never compacted
+    assert summarizer.split_point(messages, keep_turns=0) == 8
+    assert summarizer.split_point(turn(1) + turn(2)) == 0
+
+
+def test_render_includes_tool_calls_and_clips_results():
+    messages = turn(1)
+    messages[2].content[0].content = "x" * 50
+    text = render_messages(messages, max_result_chars=10)
+    assert 'called google_search with {"query": "1"}' in text
+    assert "tool result: " + "x" * 10 + "\n" in text
+    assert "x" * 11 not in text
+
+
+def test_summaries_are_incremental():
+    model = FakeModel()
+    summarizer = RollingSummarizer(model, "Summarize")
+    assert asyncio.run(summarizer.summarize("", turn(1))) == "summary 1"
+    asyncio.run(summarizer.summarize("summary 1", turn(2)))
+    assert "summary 1" in model.prompts[1]
+    assert "question 2" in model.prompts[1] and "question 1" not in model.prompts[1]
+
+
+def test_compaction_moves_old_turns_into_the_system_prompt():
+    agent = AsyncAgent(model=FakeModel())
+    agent.summarizer.keep_turns = 1
+    agent.messages = turn(1) + turn(2)
+    system_prompt = agent._system()
+
+    assert asyncio.run(agent.compact())
+    assert [message.content for message in agent.messages[:1]] == ["question 2"]
+    assert agent.memory == "summary 1"
+    assert agent._system().endswith("summary 1") and agent._system() is agent._system()
+    assert system_prompt != agent._system()
+
+
+def test_background_compaction_is_dropped_when_history_was_trimmed():
+    model = FakeModel()
+    agent = AsyncAgent(model=model)
+    agent.summarizer.keep_turns = 1
+    agent.summarizer.compact_after_tokens = 1
+    agent.messages = turn(1) + turn(2)
+
+    async def scenario():
+        model.release.clear()
+        await agent._maybe_compact()
+        await asyncio.sleep(0)
+        # Meanwhile the token budget dropped the oldest turn
+        del agent.messages[:4]
+        model.release.set()
+        await agent.wait_for_compaction()
+
+    asyncio.run(scenario())
+    assert agent.memory == ""
+    assert len(agent.messages) == 4
+
+
+class TruncatingModel(FakeModel):
+    """Runs out of output tokens on the turn after the tool round, then answers; summaries go through FakeModel."""
+
+    def __init__(self):
+        super().__init__()
+        self.turns = 0
+
+    async def agenerate(self, messages, tool_list, system_prompt=None, request_builder=None):
+        if not tool_list:
+            return await super().agenerate(messages, tool_list, system_prompt, request_builder)
+        self.turns += 1
+        if self.turns == 1:
+            return {"stop_reason": "tool_use", "content": [{"type": "tool_use", "id": "t1", "name": "lookup", "input": {"query": "q"}}]}
+        if self.turns == 2:
+            return {"stop_reason": "max_tokens", "content": [{"type": "text", "text": "cut"}]}
+        return {"stop_reason": "end_turn", "content": [{"type": "text", "text": "answer"}]}
+
+
+def test_max_tokens_on_a_first_turn_folds_its_tool_rounds(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "OUTPUT_TRACE_PATH", str(tmp_path / "trace.txt"))
+    agent = AsyncAgent(model=TruncatingModel())
+    agent.stream = False
+    agent.print_message = lambda message: None
+    agent.summarizer.compact_after_tokens = 0
+    agent.register("lookup", lambda query: [SearchResult(title=query, query=query, summary="found")])
+
+    answer = asyncio.run(agent.execute("question"))
+    assert answer.content[0].text == "answer" and agent.stop_reason == "end_turn"
+    assert agent.memory == "summary 1" and "found" in agent.model.prompts[0]
+    assert [message.role for message in agent.messages] == ["user", "assistant"]
+    assert agent.messages[0].content == "question"
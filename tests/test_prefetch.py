@@ -0,0 +1,84 @@
+import threading
+import time
+
+from src.tools.prefetch import PagePrefetcher, page_key
+from src.tools.readwebpage import ReadWebPage
+from src.types.models import SearchResult
+
+
+class SlowFetch:
+    def __init__(self, fail=()):
+        self.release = threading.Event()
+        self.fetched = []
+        self.fail = set(fail)
+
+    def __call__(self, url):
+        self.release.wait(2)
+        self.fetched.append(url)
+        if url in self.fail:
+            return SearchResult(title="HTTP Error 500", query=url), 0
+        return SearchResult(title=f"page {url}", query=url, summary="text"), 1000
+
+
+def test_page_key_ignores_trailing_slash_and_fragment():
+    assert page_key("https://Example.com/a/#top") == page_key("https://example.com/a")
+
+
+def test_take_waits_for_inflight_fetch_and_counts_hits():
+    fetch = SlowFetch()
+    prefetcher = PagePrefetcher(fetch, top_n=2)
+    assert prefetcher.prefetch(["https://a.com", "https://b.com", "https://c.com", None]) == 2
+
+    threading.Timer(0.05, fetch.release.set).start()
+    page = prefetcher.take("https://a.com/")
+    assert page.title == "page https://a.com"
+    assert prefetcher.take("https://c.com") is None
+
+    stats = prefetcher.snapshot()
+    assert stats["hits"] == 1 and stats["inflight_hits"] == 1 and stats["misses"] == 1
+    assert stats["prefetched"] == 2 and stats["hit_rate"] == 0.5 and stats["used_bytes"] == 1000
+    prefetcher.close()
+
+
+def test_unread_pages_count_as_wasted_and_failures_are_not_served():
+    fetch = SlowFetch(fail={"https://bad.com"})
+    fetch.release.set()
+    prefetcher = PagePrefetcher(fetch, top_n=3, ttl=0.05)
+    prefetcher.prefetch(["https://good.com", "https://bad.com"])
+    assert prefetcher.take("https://bad.com") is None
+    time.sleep(0.1)
+
+    stats = prefetcher.snapshot()
+    assert stats["failed"] == 1 and stats["wasted"] == 1 and stats["wasted_bytes"] == 1000
+    assert stats["entries"] == 0
+    prefetcher.close()
+
+
+def test_reader_serves_prefetched_pages_without_fetching():
+    reader = ReadWebPage()
+    reader.fetch_page = lambda url: (_ for _ in ()).throw(AssertionError("network fetch for " + url))
+    fetch = SlowFetch()
+    fetch.release.set()
+    reader.prefetcher = PagePrefetcher(fetch)
+    reader.prefetcher.prefetch(["https://a.com"])
+
+    assert reader.search("https://a.com")[0].title == "page https://a.com"
+    reader.prefetcher.close()
+
+
+def test_prefetches_share_the_readers_host_slots():
+    reader = ReadWebPage(max_concurrency=1, max_per_host=1)
+    fetch = SlowFetch()
+    reader.fetch_page = fetch
+    reader.prefetcher = PagePrefetcher(reader.fetch_page, limiter=reader.limiter)
+    reader.prefetcher.prefetch(["https://a.com/1", "https://a.com/2"])
+    # Both prefetches go through the one worker and host slot; the second waits without a thread
+    assert reader.limiter.snapshot() == {"active": 1, "waiting": 1}
+
+    threading.Timer(0.05, fetch.release.set).start()
+    # Waiting on the in-flight prefetches holds no slot, so this neither deadlocks nor fetches twice
+    pages = reader.search(["https://a.com/2", "https://a.com/1"])
+    assert [page.title for page in pages] == ["page https://a.com/2", "page https://a.com/1"]
+    assert sorted(fetch.fetched) == ["https://a.com/1", "https://a.com/2"]
+    reader.prefetcher.close()
+    reader.limiter.close()
@@ -0,0 +1,81 @@
+import json
+from src.llm.request import RequestBuilder
+from src.types.models import Message, ContentBlock, APIToolSchema, AnthropicAPIBody, InputSchema
+
+
+model_config = {"max_tokens": 1000, "top_k": 200, "top_p": 0.9}
+tools = [
+    APIToolSchema(name="google_search", description="Search Google", input_schema=InputSchema(properties={"query": {"type": "string"}}, required=["query"])),
+    APIToolSchema(name="wikipedia_search", description="Search Wikipedia"),
+]
+
+
+def full_dump(messages, tool_list, system_prompt):
+    return AnthropicAPIBody(
+        anthropic_version="bedrock-2023-05-31",
+        max_tokens=model_config['max_tokens'],
+        top_k=model_config['top_k'],
+        top_p=model_config['top_p'],
+        messages=messages,
+        tools=tool_list,
+        tool_choice={"type": "auto"},
+        system=system_prompt
+    ).model_dump_json(exclude_none=True)
+
+
+def test_matches_full_dump_as_history_grows():
+    builder = RequestBuilder(model_config)
+    messages = [Message(role="user", content="Who is Neil Perry? é")]
+    assert json.loads(builder.build(messages, tools, "system")) == json.loads(full_dump(messages, tools, "system"))
+
+    messages.append(Message(role="assistant", content=[
+        ContentBlock(text="Searching"),
+        ContentBlock(type="tool_use", id="t1", name="google_search", input={"query": "Neil Perry"}),
+    ]))
+    messages.append(Message(role="user", content=[ContentBlock(type="tool_result", tool_use_id="t1", content="results")]))
+    assert json.loads(builder.build(messages, tools, "system")) == json.loads(full_dump(messages, tools, "system"))
+    assert builder.encoded_messages == 3
+
+
+def test_only_new_or_replaced_messages_are_encoded():
+    builder = RequestBuilder(model_config)
+    messages = [Message(role="user", content="q"), Message(role="assistant", content="a")]
+    builder.build(messages, tools, "system")
+    builder.build(messages, tools, "system")
+    assert builder.encoded_messages == 2
+
+    # Merging replaces the content of the last message, which must be re-encoded
+    messages[-1].content = [ContentBlock(text="a"), ContentBlock(text="b")]
+    body = json.loads(builder.build(messages, tools, "system"))
+    assert builder.encoded_messages == 3
+    assert body["messages"][-1]["content"][-1]["text"] == "b"
+
+    # A replaced history (e.g. after summarization) drops the stale entries
+    body = json.loads(builder.build([Message(role="user", content="summary")], tools, "system"))
+    assert [message["content"] for message in body["messages"]] == ["summary"]
+
+
+def test_prompt_caching_breakpoints():
+    builder = RequestBuilder(model_config, prompt_caching=True)
+    messages = [Message(role="user", content="q"), Message(role="assistant", content=[ContentBlock(text="a")])]
+    body = json.loads(builder.build(messages, tools, "system"))
+
+    assert body["system"] == [{"type": "text", "text": "system", "cache_control": {"type": "ephemeral"}}]
+    assert "cache_control" not in body["tools"][0]
+    assert body["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert body["messages"][0]["content"] == "q"
+    assert body["messages"][-1]["content"][-1]["cache_control"] == {"type": "ephemeral"}
+    # The history itself is left untouched
+    assert messages[-1].content[-1].cache_control is None
+
+    messages.append(Message(role="user", content="next"))
+    body = json.loads(builder.build(messages, tools, "system"))
+    assert "cache_control" not in body["messages"][1]["content"][-1]
+
+
+def test_requests_without_tools_omit_tool_choice():
+    builder = RequestBuilder(model_config)
+    body = json.loads(builder.build([Message(role="user", content="summarize")], [], "system"))
+    assert "tools" not in body and "tool_choice" not in body
+    body = json.loads(builder.build([Message(role="user", content="summarize")], tools, "system"))
+    assert body["tool_choice"] == {"type": "auto"}
@@ -0,0 +1,74 @@
+import json
+
+from src.tools.retrieval import BM25Index, ChunkRetriever, chunk_text
+from src.types.models import SearchResult
+
+
+def page(topics):
+    return "\n".join(f"This paragraph is about {topic}. " + "filler words here. " * 20 for topic in topics)
+
+
+def test_chunks_respect_the_size_limit():
+    text = page(["a", "b", "c"]) + "\n" + "x" * 3000
+    chunks = chunk_text(text, max_chars=500)
+    assert all(len(chunk) <= 500 for chunk in chunks)
+    assert sum(chunk.count("This paragraph is about") for chunk in chunks) == 3
+    assert sum(chunk.count("x") for chunk in chunks) == 3000
+
+
+def test_bm25_prefers_rare_matching_terms():
+    index = BM25Index()
+    volcano = index.add("the volcano erupted in 1815")
+    index.add("the weather in 1815 was cold")
+    index.add("the weather in 1816 was colder")
+    scores = index.scores("volcano weather")
+    assert max(scores, key=scores.get) == volcano
+
+    index.remove(volcano, "the volcano erupted in 1815")
+    assert "volcano" not in index.postings
+    assert len(index) == 2
+
+
+def test_large_results_are_reduced_to_relevant_passages():
+    retriever = ChunkRetriever(threshold_chars=2000, chunk_chars=600, top_k=2)
+    topics = ["cats", "dogs", "tambora volcano", "bridges", "rivers", "eruption ash", "music"]
+    small = SearchResult(title="small", query="q", summary="short text")
+    big = SearchResult(title="big", query="q", summary=page(topics))
+
+    reduced = retriever.reduce([small, big], "tambora eruption")
+    assert reduced[0] is small
+    assert "tambora volcano" in reduced[1].summary and "eruption ash" in reduced[1].summary
+    assert "cats" not in reduced[1].summary
+    assert "read_more" in reduced[1].summary
+    assert len(reduced[1].summary) < len(big.summary) / 2
+
+
+def test_read_more_returns_only_unseen_passages():
+    retriever = ChunkRetriever(threshold_chars=2000, chunk_chars=600, top_k=2)
+    retriever.reduce([SearchResult(title="big", query="q", summary=page(["cats", "dogs", "volcano", "rivers", "music"]))], "volcano")
+
+    more = retriever.read_more("rivers")
+    assert more[0].title == "big" and "rivers" in more[0].summary
+    assert "about volcano" not in more[0].summary
+    assert retriever.read_more("rivers")[0].summary == ""
+
+
+def test_sources_are_evicted_least_recently_used():
+    retriever = ChunkRetriever(threshold_chars=100, chunk_chars=600, top_k=1, max_sources=2)
+    for name in ["first", "second", "third"]:
+        retriever.reduce([SearchResult(title=name, query="q", summary=page([name, "other"]))], name)
+    assert [title for title, _ in retriever.sources.values()] == ["second", "third"]
+    assert retriever.read_more("first")[0].summary == ""
+    assert retriever.stats()["chunks"] == len(retriever.chunks)
+
+
+def test_read_more_survives_a_dump_and_load():
+    retriever = ChunkRetriever(threshold_chars=2000, chunk_chars=600, top_k=2)
+    retriever.reduce([SearchResult(title="big", query="q", summary=page(["cats", "dogs", "volcano", "rivers", "music"]))], "volcano")
+
+    restored = ChunkRetriever(threshold_chars=2000, chunk_chars=600, top_k=2)
+    restored.load(json.loads(json.dumps(retriever.dump())))
+    assert restored.stats() == retriever.stats()
+    more = restored.read_more("rivers")
+    assert more[0].title == "big" and "[s0 passage" in more[0].summary and "about volcano" not in more[0].summary
+    assert restored.reduce([SearchResult(title="next", query="q", summary=page(["a", "b", "c", "d", "e"]))], "a")[0].summary.count("s1") >= 1
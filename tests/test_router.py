@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from src.agent.agent import AsyncAgent
+from src.config.setup import config
+from src.llm.request import RequestBuilder
+from src.llm.router import ModelRouter, get_model
+from src.types.models import InputSchema, SearchResult
+from src.utils.tracing import Tracer
+
+
+class ScriptedModel:
+    def __init__(self, model_id, responses):
+        self.model_id = model_id
+        self.responses = list(responses)
+        self.calls = 0
+
+    def request_builder(self):
+        return RequestBuilder({"max_tokens": 100, "top_k": 1, "top_p": 1.0})
+
+    async def agenerate(self, messages, tool_list, system_prompt=None, request_builder=None):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+def tool_call(name, arguments):
+    return {"stop_reason": "tool_use", "usage": {"input_tokens": 10, "output_tokens": 2},
+            "content": [{"type": "tool_use", "id": f"t-{name}", "name": name, "input": arguments}]}
+
+
+def answer(text):
+    return {"stop_reason": "end_turn", "usage": {"input_tokens": 20, "output_tokens": 5}, "content": [{"type": "text", "text": text}]}
+
+
+@pytest.fixture
+def make_agent(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "OUTPUT_TRACE_PATH", str(tmp_path / "trace.txt"))
+
+    def make(fast, large):
+        router = ModelRouter({"fast": fast, "large": large}, {"tool_selection": "fast", "synthesis": "large", "summarize": "fast"}, escalate_to="large")
+        agent = AsyncAgent(router=router)
+        agent.tracer = Tracer()
+        agent.stream = False
+        agent.register("lookup", lambda query: [SearchResult(title="Paris", query=query, summary="capital of France")],
+                       input_schema=InputSchema(properties={"query": {"type": "string"}}, required=["query"]))
+        return agent
+    return make
+
+
+def test_tool_turns_use_fast_tier_and_empty_answers_escalate(make_agent):
+    fast = ScriptedModel("fast-model", [tool_call("lookup", {"query": "paris"}), answer(" ")])
+    large = ScriptedModel("large-model", [answer("Paris is the capital")])
+    agent = make_agent(fast, large)
+
+    result = asyncio.run(agent.execute("capital of France?"))
+
+    assert result.content[0].text == "Paris is the capital"
+    assert fast.calls == 2 and large.calls == 1
+    # The discarded draft is still paid for
+    assert agent.usage.input_tokens == 50
+    snapshot = agent.tracer.metrics.snapshot()
+    assert snapshot["histograms"]["llm.call[fast].seconds"]["count"] == 2
+    assert snapshot["histograms"]["llm.call[large].seconds"]["count"] == 1
+    assert snapshot["counters"]["llm.escalations[fast]"] == 1
+
+
+def test_fast_tier_answers_are_redone_by_the_synthesis_tier(make_agent):
+    fast = ScriptedModel("fast-model", [tool_call("lookup", {"query": "paris"}), answer("Paris")])
+    large = ScriptedModel("large-model", [answer("Paris is the capital of France")])
+    agent = make_agent(fast, large)
+
+    assert asyncio.run(agent.execute("capital of France?")).content[0].text == "Paris is the capital of France"
+    assert fast.calls == 2 and large.calls == 1
+    assert agent.tracer.metrics.snapshot()["counters"]["llm.escalations[fast]"] == 1
+
+
+def test_answers_go_to_the_synthesis_tier_and_errors_to_escalate_to():
+    router = ModelRouter({"fast": object(), "mid": object(), "large": object()}, {"tool_selection": "fast", "synthesis": "mid"}, escalate_to="large")
+    assert router.escalation_reason("fast", answer("x"), {}) == "answer from a tool-selection tier"
+    assert router.escalation_tier("fast", answer("x")) == "mid"
+    assert router.escalation_reason("mid", answer("x"), {}) is None
+    assert router.escalation_tier("fast", tool_call("lookup", {})) == "large"
+
+
+def test_bad_tool_calls_escalate():
+    router = ModelRouter({"fast": object(), "large": object()}, {"tool_selection": "fast"}, escalate_to="large")
+    agent_tools = {}
+    assert router.escalation_reason("fast", tool_call("lookup", {}), agent_tools) == "unknown tool lookup"
+    assert router.escalation_reason("fast", {"content": []}, agent_tools) == "invalid response"
+    assert router.escalation_reason("large", answer("x"), agent_tools) is None
+    assert router.escalation_reason("fast", {**answer("cut"), "stop_reason": "max_tokens"}, agent_tools) == "stop_reason max_tokens"
+
+
+def test_missing_arguments_escalate(make_agent):
+    agent = make_agent(ScriptedModel("fast", []), ScriptedModel("large", []))
+    assert agent.router.escalation_reason("fast", tool_call("lookup", {}), agent.tools) == "lookup without ['query']"
+    assert agent.router.escalation_reason("fast", tool_call("lookup", {"query": "x"}), agent.tools) is None
+
+
+def test_unknown_tier_is_rejected():
+    with pytest.raises(ValueError):
+        ModelRouter({"large": object()}, {"tool_selection": "fast"})
+
+
+def test_models_are_shared_per_id_and_config():
+    fast = get_model("router-test-model", {"max_tokens": 1000})
+    assert get_model("router-test-model", {"max_tokens": 1000}) is fast
+    assert get_model("router-test-model", {"max_tokens": 2000}) is not fast
+    assert get_model("router-test-model", {"max_tokens": 2000}).max_tokens == 2000
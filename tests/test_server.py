@@ -0,0 +1,111 @@
+import asyncio
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.config.setup import config
+from src.llm.request import RequestBuilder
+from src.server.app import AgentHTTPServer
+from src.server.session import SessionManager, AdmissionError
+
+
+class FakeModel:
+    def __init__(self):
+        self.release = threading.Event()
+        self.release.set()
+
+    def request_builder(self):
+        return RequestBuilder({"max_tokens": 100, "top_k": 1, "top_p": 1.0})
+
+    async def agenerate_stream(self, messages, tool_list, system_prompt=None, on_text=None, request_builder=None):
+        await asyncio.to_thread(self.release.wait)
+        for text in ["Hello ", "world"]:
+            on_text(text)
+        return {"stop_reason": "end_turn", "content": [{"type": "text", "text": "Hello world"}], "usage": {"input_tokens": 10, "output_tokens": 2}}
+
+
+class NoTools:
+    def register(self, agent):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "OUTPUT_TRACE_PATH", str(tmp_path / "trace.txt"))
+    manager = SessionManager(FakeModel(), NoTools(), max_sessions=2, max_active_queries=1)
+    server = AgentHTTPServer(("127.0.0.1", 0), manager)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    manager.shutdown()
+
+
+def call(server, method, path, payload=None):
+    data = json.dumps(payload).encode() if payload is not None else None
+    request = urllib.request.Request(f"http://127.0.0.1:{server.server_address[1]}{path}", data=data, method=method)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, response.headers, response.read().decode()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read().decode()
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_streams_answers_over_sse(server):
+    status, _, body = call(server, "POST", "/sessions")
+    assert status == 201
+    session_id = json.loads(body)["session_id"]
+
+    status, headers, body = call(server, "POST", f"/sessions/{session_id}/query", {"query": "hi"})
+    assert status == 200 and headers["Content-Type"].startswith("text/event-stream")
+    events = parse_events(body)
+    assert [data["text"] for event, data in events if event == "delta"] == ["Hello ", "world"]
+    assert events[-1][0] == "done" and events[-1][1]["answer"] == "Hello world"
+
+    status, _, body = call(server, "GET", "/metrics")
+    metrics = json.loads(body)
+    assert metrics["queries"] == 1 and metrics["usage"]["input_tokens"] == 10
+
+
+def test_sessions_are_isolated_and_json_mode_works(server):
+    first = json.loads(call(server, "POST", "/sessions")[2])["session_id"]
+    second = json.loads(call(server, "POST", "/sessions")[2])["session_id"]
+    call(server, "POST", f"/sessions/{first}/query", {"query": "one", "stream": False})
+    status, _, body = call(server, "POST", f"/sessions/{second}/query", {"query": "two", "stream": False})
+    assert status == 200 and json.loads(body)["answer"] == "Hello world"
+
+    manager = server.manager
+    assert [m.content for m in manager.get(first).agent.messages if m.role == "user"] == ["one"]
+    assert [m.content for m in manager.get(second).agent.messages if m.role == "user"] == ["two"]
+
+
+def test_admission_control(server):
+    manager = server.manager
+    sessions = [manager.create(), manager.create()]
+    status, headers, _ = call(server, "POST", "/sessions")
+    assert status == 503 and headers["Retry-After"]
+
+    manager.model.release.clear()
+    future = manager.submit(sessions[0], "slow")
+    with pytest.raises(AdmissionError):
+        manager.submit(sessions[1], "rejected")
+    status, _, _ = call(server, "POST", f"/sessions/{sessions[0].id}/query", {"query": "again"})
+    assert status == 409
+    manager.model.release.set()
+    assert future.result(timeout=10)["answer"] == "Hello world"
+    assert manager.metrics()["queries_rejected"] == 1
+
+    assert call(server, "DELETE", f"/sessions/{sessions[1].id}")[0] == 200
+    assert call(server, "GET", "/health")[0] == 200
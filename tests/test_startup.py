@@ -0,0 +1,26 @@
+from benchmarks.startup import DEFERRED_MODULES, loaded_modules, run
+from src.config.setup import config
+from src.tools.toolkit import Toolkit
+
+
+def test_cli_startup_defers_heavy_modules():
+    loaded = {name.split('.')[0] for name in loaded_modules()}
+    assert not loaded & set(DEFERRED_MODULES)
+
+
+def test_config_loads_on_first_access():
+    code = "import sys; from src.config.setup import config; print('yaml' in sys.modules, config.MAX_ITERATIONS > 0, 'yaml' in sys.modules)"
+    assert run(code).stdout.split() == ["False", "True", "True"]
+
+
+def test_toolkit_builds_backends_on_first_use(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "TOOL_CACHE", {"path": str(tmp_path / "cache.sqlite")})
+    toolkit = Toolkit()
+    assert toolkit._backends == {} and toolkit.prefetcher is None
+    assert not (tmp_path / "cache.sqlite").exists()
+
+    reader = toolkit.read_web_page
+    assert toolkit.read_web_page is reader
+    assert set(toolkit._backends) == {"read_web_page"}
+    assert reader.prefetcher is toolkit.prefetcher
+    toolkit.close()
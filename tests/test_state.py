@@ -0,0 +1,108 @@
+import asyncio
+import json
+import traceback
+
+import pytest
+
+from src.agent.agent import AsyncAgent, ACT, DONE, THINK
+from src.config.setup import config
+from src.llm.request import RequestBuilder
+from src.types.models import SearchResult
+
+
+class LoopingModel:
+    """Asks for `lookups` tool calls, then answers; records the stack depth of every call."""
+
+    def __init__(self, lookups):
+        self.lookups = lookups
+        self.calls = 0
+        self.depths = []
+
+    def request_builder(self):
+        return RequestBuilder({"max_tokens": 100, "top_k": 1, "top_p": 1.0})
+
+    async def agenerate(self, messages, tool_list, system_prompt=None, request_builder=None):
+        self.calls += 1
+        self.depths.append(len(traceback.extract_stack()))
+        if self.calls <= self.lookups:
+            return {"stop_reason": "tool_use", "usage": {"input_tokens": 1, "output_tokens": 1},
+                    "content": [{"type": "tool_use", "id": f"t{self.calls}", "name": "lookup", "input": {"query": f"q{self.calls}"}}]}
+        return {"stop_reason": "end_turn", "usage": {"input_tokens": 1, "output_tokens": 1}, "content": [{"type": "text", "text": "done"}]}
+
+
+@pytest.fixture
+def make_agent(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "OUTPUT_TRACE_PATH", str(tmp_path / "trace.txt"))
+
+    def make(model, max_iterations=5):
+        agent = AsyncAgent(model=model)
+        agent.stream = False
+        agent.max_iterations = max_iterations
+        agent.print_message = lambda message: None
+        agent.summarizer.compact_after_tokens = 0
+        agent.register("lookup", lambda query: [SearchResult(title=query, query=query, summary="found")])
+        return agent
+    return make
+
+
+def test_long_tool_loops_do_not_grow_the_stack(make_agent):
+    model = LoopingModel(lookups=60)
+    agent = make_agent(model, max_iterations=100)
+    answer = asyncio.run(agent.execute("question"))
+    assert answer.content[0].text == "done" and agent.current_iteration == 61
+    assert max(model.depths) == min(model.depths)
+
+
+def test_paused_query_resumes_from_a_checkpoint(make_agent):
+    first = make_agent(LoopingModel(lookups=2))
+    first.start("question")
+    assert asyncio.run(first.run(max_steps=1)) is None
+    assert first.state.phase == ACT and first.state.pending_tool_calls[0]["name"] == "lookup"
+
+    long_page = "\n".join(f"This paragraph is about {topic}. " + "filler words here. " * 200 for topic in ["cats", "rivers"])
+    first.retriever.reduce([SearchResult(title="page", query="q", summary=long_page)], "cats")
+
+    checkpoint = json.loads(json.dumps(first.checkpoint()))
+    model = LoopingModel(lookups=2)
+    model.calls = 1
+    second = make_agent(model)
+    second.restore(checkpoint)
+    # Pages the history says can be read further are still indexed
+    assert "about rivers" in second.retriever.read_more("rivers")[0].summary
+
+    answer = asyncio.run(second.run())
+    assert answer.content[0].text == "done" and second.state.phase == DONE
+    assert second.current_iteration == 3
+    tool_results = [block for message in second.messages if message.role == "user" and not isinstance(message.content, str)
+                    for block in message.content if block.type == "tool_result"]
+    assert [block.tool_use_id for block in tool_results] == ["t1", "t2"]
+
+
+def test_max_iterations_ends_the_query(make_agent):
+    agent = make_agent(LoopingModel(lookups=3), max_iterations=3)
+    answer = asyncio.run(agent.execute("question"))
+    assert answer.content.startswith("I received an error max_iteraction_reached")
+    assert agent.state.phase == DONE and agent.stop_reason == "error"
+
+    # The last tool round is answered, so the next query continues a valid history
+    assert asyncio.run(agent.execute("next question")).content[0].text == "done"
+    roles = [message.role for message in agent.messages]
+    assert all(first != second for first, second in zip(roles, roles[1:]))
+    for previous, message in zip(agent.messages, agent.messages[1:]):
+        if previous.role == "assistant" and not isinstance(previous.content, str):
+            calls = [block.id for block in previous.content if block.type == "tool_use"]
+            assert [block.tool_use_id for block in message.content if block.type == "tool_result"] == calls
+    assert agent.messages[-2].content[-1].text == "next question"
+
+
+def test_steps_alternate_between_think_and_act(make_agent):
+    agent = make_agent(LoopingModel(lookups=1))
+    agent.start("question")
+    phases = []
+
+    async def drive():
+        while agent.state.phase != DONE:
+            phases.append(await agent.step())
+
+    asyncio.run(drive())
+    assert phases == [ACT, THINK, DONE]
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+
+from src.config.setup import config
+from src.server.session import SessionManager
+from src.server.store import SessionStore
+from tests.test_server import FakeModel, NoTools
+
+
+@pytest.fixture(autouse=True)
+def trace_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "OUTPUT_TRACE_PATH", str(tmp_path / "trace.txt"))
+
+
+def test_store_round_trips_compressed_state(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.sqlite"))
+    state = {"messages": [{"role": "user", "content": "same words " * 500}], "iteration": 2}
+    size = store.save("s1", state, created=1.0, last_used=2.0)
+
+    assert size < 1000
+    assert store.load("s1") == (state, 1.0, 2.0)
+    assert store.load("missing") is None
+    assert store.expire(older_than=3.0) == ["s1"] and store.count() == 0
+    assert store.snapshot()["total_saves"] == 1
+    store.close()
+
+
+def test_idle_sessions_are_evicted_and_rehydrated(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.sqlite"))
+    manager = SessionManager(FakeModel(), NoTools(), max_sessions=10, max_hot_sessions=1, store=store)
+    first = manager.create()
+    manager.submit(first, "one").result(timeout=10)
+
+    second = manager.create()
+    metrics = manager.metrics()
+    assert metrics["sessions"] == 2 and metrics["hot_sessions"] == 1 and metrics["sessions_evicted"] == 1
+    assert metrics["store"]["stored_sessions"] == 1
+
+    # A session evicted after get() is taken back from the store instead of running on a stale copy
+    stale = manager.get(second.id)
+    rehydrated = manager.get(first.id)
+    assert rehydrated is not first and manager.metrics()["sessions_rehydrated"] == 1
+    assert [m.content for m in rehydrated.agent.messages if m.role == "user"] == ["one"]
+    assert manager.submit(stale, "two").result(timeout=10)["answer"] == "Hello world"
+    assert manager.metrics()["sessions"] == 2
+
+    assert manager.tracer.metrics.snapshot()["histograms"]["session.rehydrate.seconds"]["count"] >= 1
+    assert manager.close(first.id) and manager.get(first.id) is None
+    manager.shutdown()
+
+    reopened = SessionStore(str(tmp_path / "sessions.sqlite"))
+    state, _, _ = reopened.load(second.id)
+    assert [m["content"] for m in state["messages"] if m["role"] == "user"] == ["two"]
+    reopened.close()
+
+
+def test_sessions_are_not_checkpointed_while_compacting(tmp_path):
+    store = SessionStore(str(tmp_path / "sessions.sqlite"))
+    manager = SessionManager(FakeModel(), NoTools(), max_sessions=10, max_hot_sessions=1, store=store)
+    first = manager.create()
+    manager.submit(first, "one").result(timeout=10)
+
+    async def start_compaction():
+        gate = asyncio.Event()
+
+        async def compact():
+            await gate.wait()
+            first.agent.memory = "summary of one"
+
+        first.agent._compaction = asyncio.create_task(compact())
+        return gate
+
+    gate = asyncio.run_coroutine_threadsafe(start_compaction(), manager.loop).result(timeout=10)
+    second = manager.create()
+    # The compacting session stays in memory, the idle one is evicted instead
+    assert first.id in manager.sessions and second.id not in manager.sessions
+
+    manager.loop.call_soon_threadsafe(gate.set)
+    asyncio.run_coroutine_threadsafe(first.agent.wait_for_compaction(), manager.loop).result(timeout=10)
+    assert manager.get(second.id) is not None and first.id not in manager.sessions
+    state, _, _ = store.load(first.id)
+    assert state["memory"] == "summary of one"
+    manager.shutdown()
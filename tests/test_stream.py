@@ -0,0 +1,41 @@
+from src.llm.stream import StreamAccumulator
+
+
+CHUNKS = [
+    {"type": "message_start", "message": {"id": "msg_1", "role": "assistant", "content": [], "usage": {"input_tokens": 12, "output_tokens": 1}}},
+    {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}},
+    {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": "Let me "}},
+    {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": "search."}},
+    {"type": "content_block_stop", "index": 0},
+    {"type": "content_block_start", "index": 1, "content_block": {"type": "tool_use", "id": "t1", "name": "google_search", "input": {}}},
+    {"type": "content_block_delta", "index": 1, "delta": {"type": "input_json_delta", "partial_json": "{\"query\": \"Neil"}},
+    {"type": "content_block_delta", "index": 1, "delta": {"type": "input_json_delta", "partial_json": " Perry\"}"}},
+    {"type": "content_block_stop", "index": 1},
+    {"type": "message_delta", "delta": {"stop_reason": "tool_use"}, "usage": {"output_tokens": 30}},
+    {"type": "message_stop", "amazon-bedrock-invocationMetrics": {"inputTokenCount": 12, "outputTokenCount": 30}},
+]
+
+
+def test_accumulator_rebuilds_the_response_body():
+    accumulator = StreamAccumulator()
+    deltas = [accumulator.add(chunk) for chunk in CHUNKS]
+    assert [delta for delta in deltas if delta] == ["Let me ", "search."]
+
+    response = accumulator.result()
+    assert response["id"] == "msg_1" and response["stop_reason"] == "tool_use"
+    assert response["usage"] == {"input_tokens": 12, "output_tokens": 30}
+    assert response["content"] == [
+        {"type": "text", "text": "Let me search."},
+        {"type": "tool_use", "id": "t1", "name": "google_search", "input": {"query": "Neil Perry"}},
+    ]
+    assert response["amazon-bedrock-invocationMetrics"]["outputTokenCount"] == 30
+
+
+def test_tool_use_without_arguments_gets_an_empty_input():
+    accumulator = StreamAccumulator()
+    for chunk in [
+        {"type": "content_block_start", "index": 0, "content_block": {"type": "tool_use", "id": "t1", "name": "read_more"}},
+        {"type": "content_block_stop", "index": 0},
+    ]:
+        accumulator.add(chunk)
+    assert accumulator.result()["content"][0]["input"] == {}
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+from botocore.exceptions import ClientError
+
+from src.agent.agent import AsyncAgent
+from src.config.setup import config
+from src.llm.request import RequestBuilder
+from src.llm.throttle import ModelStreamError, RateLimiter, backoff_delay, is_retryable, stream_error
+
+import pytest
+
+
+def client_error(code, status=400):
+    return ClientError({"Error": {"Code": code, "Message": "m"}, "ResponseMetadata": {"HTTPStatusCode": status}}, "InvokeModel")
+
+
+def test_classifies_retryable_and_fatal_errors():
+    assert is_retryable(client_error("ThrottlingException", 429))
+    assert is_retryable(client_error("SomethingNew", 503))
+    assert not is_retryable(client_error("ValidationException"))
+    assert not is_retryable(ValueError("bad schema"))
+    error = stream_error({"throttlingException": {"message": "slow down"}})
+    assert isinstance(error, ModelStreamError) and error.code == "ThrottlingException" and is_retryable(error)
+
+
+def test_backoff_is_jittered_and_capped():
+    delays = [backoff_delay(10, base=1.0, cap=4.0) for _ in range(200)]
+    assert all(0 <= delay <= 4.0 for delay in delays)
+    assert len(set(delays)) > 1
+
+
+def test_limiter_queues_callers_beyond_the_rate():
+    limiter = RateLimiter(requests_per_minute=600)  # one request every 0.1s once the burst is spent
+    limiter._requests = 1
+
+    async def burst():
+        return await asyncio.gather(*(limiter.aacquire() for _ in range(3)))
+
+    start = time.perf_counter()
+    waits = sorted(reservation.waited for reservation in asyncio.run(burst()))
+    assert waits[0] == 0 and 0.05 < waits[1] < waits[2]
+    assert time.perf_counter() - start >= 0.15
+    stats = limiter.snapshot()
+    assert stats["acquired"] == 3 and stats["waited"] == 2 and stats["waiting"] == 0
+
+
+def test_settle_refunds_overestimated_tokens():
+    limiter = RateLimiter(tokens_per_minute=1000)
+    reservation = limiter.acquire(800)
+    limiter.settle(reservation, 300)
+    assert 690 <= limiter.snapshot()["tokens_available"] <= 1000
+    assert limiter.acquire(600).waited == 0
+
+
+class FlakyModel:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def request_builder(self):
+        return RequestBuilder({"max_tokens": 100, "top_k": 1, "top_p": 1.0})
+
+    async def agenerate(self, messages, tool_list, system_prompt=None, request_builder=None):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return {"stop_reason": "end_turn", "content": [{"type": "text", "text": "done"}], "usage": {"input_tokens": 1, "output_tokens": 1}}
+
+
+@pytest.fixture
+def agent_factory(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "OUTPUT_TRACE_PATH", str(tmp_path / "trace.txt"))
+
+    def make(model):
+        agent = AsyncAgent(model=model)
+        agent.stream = False
+        agent.backoff_base = 0.01
+        return agent
+    return make
+
+
+def test_agent_backs_off_on_throttling(agent_factory):
+    model = FlakyModel([client_error("ThrottlingException", 429), client_error("ThrottlingException", 429)])
+    answer = asyncio.run(agent_factory(model).execute("question"))
+    assert model.calls == 3 and answer.content[0].text == "done"
+
+
+def test_agent_does_not_retry_fatal_errors(agent_factory):
+    model = FlakyModel([client_error("ValidationException")])
+    agent = agent_factory(model)
+    asyncio.run(agent.execute("question"))
+    assert model.calls == 1 and agent.stop_reason == "error"
+
+
+class BrokenStreamModel(FlakyModel):
+    """Streams part of an answer, then fails with a retryable error."""
+
+    async def agenerate_stream(self, messages, tool_list, system_prompt=None, on_text=None, request_builder=None):
+        self.calls += 1
+        on_text("The answer is")
+        raise ModelStreamError("ThrottlingException", "slow down")
+
+
+def test_agent_does_not_retry_a_stream_that_already_sent_text(agent_factory):
+    model = BrokenStreamModel([])
+    agent = agent_factory(model)
+    agent.stream = True
+    deltas = []
+    agent.on_text = deltas.append
+    asyncio.run(agent.execute("question"))
+    assert model.calls == 1 and deltas == ["The answer is"]
+    assert agent.stop_reason == "error"
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import pytest
+
+from src.agent.agent import AsyncAgent
+from src.config.setup import config
+from src.llm.request import RequestBuilder
+from src.tools.cache import ResultCache
+from src.types.models import SearchResult
+from src.utils.tracing import Histogram, JsonlSpanSink, Tracer
+
+
+class ToolThenAnswerModel:
+    def __init__(self):
+        self.calls = 0
+
+    def request_builder(self):
+        return RequestBuilder({"max_tokens": 100, "top_k": 1, "top_p": 1.0})
+
+    async def agenerate(self, messages, tool_list, system_prompt=None, request_builder=None):
+        self.calls += 1
+        if self.calls % 2:
+            return {"stop_reason": "tool_use", "usage": {"input_tokens": 50, "output_tokens": 5},
+                    "content": [{"type": "tool_use", "id": f"t{self.calls}", "name": "lookup", "input": {"query": "paris"}}]}
+        return {"stop_reason": "end_turn", "usage": {"input_tokens": 80, "output_tokens": 20}, "content": [{"type": "text", "text": "Paris"}]}
+
+
+def test_histogram_percentiles_are_close():
+    histogram = Histogram()
+    for value in range(1, 1001):
+        histogram.observe(value / 1000)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 1000 and snapshot["max"] == 1.0
+    assert snapshot["p50"] == pytest.approx(0.5, rel=0.1)
+    assert snapshot["p99"] == pytest.approx(0.99, rel=0.1)
+
+
+def test_agent_spans_nest_and_feed_histograms(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "OUTPUT_TRACE_PATH", str(tmp_path / "trace.txt"))
+    tracer = Tracer(sink=JsonlSpanSink(str(tmp_path / "spans.jsonl")))
+    agent = AsyncAgent(model=ToolThenAnswerModel())
+    agent.tracer = tracer
+    agent.stream = False
+    agent.on_text = lambda text: None
+    agent.register("lookup", lambda query: [SearchResult(title="Paris", query=query, summary="capital of France")],
+                   cache=ResultCache(), cache_params={})
+
+    asyncio.run(agent.execute("capital of france?"))
+    asyncio.run(agent.execute("and again?"))
+    tracer.close()
+
+    spans = [json.loads(line) for line in (tmp_path / "spans.jsonl").read_text().splitlines()]
+    by_id = {span["spanId"]: span for span in spans}
+    parent = lambda span: by_id[span["parentSpanId"]]["name"]
+    names = [span["name"] for span in spans]
+    assert names.count("agent.execute") == 2 and names.count("agent.iteration") == 4
+
+    for span in spans:
+        if span["name"] == "agent.iteration":
+            assert parent(span) == "agent.execute"
+        elif span["name"] in ("llm.query", "tool.act"):
+            assert parent(span) == "agent.iteration"
+        elif span["name"] == "llm.attempt":
+            assert parent(span) == "llm.query"
+            attributes = {item["key"]: item["value"] for item in span["attributes"]}
+            assert "input_tokens" in attributes
+
+    snapshot = tracer.metrics.snapshot()
+    assert snapshot["histograms"]["tool.act[lookup].seconds"]["count"] == 2
+    assert snapshot["histograms"]["llm.attempt.input_tokens"]["max"] == 80
+    assert snapshot["counters"]["tool.act.cache_hits"] == 1